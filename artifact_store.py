@@ -0,0 +1,103 @@
+# Artefatos (ZIP, CSV, imagens) montados em memória e reaproveitados por hash de conteúdo
+
+from contextlib import contextmanager
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+
+import pandas as pd
+
+from dataset_cache import ResultCache
+
+# Limite do cache de artefatos (MB); pode ser ajustado por variável de ambiente
+ARTIFACT_CACHE_MAX_MB = int(os.environ.get("BDS_ARTIFACT_CACHE_MB", "128"))
+
+ARTIFACT_CACHE = ResultCache(ARTIFACT_CACHE_MAX_MB * 1024 * 1024)
+
+
+def _hash_update(h, part) -> None:
+    if isinstance(part, (bytes, bytearray)):
+        h.update(part)
+    elif isinstance(part, str):
+        h.update(part.encode("utf-8"))
+    elif isinstance(part, (pd.DataFrame, pd.Series)):
+        columns = part.columns if isinstance(part, pd.DataFrame) else [part.name]
+        h.update(repr((part.shape, tuple(map(str, columns)))).encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(part, index=True).to_numpy().tobytes())
+    elif isinstance(part, (list, tuple)):
+        for p in part:
+            _hash_update(h, p)
+    elif isinstance(part, dict):
+        for k in sorted(part, key=str):
+            _hash_update(h, str(k))
+            _hash_update(h, part[k])
+    else:
+        h.update(repr(part).encode("utf-8"))
+    h.update(b"\x00")
+
+
+def content_hash(*parts) -> str:
+    """Hash SHA-256 do conteúdo (bytes, texto, DataFrames, coleções) que define um artefato."""
+    h = hashlib.sha256()
+    for part in parts:
+        _hash_update(h, part)
+    return h.hexdigest()
+
+
+def to_bytes(content, index: bool = True) -> bytes:
+    """Converte o conteúdo de um arquivo em bytes (DataFrames/Series viram CSV UTF-8, como `to_csv`)."""
+    if isinstance(content, (bytes, bytearray)):
+        return bytes(content)
+    if isinstance(content, str):
+        return content.encode("utf-8")
+    if isinstance(content, pd.DataFrame):
+        return content.to_csv(index=index).encode("utf-8")
+    if isinstance(content, pd.Series):
+        return content.to_csv(index=index).encode("utf-8")
+    raise TypeError(f"Conteúdo de artefato não suportado: {type(content).__name__}")
+
+
+def build_zip(files: dict) -> bytes:
+    """Monta um ZIP em memória a partir de {nome_do_arquivo: conteúdo}."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, content in files.items():
+            zf.writestr(name, to_bytes(content))
+    return buffer.getvalue()
+
+
+def cached_artifact(key: str, builder) -> bytes:
+    """
+    Retorna os bytes do artefato identificado por `key` (use `content_hash` dos insumos),
+    chamando `builder()` apenas quando ele ainda não está no cache.
+    """
+    data = ARTIFACT_CACHE.get(key)
+    if data is None:
+        data = builder()
+        ARTIFACT_CACHE.set(key, data)
+    return data
+
+
+def cached_zip(files: dict, key: str | None = None) -> bytes:
+    """ZIP em memória reaproveitado quando o conteúdo dos arquivos é idêntico."""
+    return cached_artifact(key or content_hash("zip", files), lambda: build_zip(files))
+
+
+@contextmanager
+def temporary_path(suffix: str = "", data: bytes | None = None):
+    """
+    Caminho de arquivo temporário exclusivo (diretório privado), para bibliotecas que
+    só aceitam nomes de arquivo. O diretório é removido ao sair do bloco.
+    """
+    directory = tempfile.mkdtemp(prefix="bds_artifact_")
+    path = os.path.join(directory, f"artefato{suffix}")
+    try:
+        if data is not None:
+            with open(path, "wb") as f:
+                f.write(data)
+        yield path
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
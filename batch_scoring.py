@@ -0,0 +1,270 @@
+# Pontuação em lote: aplica um modelo salvo a um arquivo CSV/Parquet em blocos e grava as predições em Parquet
+#
+# Linha de comando: python batch_scoring.py --model <id do registro | modelo.joblib> --input novos.csv --output predicoes.parquet
+
+import argparse
+from collections import deque
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from model_registry import METADATA_FILE, MODEL_FILE, MODEL_REGISTRY_DIR
+
+DEFAULT_CHUNKSIZE = 50_000
+# Diretório no servidor que a interface pode ler e gravar (sem ele, só envio de arquivo);
+# caminhos arbitrários ficam restritos à linha de comando
+BATCH_SCORING_DIR = os.environ.get("BDS_SCORING_DIR")
+INPUT_SUFFIXES = (".csv", ".parquet", ".pq")
+# Blocos em processamento por worker: limita a memória a ~(workers × 2) blocos, qualquer que seja o arquivo
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+_WORKER_MODEL = None
+
+
+def resolve_model(model: str, registry_dir: str | None = None) -> tuple[str, dict]:
+    """Caminho do .joblib e metadados (vazios fora do registro) a partir de um id do registro ou de um arquivo."""
+    if os.path.isfile(model):
+        path = model
+    else:
+        path = os.path.join(registry_dir or MODEL_REGISTRY_DIR, model, MODEL_FILE)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Modelo não encontrado no registro nem como arquivo: {model}")
+    meta_path = os.path.join(os.path.dirname(path), METADATA_FILE)
+    metadata = {}
+    if os.path.isfile(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            metadata = json.load(f)
+    return path, metadata
+
+
+def scoring_dir_files() -> list:
+    """Arquivos de entrada (CSV/Parquet) disponíveis em BATCH_SCORING_DIR."""
+    if not BATCH_SCORING_DIR or not os.path.isdir(BATCH_SCORING_DIR):
+        return []
+    files = []
+    for name in sorted(os.listdir(BATCH_SCORING_DIR)):
+        try:
+            if os.path.isfile(scoring_dir_path(name, INPUT_SUFFIXES)):
+                files.append(name)
+        except ValueError:
+            continue  # outra extensão ou link para fora do diretório
+    return files
+
+
+def scoring_dir_path(name: str, suffixes: tuple) -> str:
+    """
+    Caminho de um arquivo informado na interface, resolvido dentro de BATCH_SCORING_DIR
+    (links simbólicos incluídos); recusa nomes que saiam do diretório ou com outra extensão.
+    """
+    if not BATCH_SCORING_DIR:
+        raise PermissionError("Diretório de pontuação não configurado (BDS_SCORING_DIR).")
+    base = os.path.realpath(BATCH_SCORING_DIR)
+    path = os.path.realpath(os.path.join(base, name))
+    if path == base or os.path.commonpath([base, path]) != base:
+        raise ValueError(f"O arquivo deve ficar dentro do diretório de pontuação: {name}")
+    if not path.lower().endswith(suffixes):
+        raise ValueError(f"Extensão não permitida ({', '.join(suffixes)}): {name}")
+    return path
+
+
+def _model_features(model, metadata: dict) -> list:
+    if metadata.get("features"):
+        return list(metadata["features"])
+    if hasattr(model, "feature_names_in_"):
+        return list(model.feature_names_in_)
+    raise ValueError("Não foi possível determinar as features do modelo (sem metadados nem feature_names_in_).")
+
+
+def _is_text(dtype: str) -> bool:
+    return dtype in ("object", "category") or dtype.startswith(("string", "str"))
+
+
+def _feature_dtypes(model, metadata: dict, features: list) -> dict:
+    """
+    Tipos das features no treino, gravados no registro. Em modelos salvos antes disso,
+    as colunas do passo 'cat' do pré-processador são tratadas como texto.
+    """
+    dtypes = dict(metadata.get("tipos") or {})
+    if not dtypes:
+        preprocessor = getattr(model, "named_steps", {}).get("preprocessor")
+        for name, _, columns in getattr(preprocessor, "transformers_", []):
+            if name == "cat":
+                dtypes.update({c: "object" for c in columns})
+    return {c: dtypes[c] for c in features if c in dtypes}
+
+
+def _conform_chunk(chunk: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    """
+    Ajusta o bloco aos tipos do treino: categóricas como texto (um bloco de CSV só com
+    "10", "20" seria lido como inteiro e o encoder trataria os valores como desconhecidos)
+    e erro explícito se uma feature numérica chegar como texto.
+    """
+    for col, dtype in dtypes.items():
+        series = chunk[col]
+        if _is_text(dtype):
+            if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+                chunk[col] = series.astype(object).where(series.isna(), series.astype(str))
+        elif pd.api.types.is_numeric_dtype(pd.api.types.pandas_dtype(dtype)) and not pd.api.types.is_numeric_dtype(series):
+            invalid = series[series.notna() & pd.to_numeric(series, errors="coerce").isna()]
+            example = invalid.iloc[0] if len(invalid) else None
+            raise ValueError(f"A feature '{col}' era numérica ({dtype}) no treino, mas o arquivo tem texto (ex.: {example!r}).")
+    return chunk
+
+
+def iter_chunks(path: str, columns: list, chunksize: int = DEFAULT_CHUNKSIZE, dtypes: dict | None = None):
+    """
+    Lê apenas `columns` de um CSV ou Parquet, bloco a bloco (sem carregar o arquivo
+    inteiro). As colunas de texto em `dtypes` são lidas como str no CSV, e cada bloco
+    passa por `_conform_chunk`, já que o read_csv infere os tipos bloco a bloco.
+    """
+    dtypes = dtypes or {}
+    if path.lower().endswith((".parquet", ".pq")):
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(path)
+        missing = [c for c in columns if c not in parquet.schema_arrow.names]
+        if missing:
+            raise ValueError(f"Colunas ausentes no arquivo: {', '.join(missing)}")
+        for batch in parquet.iter_batches(batch_size=chunksize, columns=columns):
+            yield _conform_chunk(batch.to_pandas(), dtypes)
+    else:
+        header = pd.read_csv(path, nrows=0).columns
+        missing = [c for c in columns if c not in header]
+        if missing:
+            raise ValueError(f"Colunas ausentes no arquivo: {', '.join(missing)}")
+        text = {c: str for c, dtype in dtypes.items() if _is_text(dtype)}
+        for chunk in pd.read_csv(path, usecols=columns, chunksize=chunksize, dtype=text):
+            yield _conform_chunk(chunk, dtypes)
+
+
+def _predict_chunk(model, chunk: pd.DataFrame, features: list, keep_columns: list, classes: dict,
+                   probabilities: bool, start_row: int) -> pd.DataFrame:
+    out = pd.DataFrame({"linha": np.arange(start_row, start_row + len(chunk))})
+    for col in keep_columns:
+        # como texto: o tipo inferido pelo CSV pode variar entre blocos e o schema do Parquet é fixo
+        out[col] = chunk[col].astype(str).to_numpy()
+    predictions = model.predict(chunk[features])
+    if classes:
+        predictions = pd.Series(predictions).map(lambda v: classes.get(str(v), v)).astype(str).to_numpy()
+    out["predicao"] = predictions
+    if probabilities and hasattr(model, "predict_proba"):
+        proba = model.predict_proba(chunk[features]).astype(np.float32)
+        for i, label in enumerate(getattr(model, "classes_", range(proba.shape[1]))):
+            out[f"prob_{classes.get(str(label), label) if classes else label}"] = proba[:, i]
+    return out
+
+
+def _init_worker(model_path: str, mmap_mode):
+    # cada processo carrega o modelo uma vez (memmap quando sem compressão), em vez de recebê-lo a cada bloco
+    global _WORKER_MODEL
+    import joblib
+
+    _WORKER_MODEL = joblib.load(model_path, mmap_mode=mmap_mode)
+
+
+def _worker_predict(chunk, features, keep_columns, classes, probabilities, start_row):
+    return _predict_chunk(_WORKER_MODEL, chunk, features, keep_columns, classes, probabilities, start_row)
+
+
+def score_file(model: str, input_path: str, output_path: str, chunksize: int = DEFAULT_CHUNKSIZE,
+               n_workers: int | None = None, probabilities: bool = True, keep_columns: list | None = None,
+               registry_dir: str | None = None, progress=None) -> dict:
+    """
+    Aplica o modelo (id do registro ou arquivo .joblib) ao arquivo de entrada em blocos
+    de `chunksize` linhas, predizendo os blocos em `n_workers` processos e gravando-os na
+    ordem original num único Parquet. No máximo workers × 2 blocos ficam em memória ao
+    mesmo tempo. `progress(linhas, mensagem)` é chamado após cada bloco gravado.
+    Retorna linhas, tempo e vazão (linhas/s).
+    """
+    import joblib
+    from joblib.externals.loky.process_executor import ProcessPoolExecutor
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    model_path, metadata = resolve_model(model, registry_dir)
+    mmap_mode = "r" if metadata.get("compressao", 0) == 0 else None
+    fitted = joblib.load(model_path, mmap_mode=mmap_mode)
+    features = _model_features(fitted, metadata)
+    dtypes = _feature_dtypes(fitted, metadata, features)
+    keep_columns = [c for c in (keep_columns or []) if c not in features]
+    classes = metadata.get("classes") or {}
+    n_workers = max(1, n_workers or os.cpu_count() or 1)
+
+    start = time.perf_counter()
+    n_rows = 0
+    writer = None
+    # pool loky próprio (não o reutilizável do joblib, pois o inicializador depende do modelo):
+    # processos novos em vez de fork, seguro dentro do servidor multithread do Streamlit
+    executor = ProcessPoolExecutor(n_workers, initializer=_init_worker, initargs=(model_path, mmap_mode)) if n_workers > 1 else None
+    pending = deque()
+
+    def write(frame):
+        nonlocal writer, n_rows
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(output_path, table.schema)
+        writer.write_table(table)
+        n_rows += len(frame)
+        if progress is not None:
+            elapsed = time.perf_counter() - start
+            progress(n_rows, f"{n_rows:,} linhas · {n_rows / max(elapsed, 1e-9):,.0f} linhas/s")
+
+    try:
+        next_row = 0
+        for chunk in iter_chunks(input_path, features + keep_columns, chunksize, dtypes):
+            args = (chunk, features, keep_columns, classes, probabilities, next_row)
+            next_row += len(chunk)
+            if executor is None:
+                write(_predict_chunk(fitted, *args))
+                continue
+            pending.append(executor.submit(_worker_predict, *args))
+            if len(pending) >= n_workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+    finally:
+        if executor is not None:
+            for future in pending:  # após um erro, blocos ainda não iniciados são descartados
+                future.cancel()
+            executor.shutdown(wait=True)
+        if writer is not None:
+            writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "linhas": n_rows,
+        "tempo_s": elapsed,
+        "linhas_por_s": n_rows / elapsed if elapsed > 0 else float("nan"),
+        "workers": n_workers,
+        "saida": output_path,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Aplica um modelo salvo a um CSV/Parquet em blocos e grava as predições em Parquet.")
+    parser.add_argument("--model", required=True, help="ID do registro de modelos ou caminho de um arquivo .joblib")
+    parser.add_argument("--input", required=True, help="Arquivo de entrada (.csv ou .parquet)")
+    parser.add_argument("--output", required=True, help="Arquivo Parquet de saída")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Linhas por bloco (padrão: %(default)s)")
+    parser.add_argument("--workers", type=int, default=None, help="Processos de predição (padrão: núcleos disponíveis)")
+    parser.add_argument("--keep", nargs="*", default=[], help="Colunas da entrada copiadas para a saída (ex.: um ID)")
+    parser.add_argument("--no-proba", action="store_true", help="Não grava as probabilidades das classes")
+    parser.add_argument("--registry", default=None, help="Diretório do registro (padrão: BDS_MODEL_REGISTRY)")
+    args = parser.parse_args(argv)
+
+    stats = score_file(
+        args.model, args.input, args.output, chunksize=args.chunksize, n_workers=args.workers,
+        probabilities=not args.no_proba, keep_columns=args.keep, registry_dir=args.registry,
+        progress=lambda rows, msg: print(msg, file=sys.stderr),
+    )
+    print(f"{stats['linhas']:,} linhas em {stats['tempo_s']:.2f} s ({stats['linhas_por_s']:,.0f} linhas/s, "
+          f"{stats['workers']} worker(s)) → {stats['saida']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,13 +1,18 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import pymc as pm
-import arviz as az
 import matplotlib.pyplot as plt
 from scipy import stats
 from itertools import combinations
 import io
-import xarray as xr
+
+from lazy_imports import lazy_module
+from telemetry import instrumented
+
+# pymc/pytensor, arviz e xarray são pesados: importados apenas quando um modelo é ajustado
+pm = lazy_module("pymc")
+az = lazy_module("arviz")
+xr = lazy_module("xarray")
 
 # ===============================
 def reset_bayesian_analysis_state():
@@ -66,6 +71,7 @@ def interpretar_rope(rope_prob):
 # ===============================
 # FUNÇÕES DE ANÁLISE
 # ===============================
+@instrumented()
 def run_bayesian_regression(df, target, features, draws=2000, tune=1000, chains=4, seed=None):
     """
     Executa uma regressão linear bayesiana e retorna o InferenceData.
@@ -109,6 +115,7 @@ def run_bayesian_regression(df, target, features, draws=2000, tune=1000, chains=
 
     return idata
 
+@instrumented()
 def run_bayesian_ttest(df, num_col, cat_col, draws=2000, tune=1000, chains=4, seed=None):
     """
     Executa um teste t bayesiano para dois grupos.
@@ -151,6 +158,7 @@ def run_bayesian_ttest(df, num_col, cat_col, draws=2000, tune=1000, chains=4, se
     return idata
 
 
+@instrumented()
 def run_bayesian_anova(df, num_col, cat_col, draws=2000, tune=1000, chains=4, seed=None):
     """
     Executa uma ANOVA Bayesiana para um fator.
@@ -184,6 +192,7 @@ def run_bayesian_anova(df, num_col, cat_col, draws=2000, tune=1000, chains=4, se
     idata.attrs["group_names"] = list(x)
     return idata
 
+@instrumented()
 def run_bayesian_factorial_anova(df, num_col, cat1, cat2, draws=2000, tune=1000, chains=4, seed=None):
     """
     Executa uma ANOVA Fatorial Bayesiana para dois fatores.
@@ -9,17 +9,22 @@ import io
 import zipfile
 from typing import List
 
-from data_cleaning import show_preprocessing_interface
-from feature_engineering import show_feature_engineering
-from exploratory_analysis import show_exploratory_analysis
-from model_training import show_model_training
-from model_classification_regression import show_machine_learning_page
-from bayesian_analysis import show_bayesian_analysis_page
-from model_multilevel import show_multilevel_model_extended
-from model_multilevel_lvl3 import show_multilevel_model_lvl3_full
-from model_multilevel_cross_classified import show_multilevel_model_cross
-from model_l4_extended import show_l4_model
-from multilevel_models import show_multilevel_tabs
+from lazy_imports import lazy_callable, import_timings_frame
+from telemetry import instrumented, show_telemetry_page
+from profiling import capture_profile, show_profile_report
+
+# Módulos de página são importados apenas quando a página é aberta pela primeira vez
+# (pymc, shap, xgboost, statsmodels etc. não pesam no carregamento da página inicial)
+show_preprocessing_interface = lazy_callable("data_cleaning", "show_preprocessing_interface")
+show_feature_engineering = lazy_callable("feature_engineering", "show_feature_engineering")
+show_exploratory_analysis = lazy_callable("exploratory_analysis", "show_exploratory_analysis")
+show_model_training = lazy_callable("model_training", "show_model_training")
+show_machine_learning_page = lazy_callable("model_classification_regression", "show_machine_learning_page")
+show_bayesian_analysis_page = lazy_callable("bayesian_analysis", "show_bayesian_analysis_page")
+show_multilevel_model_cross = lazy_callable("model_multilevel_cross_classified", "show_multilevel_model_cross")
+show_l4_model = lazy_callable("model_l4_extended", "show_l4_model")
+show_multilevel_tabs = lazy_callable("multilevel_models", "show_multilevel_tabs")
+show_model_registry_page = lazy_callable("model_registry", "show_model_registry_page")
 
 # --- Funções Auxiliares ---
 
@@ -46,6 +51,7 @@ def limpar_estado_l4():
         st.session_state["df_l4"] = None
 
 
+@instrumented("bds_mep.load_data")
 def load_data(uploaded_file) -> pd.DataFrame | None:
     """
     Carrega CSV ou Excel a partir do arquivo enviado e retorna um DataFrame.
@@ -298,11 +304,13 @@ PAGES = {
     "📊 Análise Exploratória": show_exploratory_page,
     "📈 Modelagem Estatística": show_statistical_modeling_page,
     "🤖 Machine Learning": show_ml_page,
+    "🗂️ Registro de Modelos": show_model_registry_page,
     "🔬 Análise Bayesiana": show_bayesian_page,
     "📚 Análise Multinível Níveis 2 e 3": show_multilevel_2_3_page,
     "🔀 Multinível Não Hierárquico": show_cross_classified_page,
     "🔷 Modelo L4": show_l4_page,
     "📤 Exportar": show_export_page,
+    "🛠️ Telemetria (admin)": show_telemetry_page,
 }
 
 st.sidebar.header("🧭 Navegação Principal")
@@ -311,4 +319,44 @@ selection = st.sidebar.radio("Selecione uma seção:", list(PAGES.keys()))
 # --- Título e Chamada da Página Selecionada ---
 st.title("📊 BDs: ambiente integrado de análise de dados")
 st.write("##### Marcos Emanoel Pereira (UFBa/UFS) & Marcus Eugênio O. Lima (UFS)")
-PAGES[selection]()
\ No newline at end of file
+
+def _skip_profiling_toggle_run():
+    # a execução disparada pelo próprio toggle não é perfilada: a captura é da próxima ação
+    st.session_state["profile_skip_run"] = True
+
+profile_now = st.session_state.get("profile_next_run") and not st.session_state.pop("profile_skip_run", False)
+if profile_now:
+    holder = {}
+    try:
+        with capture_profile(selection, trace_memory=st.session_state.get("profile_trace_memory", True)) as holder:
+            PAGES[selection]()
+    finally:
+        # guardado mesmo se a página interromper a execução (st.stop/st.rerun)
+        if "report" in holder:
+            st.session_state["last_profile"] = holder["report"]
+        st.session_state["profile_next_run"] = False
+else:
+    PAGES[selection]()
+
+if st.session_state.get("last_profile") is not None:
+    show_profile_report(st.session_state["last_profile"])
+
+# Registrado após a página, para incluir a importação feita nesta execução
+with st.sidebar.expander("⏱️ Tempos de importação"):
+    timings = import_timings_frame()
+    if timings.empty:
+        st.caption("Nenhum módulo de página importado ainda.")
+    else:
+        st.dataframe(timings.round(3), hide_index=True)
+
+with st.sidebar.expander("🔬 Perfil detalhado"):
+    st.toggle(
+        "Perfilar a próxima ação",
+        key="profile_next_run",
+        on_change=_skip_profiling_toggle_run,
+        help="A próxima execução da página (ex.: clique em um botão) roda sob cProfile e tracemalloc.",
+    )
+    st.checkbox("Rastrear memória (tracemalloc)", value=True, key="profile_trace_memory")
+    if st.session_state.get("last_profile") is not None and st.button("Descartar perfil", key="discard_profile"):
+        st.session_state["last_profile"] = None
+        st.rerun()
@@ -0,0 +1 @@
+# Benchmarks com dados sintéticos dos caminhos críticos do app (ver `python -m benchmarks --help`)
@@ -0,0 +1,53 @@
+# Linha de comando: python -m benchmarks --rows 10000 100000 --only eda. ml. --compare anterior.json
+
+import argparse
+import os
+import sys
+import time
+
+from benchmarks.harness import REGRESSION_THRESHOLD, compare_results, load_results, run_benchmarks, save_results
+from benchmarks.suites import BENCHMARKS
+
+DEFAULT_OUTPUT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks dos caminhos críticos do BDs com dados sintéticos.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000],
+                        help="Tamanhos de dataset (linhas); ex.: 10000 1000000 10000000")
+    parser.add_argument("--only", nargs="*", default=None,
+                        help="Prefixos de nome dos benchmarks (ex.: limpeza. eda.correlacao ml.)")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições por caso (a mediana é comparada)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Arquivo JSON de saída (padrão: benchmarks/results/<data>_<commit>.json)")
+    parser.add_argument("--compare", default=None, help="JSON de uma execução anterior para detectar regressões")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help="Razão atual/anterior considerada regressão (padrão: %(default)s)")
+    parser.add_argument("--list", action="store_true", help="Lista os benchmarks disponíveis e sai")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for bench in BENCHMARKS:
+            limit = f" (máx. {bench.max_rows} linhas)" if bench.max_rows else ""
+            print(f"{bench.name:<32} dataset={bench.dataset}{limit}")
+        return 0
+
+    report = run_benchmarks(args.rows, only=args.only, repeat=args.repeat, seed=args.seed)
+    output = args.output or os.path.join(
+        DEFAULT_OUTPUT_DIR, f"{time.strftime('%Y%m%d_%H%M%S')}_{report['ambiente']['commit'] or 'sem_commit'}.json"
+    )
+    save_results(report, output)
+    print(f"\nResultados salvos em {output}")
+
+    if args.compare:
+        comparison = compare_results(report, load_results(args.compare), threshold=args.threshold)
+        print("\nComparação com", args.compare)
+        print(comparison.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+        if comparison["Regressão"].any():
+            print(f"\n{int(comparison['Regressão'].sum())} caso(s) acima de {args.threshold:.2f}x a execução anterior.")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+# Geradores de dados sintéticos para os benchmarks (tamanhos configuráveis, reprodutíveis por semente)
+
+import numpy as np
+import pandas as pd
+
+# Itens por dimensão L4 e nomes das dimensões (mesma ordem das colunas L4_* do app)
+L4_DIMENSIONS = ("Trocas", "Subjetividades", "Relacoes", "Estrutura")
+L4_ITEMS_PER_DIMENSION = 5
+
+
+def _likert(rng, latent: np.ndarray, n_items: int, noise: float = 1.0) -> np.ndarray:
+    """Itens Likert 1–5 (float32) gerados a partir de um traço latente por linha."""
+    raw = latent[:, None] + rng.normal(0.0, noise, size=(latent.size, n_items)).astype(np.float32)
+    return np.clip(np.rint(3 + raw), 1, 5).astype(np.float32)
+
+
+def hierarchical(n_rows: int, n_level3: int = 100, n_level2_per_level3: int = 20, seed: int = 0) -> pd.DataFrame:
+    """
+    Alunos (nível 1) em turmas (nível 2) em escolas (nível 3), com interceptos
+    aleatórios nos dois níveis e inclinação aleatória de x1 por escola. Os
+    identificadores são inteiros, como chegam de um CSV (um Categorical com todos os
+    níveis faria o vc_formula do mixedlm gerar colunas para níveis ausentes no grupo).
+    """
+    rng = np.random.default_rng(seed)
+    n_level2 = n_level3 * n_level2_per_level3
+    level2 = rng.integers(0, n_level2, size=n_rows)
+    level3 = level2 // n_level2_per_level3
+    u3 = rng.normal(0, 2.0, n_level3)
+    u2 = rng.normal(0, 1.0, n_level2)
+    slope3 = rng.normal(0, 0.5, n_level3)
+    x1 = rng.normal(0, 1, n_rows)
+    x2 = rng.normal(0, 1, n_rows)
+    y = 10 + (1.5 + slope3[level3]) * x1 + 0.8 * x2 + u3[level3] + u2[level2] + rng.normal(0, 3, n_rows)
+    return pd.DataFrame({
+        "y": y,
+        "x1": x1,
+        "x2": x2,
+        "turma": level2,
+        "escola": level3,
+        "tratamento": rng.choice(["controle", "intervencao"], n_rows).astype(object),
+    })
+
+
+def cross_classified(n_rows: int, n_factor_a: int = 200, n_factor_b: int = 150, seed: int = 0) -> pd.DataFrame:
+    """Observações classificadas por dois fatores cruzados (escola x bairro), cada um com efeito aleatório."""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(0, n_factor_a, size=n_rows)
+    b = rng.integers(0, n_factor_b, size=n_rows)
+    x1 = rng.normal(0, 1, n_rows)
+    y = 5 + 1.2 * x1 + rng.normal(0, 1.5, n_factor_a)[a] + rng.normal(0, 1.0, n_factor_b)[b] + rng.normal(0, 2, n_rows)
+    return pd.DataFrame({
+        "y": y,
+        "x1": x1,
+        "escola": a,
+        "bairro": b,
+    })
+
+
+def l4_survey(n_rows: int, items_per_dimension: int = L4_ITEMS_PER_DIMENSION, n_groups: int = 4, seed: int = 0) -> pd.DataFrame:
+    """
+    Questionário com a estrutura L4: um bloco de itens Likert por dimensão, traços
+    latentes correlacionados, um grupo e um desfecho contínuo dependente dos traços.
+    """
+    rng = np.random.default_rng(seed)
+    k = len(L4_DIMENSIONS)
+    cov = np.full((k, k), 0.3) + 0.7 * np.eye(k)
+    group = rng.integers(0, n_groups, size=n_rows)
+    latent = rng.multivariate_normal(np.zeros(k), cov, size=n_rows).astype(np.float32)
+    latent += np.linspace(-0.5, 0.5, n_groups, dtype=np.float32)[group][:, None]
+    columns = {}
+    for d, name in enumerate(L4_DIMENSIONS):
+        items = _likert(rng, latent[:, d], items_per_dimension)
+        for i in range(items_per_dimension):
+            columns[f"{name.lower()}_{i + 1}"] = items[:, i]
+    df = pd.DataFrame(columns)
+    df["grupo"] = pd.Categorical.from_codes(group, [f"G{g + 1}" for g in range(n_groups)])
+    df["desfecho"] = latent @ np.array([0.5, 0.3, 0.2, 0.4], dtype=np.float32) + rng.normal(0, 1, n_rows)
+    return df
+
+
+def l4_item_columns(df: pd.DataFrame) -> dict:
+    """Colunas de itens de cada dimensão em um dataset gerado por `l4_survey`."""
+    return {name: [c for c in df.columns if c.startswith(f"{name.lower()}_")] for name in L4_DIMENSIONS}
+
+
+def wide_survey(n_rows: int, n_items: int = 50, missing_rate: float = 0.05, seed: int = 0) -> pd.DataFrame:
+    """
+    Questionário largo: `n_items` itens Likert (float32, com ausentes), dois grupos,
+    uma variável categórica com vários níveis e desfechos contínuo e binário.
+    """
+    rng = np.random.default_rng(seed)
+    latent = rng.normal(0, 1, n_rows).astype(np.float32)
+    items = _likert(rng, latent, n_items, noise=1.2)
+    if missing_rate > 0:
+        items[rng.random(items.shape) < missing_rate] = np.nan
+    df = pd.DataFrame(items, columns=[f"item_{i + 1:03d}" for i in range(n_items)])
+    df["sexo"] = pd.Categorical(rng.choice(["F", "M"], n_rows))
+    df["regiao"] = pd.Categorical(rng.choice(["N", "NE", "CO", "SE", "S"], n_rows))
+    df["escore"] = 2 * latent + rng.normal(0, 1, n_rows)
+    df["aprovado"] = (df["escore"] + rng.normal(0, 1, n_rows) > 0).astype(np.int8)
+    return df
+
+
+GENERATORS = {
+    "hierarquico": hierarchical,
+    "cruzado": cross_classified,
+    "l4": l4_survey,
+    "largo": wide_survey,
+}
+
+
+def make_dataset(kind: str, n_rows: int, seed: int = 0, **kwargs) -> pd.DataFrame:
+    """Gera o dataset `kind` ("hierarquico", "cruzado", "l4" ou "largo") com `n_rows` linhas."""
+    return GENERATORS[kind](n_rows, seed=seed, **kwargs)
@@ -0,0 +1,142 @@
+# Execução dos benchmarks, resultados em JSON e comparação com uma execução anterior
+
+import datetime
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import time
+
+# Os benchmarks chamam funções instrumentadas: não polui o log de telemetria do app
+os.environ.setdefault("BDS_TELEMETRY", "0")
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.datasets import make_dataset
+from benchmarks.suites import BENCHMARKS
+
+# Razão (mediana atual / mediana anterior) a partir da qual um caso é considerado regressão
+REGRESSION_THRESHOLD = 1.25
+
+
+def _quiet_streamlit() -> None:
+    """Fora do `streamlit run`, cada chamada a st.* emite avisos de contexto ausente."""
+    for name in list(logging.root.manager.loggerDict):
+        if name.startswith("streamlit"):
+            logging.getLogger(name).setLevel(logging.ERROR)
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment_info() -> dict:
+    """Metadados da execução para comparar resultados entre versões e máquinas."""
+    import sklearn
+    import statsmodels
+    import scipy
+
+    return {
+        "commit": _git_commit(),
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "scipy": scipy.__version__,
+        "statsmodels": statsmodels.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def time_call(func, repeat: int) -> dict:
+    """Cronometra `func` `repeat` vezes (tempo de relógio e de CPU do processo)."""
+    walls, cpus = [], []
+    for _ in range(repeat):
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        func()
+        walls.append(time.perf_counter() - start)
+        cpus.append(time.process_time() - cpu_start)
+    return {
+        "repeticoes": repeat,
+        "min_s": min(walls),
+        "mediana_s": statistics.median(walls),
+        "media_s": statistics.fmean(walls),
+        "cpu_mediana_s": statistics.median(cpus),
+    }
+
+
+def run_benchmarks(rows: list, only: list | None = None, repeat: int = 3, seed: int = 0, log=print) -> dict:
+    """
+    Roda os benchmarks selecionados (`only`: prefixos de nome, ex. "eda." ou "ml.random")
+    para cada tamanho em `rows`. Cada dataset é gerado uma vez por tamanho; a preparação
+    de cada caso fica fora da medição. Dependências ausentes (ex.: pymc) e falhas são
+    registradas com seu status, sem interromper os demais casos.
+    """
+    _quiet_streamlit()
+    selected = [b for b in BENCHMARKS if not only or any(b.name.startswith(p) for p in only)]
+    results = []
+    for n_rows in rows:
+        datasets = {}
+        for bench in selected:
+            entry = {"benchmark": bench.name, "dataset": bench.dataset, "linhas": n_rows}
+            if bench.max_rows is not None and n_rows > bench.max_rows:
+                results.append({**entry, "status": f"ignorado (máx. {bench.max_rows} linhas)"})
+                continue
+            if bench.dataset not in datasets:
+                start = time.perf_counter()
+                datasets[bench.dataset] = make_dataset(bench.dataset, n_rows, seed=seed)
+                log(f"dataset {bench.dataset} ({n_rows} linhas) gerado em {time.perf_counter() - start:.2f} s")
+            try:
+                func = bench.setup(datasets[bench.dataset])
+                timing = time_call(func, repeat)
+                results.append({**entry, **timing, "status": "ok"})
+                log(f"{bench.name:<32} {n_rows:>10}  mediana {timing['mediana_s']:.4f} s")
+            except ImportError as e:
+                results.append({**entry, "status": f"indisponível: {e}"})
+                log(f"{bench.name:<32} {n_rows:>10}  indisponível ({e})")
+            except Exception as e:
+                results.append({**entry, "status": f"erro: {type(e).__name__}: {e}"})
+                log(f"{bench.name:<32} {n_rows:>10}  erro ({type(e).__name__}: {e})")
+        datasets.clear()
+    _quiet_streamlit()
+    return {"ambiente": environment_info(), "resultados": results}
+
+
+def save_results(report: dict, path: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def load_results(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare_results(current: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> pd.DataFrame:
+    """
+    Compara as medianas por (benchmark, linhas) com uma execução anterior. A coluna
+    'Regressão' marca os casos em que a razão atual/anterior passa de `threshold`.
+    """
+    def frame(report):
+        df = pd.DataFrame(report["resultados"])
+        if df.empty or "mediana_s" not in df.columns:
+            return pd.DataFrame(columns=["benchmark", "linhas", "mediana_s"])
+        return df.loc[df["status"] == "ok", ["benchmark", "linhas", "mediana_s"]]
+
+    merged = frame(baseline).merge(frame(current), on=["benchmark", "linhas"], suffixes=("_anterior", "_atual"))
+    merged["razao"] = merged["mediana_s_atual"] / merged["mediana_s_anterior"]
+    merged["Regressão"] = merged["razao"] > threshold
+    return merged.sort_values("razao", ascending=False).reset_index(drop=True)
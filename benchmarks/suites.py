@@ -0,0 +1,221 @@
+# Benchmarks dos caminhos críticos, chamando as funções centrais do app sem a interface
+
+from dataclasses import dataclass
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.datasets import l4_item_columns
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    """
+    Um caso de benchmark: `setup(df)` prepara os argumentos (fora da medição) e
+    retorna a função sem argumentos que é cronometrada. `max_rows` limita o tamanho
+    de dataset em que o caso roda (ajustes MCMC/mixedlm não escalam a 10M linhas).
+    """
+    name: str
+    dataset: str
+    setup: Callable
+    max_rows: int | None = None
+
+
+# --- Limpeza ---
+
+def _outliers_winsor(df):
+    from data_cleaning import handle_outliers
+    cols = [c for c in df.columns if c.startswith("item_")][:10]
+    return lambda: handle_outliers(df, cols, method="Winsorização")
+
+
+def _outliers_remove(df):
+    from data_cleaning import handle_outliers
+    cols = [c for c in df.columns if c.startswith("item_")][:10]
+    return lambda: handle_outliers(df, cols, method="Remover linhas")
+
+
+def _impute_mean(df):
+    from data_cleaning import impute_missing
+    cols = [c for c in df.columns if c.startswith("item_")]
+    return lambda: impute_missing(df, cols, strategy="mean")
+
+
+def _standardize(df):
+    from data_cleaning import standardize_columns
+    cols = [c for c in df.columns if c.startswith("item_")]
+    return lambda: standardize_columns(df, cols)
+
+
+def _infer_types(df):
+    from type_inference import infer_types
+    as_text = df.iloc[:, :10].astype(str)
+    return lambda: infer_types(as_text)
+
+
+# --- Análise exploratória ---
+
+def _describe(df):
+    from descriptive_stats import describe_numeric
+    cols = [c for c in df.columns if c.startswith("item_")]
+    return lambda: describe_numeric(df, cols)
+
+
+def _rank_correlation(method, n_cols):
+    def setup(df):
+        from correlation_engine import rank_correlation_matrix
+        cols = [c for c in df.columns if c.startswith("item_")][:n_cols]
+        return lambda: rank_correlation_matrix(df, cols, method=method)
+    return setup
+
+
+def _anova(df):
+    from exploratory_analysis import _perform_anova_core
+    return lambda: _perform_anova_core(df, "y", ["escola"])
+
+
+def _ttest_screening(df):
+    from group_tests import two_group_screening
+    cols = [c for c in df.columns if c.startswith("item_")]
+    return lambda: two_group_screening(df, cols, "sexo")
+
+
+def _permutation(df):
+    from permutation_tests import permutation_test
+    values, labels = df["escore"].to_numpy(), df["regiao"].to_numpy()
+    return lambda: permutation_test(values, labels, statistic="f", n_permutations=1000)
+
+
+def _bootstrap_d(df):
+    from bootstrap_ci import bootstrap_ci, cohens_d_stat
+    data = np.column_stack([df["escore"].to_numpy(), (df["sexo"] == "F").to_numpy(dtype=np.float64)])
+    return lambda: bootstrap_ci(data, cohens_d_stat, n_boot=1000, strata=data[:, 1])
+
+
+# --- Machine learning (mesmo pré-processamento do app) ---
+
+def _ml_pipeline(model, numeric, categorical):
+    from sklearn.compose import ColumnTransformer
+    from sklearn.impute import SimpleImputer
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    preprocessor = ColumnTransformer(transformers=[
+        ("num", Pipeline([("imputer", SimpleImputer(strategy="mean")), ("scaler", StandardScaler())]), numeric),
+        ("cat", Pipeline([("imputer", SimpleImputer(strategy="most_frequent")),
+                          ("onehot", OneHotEncoder(handle_unknown="ignore"))]), categorical),
+    ], remainder="passthrough")
+    return Pipeline([("preprocessor", preprocessor), ("model", model)])
+
+
+def _ml_fit(model_factory, target):
+    def setup(df):
+        numeric = [c for c in df.columns if c.startswith("item_")]
+        X = df[numeric + ["regiao"]].astype({"regiao": object})
+        y = df[target]
+        pipeline = _ml_pipeline(model_factory(), numeric, ["regiao"])
+        return lambda: pipeline.fit(X, y)
+    return setup
+
+
+def _random_forest():
+    from sklearn.ensemble import RandomForestRegressor
+    return RandomForestRegressor(n_estimators=50, max_depth=12, n_jobs=-1, random_state=42)
+
+
+def _logistic():
+    from sklearn.linear_model import LogisticRegression
+    return LogisticRegression(max_iter=1000)
+
+
+def _xgboost():
+    import xgboost
+    return xgboost.XGBRegressor(n_estimators=100, random_state=42)
+
+
+def _lightgbm():
+    import lightgbm
+    return lightgbm.LGBMRegressor(n_estimators=100, random_state=42, verbose=-1)
+
+
+# --- Bayesiano (amostragem curta: mede o custo por execução, não a convergência) ---
+
+def _bayes_regression(df):
+    from bayesian_analysis import run_bayesian_regression
+    return lambda: run_bayesian_regression(df, "y", ["x1", "x2"], draws=300, tune=300, chains=2, seed=42)
+
+
+def _bayes_anova(df):
+    from bayesian_analysis import run_bayesian_anova
+    return lambda: run_bayesian_anova(df, "y", "tratamento", draws=300, tune=300, chains=2, seed=42)
+
+
+# --- Multinível ---
+
+def _mixedlm_two_levels(df):
+    import statsmodels.formula.api as smf
+    return lambda: smf.mixedlm("y ~ x1 + x2", df, groups=df["escola"], re_formula="~ 1 + x1").fit(reml=True)
+
+
+def _mixedlm_three_levels(df):
+    import statsmodels.formula.api as smf
+    return lambda: smf.mixedlm(
+        "y ~ x1 + x2", df, groups=df["escola"], re_formula="1", vc_formula={"turma": "0 + C(turma)"}
+    ).fit(reml=True)
+
+
+def _mixedlm_cross(df):
+    import statsmodels.formula.api as smf
+    return lambda: smf.mixedlm(
+        "y ~ x1", df, groups=df["escola"], re_formula="1", vc_formula={"bairro": "0 + C(bairro)"}
+    ).fit(reml=True)
+
+
+# --- L4 ---
+
+def _l4_scores(method):
+    def setup(df):
+        from model_l4_extended import l4_dimension_score
+        dimensions = l4_item_columns(df)
+
+        def run():
+            return pd.DataFrame({f"L4_{name}": l4_dimension_score(df[cols], method) for name, cols in dimensions.items()})
+        return run
+    return setup
+
+
+def _l4_group_test(df):
+    from permutation_tests import permutation_test
+    from model_l4_extended import l4_dimension_score
+    scores = {name: l4_dimension_score(df[cols], "Média").to_numpy() for name, cols in l4_item_columns(df).items()}
+    labels = df["grupo"].to_numpy()
+    return lambda: [permutation_test(v, labels, statistic="kruskal", n_permutations=1000) for v in scores.values()]
+
+
+BENCHMARKS = [
+    Benchmark("limpeza.outliers_winsorizacao", "largo", _outliers_winsor),
+    Benchmark("limpeza.outliers_remocao", "largo", _outliers_remove),
+    Benchmark("limpeza.imputacao_media", "largo", _impute_mean),
+    Benchmark("limpeza.padronizacao", "largo", _standardize),
+    Benchmark("limpeza.inferencia_tipos", "largo", _infer_types),
+    Benchmark("eda.descritivas", "largo", _describe),
+    Benchmark("eda.correlacao_spearman", "largo", _rank_correlation("spearman", 30)),
+    Benchmark("eda.correlacao_kendall", "largo", _rank_correlation("kendall", 10), max_rows=1_000_000),
+    Benchmark("eda.anova", "hierarquico", _anova),
+    Benchmark("eda.triagem_teste_t", "largo", _ttest_screening),
+    Benchmark("eda.permutacao_f", "largo", _permutation, max_rows=1_000_000),
+    Benchmark("eda.bootstrap_cohens_d", "largo", _bootstrap_d, max_rows=1_000_000),
+    Benchmark("ml.random_forest", "largo", _ml_fit(_random_forest, "escore"), max_rows=1_000_000),
+    Benchmark("ml.regressao_logistica", "largo", _ml_fit(_logistic, "aprovado")),
+    Benchmark("ml.xgboost", "largo", _ml_fit(_xgboost, "escore")),
+    Benchmark("ml.lightgbm", "largo", _ml_fit(_lightgbm, "escore")),
+    Benchmark("bayes.regressao", "hierarquico", _bayes_regression, max_rows=100_000),
+    Benchmark("bayes.anova", "hierarquico", _bayes_anova, max_rows=100_000),
+    Benchmark("multinivel.mixedlm_2_niveis", "hierarquico", _mixedlm_two_levels, max_rows=1_000_000),
+    Benchmark("multinivel.mixedlm_3_niveis", "hierarquico", _mixedlm_three_levels, max_rows=100_000),
+    Benchmark("multinivel.mixedlm_cruzado", "cruzado", _mixedlm_cross, max_rows=100_000),
+    Benchmark("l4.escores_media", "l4", _l4_scores("Média")),
+    Benchmark("l4.escores_pca", "l4", _l4_scores("PCA (1º componente)")),
+    Benchmark("l4.kruskal_permutacao", "l4", _l4_group_test, max_rows=1_000_000),
+]
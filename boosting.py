@@ -0,0 +1,114 @@
+# XGBoost/LightGBM com early stopping numa validação interna e variáveis categóricas nativas (dtype category)
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin, clone, is_classifier
+from sklearn.model_selection import train_test_split
+from sklearn.utils.metaestimators import available_if
+
+BOOSTING_MODELS = ("XGBoost Regressor", "XGBoost Classifier", "LightGBM Regressor", "LightGBM Classifier")
+# Teto de árvores: com early stopping o número efetivo é decidido pela validação interna
+MAX_ESTIMATORS = 5000
+EARLY_STOPPING_ROUNDS = 50
+VALIDATION_FRACTION = 0.1
+
+
+def _as_text(series: pd.Series) -> pd.Series:
+    """Valores como texto, preservando os ausentes (categorias iguais no treino e em arquivos novos)."""
+    return series.astype(object).where(series.isna(), series.astype(str))
+
+
+class NativeCategoricalEncoder(TransformerMixin, BaseEstimator):
+    """
+    Converte as colunas categóricas para o dtype category do pandas, com as categorias
+    fixadas no ajuste: os códigos são os mesmos no treino e na predição, valores novos
+    viram ausentes e nenhuma coluna one-hot é criada (XGBoost e LightGBM dividem
+    diretamente pelas categorias).
+    """
+
+    def fit(self, X, y=None):
+        X = pd.DataFrame(X)
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        self.categories_ = {c: sorted(_as_text(X[c]).dropna().unique()) for c in X.columns}
+        return self
+
+    def transform(self, X):
+        X = pd.DataFrame(X, columns=self.feature_names_in_) if not hasattr(X, "columns") else X
+        return pd.DataFrame(
+            {c: pd.Categorical(_as_text(X[c]), categories=self.categories_[c]) for c in self.feature_names_in_},
+            index=X.index,
+        )
+
+    def get_feature_names_out(self, input_features=None):
+        return np.asarray(self.feature_names_in_, dtype=object)
+
+
+class EarlyStoppingBooster(BaseEstimator):
+    """
+    Envolve um XGBoost/LightGBM: separa `validation_fraction` do treino (estratificado
+    em classificação), ajusta até `n_estimators` árvores e para quando a métrica da
+    validação não melhora por `early_stopping_rounds` rodadas. A predição usa só as
+    árvores até a melhor iteração. Funciona com clone/cross_validate como qualquer
+    estimador; os hiperparâmetros do modelo interno são aceitos sem o prefixo
+    'estimator__', de modo que as grades da busca valem para os dois casos.
+    """
+
+    def __init__(self, estimator, validation_fraction: float = VALIDATION_FRACTION,
+                 early_stopping_rounds: int = EARLY_STOPPING_ROUNDS, random_state: int = 42):
+        self.estimator = estimator
+        self.validation_fraction = validation_fraction
+        self.early_stopping_rounds = early_stopping_rounds
+        self.random_state = random_state
+
+    def set_params(self, **params):
+        own = {k: v for k, v in params.items() if k in self.get_params(deep=False) or k.startswith("estimator__")}
+        inner = {k: v for k, v in params.items() if k not in own}
+        if own:
+            super().set_params(**own)
+        if inner:
+            self.estimator.set_params(**inner)
+        return self
+
+    def __sklearn_tags__(self):
+        return self.estimator.__sklearn_tags__()
+
+    def fit(self, X, y):
+        model = clone(self.estimator)
+        stratify = y if is_classifier(model) else None
+        try:
+            X_fit, X_val, y_fit, y_val = train_test_split(
+                X, y, test_size=self.validation_fraction, random_state=self.random_state, stratify=stratify)
+        except ValueError:  # classe com uma única observação: divisão sem estratificar
+            X_fit, X_val, y_fit, y_val = train_test_split(
+                X, y, test_size=self.validation_fraction, random_state=self.random_state)
+        if type(model).__module__.split(".")[0] == "xgboost":
+            model.set_params(early_stopping_rounds=self.early_stopping_rounds)
+            if is_classifier(model):
+                # a métrica avaliada no eval_set precisa casar com o número de classes
+                model.set_params(eval_metric="mlogloss" if len(np.unique(y)) > 2 else "logloss")
+            model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)], verbose=False)
+            self.best_iteration_ = int(model.best_iteration)
+        else:
+            import lightgbm
+
+            model.fit(X_fit, y_fit, eval_set=[(X_val, y_val)],
+                      callbacks=[lightgbm.early_stopping(self.early_stopping_rounds, verbose=False)])
+            # best_iteration_ do LightGBM começa em 1
+            self.best_iteration_ = int(model.best_iteration_ or model.n_estimators) - 1
+        self.estimator_ = model
+        self.n_estimators_ = self.best_iteration_ + 1
+        if hasattr(model, "classes_"):
+            self.classes_ = model.classes_
+        return self
+
+    def predict(self, X):
+        return self.estimator_.predict(X)
+
+    @available_if(lambda self: hasattr(self.estimator, "predict_proba"))
+    def predict_proba(self, X):
+        return self.estimator_.predict_proba(X)
+
+
+def unwrap(model):
+    """Modelo de boosting ajustado dentro do EarlyStoppingBooster (ou o próprio modelo)."""
+    return model.estimator_ if isinstance(model, EarlyStoppingBooster) and hasattr(model, "estimator_") else model
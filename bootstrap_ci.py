@@ -0,0 +1,246 @@
+# Motor de intervalos de confiança bootstrap (percentil e BCa) com reamostragem vetorizada
+
+from concurrent.futures import ProcessPoolExecutor
+import functools
+import os
+
+import numpy as np
+from scipy import stats
+
+# Número padrão de réplicas e limite de elementos (réplicas x linhas x colunas) por lote
+N_BOOT = 5000
+BATCH_ELEMENTS = 4_000_000
+# Acima deste número de linhas, a aceleração do BCa usa jackknife agrupado
+JACKKNIFE_MAX_GROUPS = 1000
+# Abaixo deste volume de trabalho, processos extras custam mais do que economizam
+MIN_PARALLEL_ELEMENTS = 50_000_000
+
+
+# --- Estatísticas vetorizadas: recebem um lote (réplicas x linhas x colunas) ---
+
+def mean_stat(batch):
+    """Média de cada coluna."""
+    return batch.mean(axis=1)
+
+
+def cohens_d_stat(batch):
+    """Cohen's d de duas amostras. Coluna 0: valores; coluna 1: indicador (1 = primeiro grupo)."""
+    x, g = batch[..., 0], batch[..., 1]
+    n1 = g.sum(axis=1)
+    n2 = g.shape[1] - n1
+    s1 = (x * g).sum(axis=1)
+    s2 = x.sum(axis=1) - s1
+    q1 = (x * x * g).sum(axis=1)
+    q2 = (x * x).sum(axis=1) - q1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        m1, m2 = s1 / n1, s2 / n2
+        ss_within = (q1 - n1 * m1 ** 2) + (q2 - n2 * m2 ** 2)
+        return (m1 - m2) / np.sqrt(ss_within / (n1 + n2 - 2))
+
+
+def paired_d_stat(batch):
+    """Cohen's d pareado. Coluna 0: pré; coluna 1: pós (d = média(pós - pré) / DP)."""
+    diff = batch[..., 1] - batch[..., 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return diff.mean(axis=1) / diff.std(axis=1, ddof=1)
+
+
+def one_sample_d_stat(batch, pop_mean=0.0):
+    """Cohen's d de uma amostra contra `pop_mean` (coluna 0)."""
+    x = batch[..., 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (x.mean(axis=1) - pop_mean) / x.std(axis=1, ddof=1)
+
+
+def correlation_stat(batch):
+    """Matriz de correlação de Pearson de cada réplica (réplicas x p x p)."""
+    centered = batch - batch.mean(axis=1, keepdims=True)
+    cov = np.einsum("bni,bnj->bij", centered, centered, optimize=True)
+    d = np.sqrt(np.einsum("bii->bi", cov))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return cov / (d[:, :, None] * d[:, None, :])
+
+
+def _batched_rss(y, X):
+    """Soma de quadrados dos resíduos de MQO para cada réplica (pseudo-inversa: tolera níveis ausentes)."""
+    xtx = np.einsum("bni,bnj->bij", X, X, optimize=True)
+    xty = np.einsum("bni,bn->bi", X, y, optimize=True)
+    beta = np.einsum("bij,bj->bi", np.linalg.pinv(xtx), xty)
+    return (y * y).sum(axis=1) - (beta * xty).sum(axis=1)
+
+
+def partial_eta_squared_stat(batch, full_cols, reduced_cols, model_cols=None):
+    """
+    ηp² de um termo (SS Tipo II) por réplica. Coluna 0: variável dependente; demais:
+    matriz de delineamento. `reduced_cols` são as colunas dos termos que não contêm o
+    termo avaliado, `full_cols` = `reduced_cols` + colunas do termo e `model_cols` as
+    do modelo completo (padrão: todas), cujo resíduo entra no denominador:
+    ηp² = SS_efeito / (SS_efeito + SS_resíduo), SS_efeito = RSS_reduzido - RSS_com_termo.
+    """
+    y = batch[..., 0]
+    X = batch[..., 1:]
+    ss_effect = _batched_rss(y, X[..., list(reduced_cols)]) - _batched_rss(y, X[..., list(full_cols)])
+    model = X if model_cols is None else X[..., list(model_cols)]
+    ss_resid = _batched_rss(y, model)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return ss_effect / (ss_effect + ss_resid)
+
+
+# --- Reamostragem ---
+
+def _resample_indices(rng, n_rows: int, size: int, strata) -> np.ndarray:
+    """Matriz de índices (réplicas x linhas); com estratos, reamostra dentro de cada estrato."""
+    if strata is None:
+        return rng.integers(0, n_rows, size=(size, n_rows))
+    idx = np.empty((size, n_rows), dtype=np.int64)
+    for positions in strata:
+        idx[:, positions] = positions[rng.integers(0, positions.size, size=(size, positions.size))]
+    return idx
+
+
+def _bootstrap_chunk(data, statistic, strata, size, seed_seq):
+    rng = np.random.default_rng(seed_seq)
+    idx = _resample_indices(rng, data.shape[0], size, strata)
+    return statistic(data[idx])
+
+
+def _run_chunks(data, statistic, strata, sizes, seeds, n_jobs):
+    n_elements = sum(sizes) * data.size
+    if n_jobs > 1 and len(sizes) > 1 and n_elements >= MIN_PARALLEL_ELEMENTS:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            parts = list(pool.map(_bootstrap_chunk, *zip(*[(data, statistic, strata, s, q) for s, q in zip(sizes, seeds)])))
+    else:
+        parts = [_bootstrap_chunk(data, statistic, strata, s, q) for s, q in zip(sizes, seeds)]
+    return np.concatenate(parts, axis=0)
+
+
+def _jackknife(data, statistic, chunk_rows: int) -> np.ndarray:
+    """Estimativas leave-one-out (ou leave-one-group-out para n grande), calculadas em lotes."""
+    n = data.shape[0]
+    groups = np.array_split(np.arange(n), min(n, JACKKNIFE_MAX_GROUPS))
+    estimates = [None] * len(groups)
+    # grupos de mesmo tamanho geram subamostras de mesmo comprimento e são avaliados juntos
+    for size in sorted({len(g) for g in groups}):
+        members = [i for i, g in enumerate(groups) if len(g) == size]
+        for start in range(0, len(members), chunk_rows):
+            block = members[start:start + chunk_rows]
+            keep = np.ones((len(block), n), dtype=bool)
+            for row, group_index in enumerate(block):
+                keep[row, groups[group_index]] = False
+            idx = np.nonzero(keep)[1].reshape(len(block), n - size)
+            for group_index, value in zip(block, statistic(data[idx])):
+                estimates[group_index] = value
+    return np.stack(estimates)
+
+
+def _percentile_interval(replicates, alpha_low, alpha_high):
+    """Quantis por elemento, aceitando níveis diferentes para cada elemento (BCa)."""
+    sorted_reps = np.sort(replicates, axis=0)
+    valid = np.sum(np.isfinite(sorted_reps), axis=0)
+    pos_low = np.clip(np.floor(alpha_low * (valid - 1)).astype(np.int64), 0, None)
+    pos_high = np.clip(np.ceil(alpha_high * (valid - 1)).astype(np.int64), 0, None)
+    low = np.take_along_axis(sorted_reps, pos_low[None, ...], axis=0)[0]
+    high = np.take_along_axis(sorted_reps, pos_high[None, ...], axis=0)[0]
+    empty = valid == 0
+    return np.where(empty, np.nan, low), np.where(empty, np.nan, high)
+
+
+def bootstrap_ci(data, statistic, n_boot: int = N_BOOT, ci: float = 0.95, method: str = "bca",
+                 seed: int = 42, strata=None, n_jobs: int | None = None) -> dict:
+    """
+    Intervalo de confiança bootstrap para uma estatística vetorizada.
+
+    - `data`: array (linhas x colunas); as linhas são reamostradas em conjunto.
+    - `statistic`: função de módulo (ou functools.partial) que recebe um lote
+      (réplicas x linhas x colunas) e devolve um array (réplicas, ...).
+    - `strata`: rótulos opcionais por linha; a reamostragem preserva o tamanho de cada estrato.
+    - `method`: "percentile" ou "bca" (viés corrigido e acelerado, via jackknife).
+
+    Os índices de reamostragem de cada lote formam uma matriz inteira; os lotes são
+    limitados a BATCH_ELEMENTS para controlar a memória, usam fluxos aleatórios
+    independentes derivados de `seed` e, em trabalhos grandes, rodam em processos.
+    Retorna dict com 'estimate', 'low', 'high', 'se', 'method', 'n_boot' e 'replicates'.
+    """
+    data = np.asarray(data, dtype=np.float64)
+    if data.ndim == 1:
+        data = data[:, None]
+    n_rows = data.shape[0]
+    if n_rows < 2:
+        raise ValueError("São necessárias ao menos duas observações para o bootstrap.")
+    if strata is not None:
+        codes = np.unique(np.asarray(strata), return_inverse=True)[1]
+        strata = [np.flatnonzero(codes == c) for c in range(codes.max() + 1)]
+
+    estimate = np.asarray(statistic(data[None, ...])[0])
+    chunk = max(1, min(n_boot, BATCH_ELEMENTS // data.size))
+    n_chunks = -(-n_boot // chunk)
+    sizes = [min(chunk, n_boot - i * chunk) for i in range(n_chunks)]
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    if n_jobs is None:
+        n_jobs = min(n_chunks, os.cpu_count() or 1)
+    replicates = _run_chunks(data, statistic, strata, sizes, seeds, n_jobs)
+
+    alpha = (1.0 - ci) / 2.0
+    if method == "percentile":
+        alpha_low = np.full(estimate.shape, alpha)
+        alpha_high = np.full(estimate.shape, 1.0 - alpha)
+    elif method == "bca":
+        with np.errstate(divide="ignore", invalid="ignore"):
+            finite = np.isfinite(replicates)
+            prop_less = (np.where(finite, replicates < estimate, False).sum(axis=0)
+                         + 0.5 * np.where(finite, replicates == estimate, False).sum(axis=0)) / finite.sum(axis=0)
+            z0 = stats.norm.ppf(np.clip(prop_less, 1e-10, 1 - 1e-10))
+            jack = _jackknife(data, statistic, max(1, BATCH_ELEMENTS // data.size))
+            diff = np.nanmean(jack, axis=0) - jack
+            accel = np.nansum(diff ** 3, axis=0) / (6.0 * np.nansum(diff ** 2, axis=0) ** 1.5)
+            accel = np.where(np.isfinite(accel), accel, 0.0)
+            z_low, z_high = stats.norm.ppf(alpha), stats.norm.ppf(1.0 - alpha)
+            alpha_low = stats.norm.cdf(z0 + (z0 + z_low) / (1 - accel * (z0 + z_low)))
+            alpha_high = stats.norm.cdf(z0 + (z0 + z_high) / (1 - accel * (z0 + z_high)))
+        alpha_low = np.where(np.isfinite(alpha_low), alpha_low, alpha)
+        alpha_high = np.where(np.isfinite(alpha_high), alpha_high, 1.0 - alpha)
+    else:
+        raise ValueError(f"Método de intervalo não suportado: {method}")
+
+    low, high = _percentile_interval(replicates, alpha_low, alpha_high)
+    return {
+        "estimate": estimate,
+        "low": low,
+        "high": high,
+        "se": np.nanstd(replicates, axis=0, ddof=1),
+        "method": method,
+        "n_boot": n_boot,
+        "replicates": replicates,
+    }
+
+
+def one_sample_d_statistic(pop_mean: float):
+    """Estatística de Cohen's d de uma amostra (picklável) para `bootstrap_ci`."""
+    return functools.partial(one_sample_d_stat, pop_mean=pop_mean)
+
+
+def partial_eta_squared_statistic(full_cols, reduced_cols, model_cols=None):
+    """Estatística de ηp² (picklável) para `bootstrap_ci`."""
+    return functools.partial(
+        partial_eta_squared_stat, full_cols=tuple(full_cols), reduced_cols=tuple(reduced_cols),
+        model_cols=None if model_cols is None else tuple(model_cols),
+    )
+
+
+def anova_term_columns(design_info) -> dict:
+    """
+    Para cada termo de efeito de uma matriz de delineamento patsy, as colunas
+    (full_cols, reduced_cols) da comparação Tipo II (como em anova_lm(typ=2)).
+    """
+    out = {}
+    for term, term_slice in design_info.term_slices.items():
+        if not term.factors:
+            continue  # intercepto
+        factors = set(term.factors)
+        reduced, own = [], list(range(term_slice.start, term_slice.stop))
+        for other, other_slice in design_info.term_slices.items():
+            if other == term or factors < set(other.factors):
+                continue  # o próprio termo e as interações que o contêm ficam de fora
+            reduced.extend(range(other_slice.start, other_slice.stop))
+        out[term.name()] = (sorted(reduced + own), reduced)
+    return out
@@ -0,0 +1,234 @@
+# Agregação no servidor para histogramas e boxplots (envia apenas resumos ao navegador)
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Limite de pontos atípicos desenhados por boxplot; acima disso, amostra reprodutível
+MAX_OUTLIER_POINTS = 2000
+
+
+def _finite_values(series) -> np.ndarray:
+    values = pd.to_numeric(pd.Series(series), errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    return values[np.isfinite(values)]
+
+
+def histogram_bins(series, nbins: int = 30):
+    """Retorna (contagens, bordas) do histograma calculado com NumPy."""
+    values = _finite_values(series)
+    if values.size == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.float64)
+    counts, edges = np.histogram(values, bins=nbins)
+    return counts, edges
+
+
+def box_summary(series, whisker: float = 1.5, max_outliers: int = MAX_OUTLIER_POINTS, seed: int = 42) -> dict:
+    """
+    Resumo de cinco números (com cercas de Tukey), média e pontos atípicos.
+    Quando há mais atípicos que `max_outliers`, é enviada uma amostra aleatória
+    (os extremos mínimo e máximo são sempre mantidos).
+    """
+    values = _finite_values(series)
+    if values.size == 0:
+        return None
+    q1, median, q3 = np.quantile(values, [0.25, 0.5, 0.75])
+    iqr = q3 - q1
+    low_limit, high_limit = q1 - whisker * iqr, q3 + whisker * iqr
+    inside = values[(values >= low_limit) & (values <= high_limit)]
+    outliers = values[(values < low_limit) | (values > high_limit)]
+    n_outliers = outliers.size
+    if n_outliers > max_outliers:
+        rng = np.random.default_rng(seed)
+        sample = rng.choice(outliers, size=max_outliers - 2, replace=False)
+        outliers = np.concatenate([[outliers.min(), outliers.max()], sample])
+    return {
+        "q1": float(q1),
+        "median": float(median),
+        "q3": float(q3),
+        "lowerfence": float(inside.min()) if inside.size else float(q1),
+        "upperfence": float(inside.max()) if inside.size else float(q3),
+        "mean": float(values.mean()),
+        "n": int(values.size),
+        "n_outliers": int(n_outliers),
+        "outliers": outliers,
+    }
+
+
+def histogram_figure(series, col: str, nbins: int = 30) -> go.Figure:
+    """Histograma desenhado como barras pré-agregadas (apenas `nbins` valores trafegam)."""
+    counts, edges = histogram_bins(series, nbins)
+    fig = go.Figure()
+    if counts.size:
+        fig.add_trace(go.Bar(
+            x=(edges[:-1] + edges[1:]) / 2,
+            y=counts,
+            width=np.diff(edges),
+            # np.histogram fecha só o último intervalo: [a, b) nos demais, [a, b] no último
+            customdata=[[a, b, "]" if i == counts.size - 1 else ")"]
+                        for i, (a, b) in enumerate(zip(edges[:-1], edges[1:]))],
+            hovertemplate="[%{customdata[0]:.3g}, %{customdata[1]:.3g}%{customdata[2]}: %{y}<extra></extra>",
+            name=col,
+        ))
+    fig.update_layout(title=f"Histograma - {col}", xaxis_title=col, yaxis_title="count", bargap=0)
+    return fig
+
+
+def box_figure(series, col: str, whisker: float = 1.5) -> go.Figure:
+    """Boxplot a partir do resumo pré-calculado; atípicos em traço WebGL."""
+    summary = box_summary(series, whisker)
+    fig = go.Figure()
+    if summary is not None:
+        fig.add_trace(go.Box(
+            x=[col],
+            q1=[summary["q1"]],
+            median=[summary["median"]],
+            q3=[summary["q3"]],
+            lowerfence=[summary["lowerfence"]],
+            upperfence=[summary["upperfence"]],
+            mean=[summary["mean"]],
+            boxpoints=False,
+            name=col,
+        ))
+        if summary["outliers"].size:
+            fig.add_trace(go.Scattergl(
+                x=[col] * summary["outliers"].size,
+                y=summary["outliers"],
+                mode="markers",
+                marker=dict(size=4, opacity=0.6),
+                name=f"Atípicos ({summary['n_outliers']})",
+            ))
+    fig.update_layout(title=f"Boxplot - {col}", yaxis_title=col, showlegend=False)
+    return fig
+
+
+# --- Matriz de dispersão escalável (pairplot) ---
+
+# Limite padrão de pontos desenhados por painel de dispersão
+PAIRPLOT_MAX_POINTS = 5000
+
+
+def stratified_sample_index(n: int, cap: int, strata=None, seed: int = 42) -> np.ndarray:
+    """
+    Índices posicionais de uma amostra de até `cap` linhas. Com `strata`, a amostra
+    é proporcional ao tamanho de cada estrato: ao menos uma linha por estrato enquanto
+    couber no limite (dos maiores para os menores) e as sobras para os maiores déficits,
+    de modo que o total nunca passa de `cap`.
+    """
+    if n <= cap:
+        return np.arange(n)
+    rng = np.random.default_rng(seed)
+    if strata is None:
+        return np.sort(rng.choice(n, size=cap, replace=False))
+    codes, _ = pd.factorize(pd.Series(strata), use_na_sentinel=False)
+    counts = np.bincount(codes)
+    exact = counts * cap / n
+    quota = np.floor(exact).astype(np.int64)
+    empty = np.flatnonzero(quota == 0)
+    quota[empty[np.argsort(-counts[empty], kind="stable")][:cap - quota.sum()]] = 1
+    spare = cap - quota.sum()
+    if spare > 0:
+        deficit = exact - quota
+        by_deficit = np.argsort(-deficit, kind="stable")
+        by_deficit = by_deficit[(deficit[by_deficit] > 0) & (quota[by_deficit] < counts[by_deficit])]
+        quota[by_deficit[:spare]] += 1
+    order = np.argsort(codes, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    picks = [
+        rng.choice(order[start:start + count], size=q, replace=False)
+        for start, count, q in zip(starts, counts, quota) if q > 0
+    ]
+    return np.sort(np.concatenate(picks))
+
+
+def pair_regression_lines(values: np.ndarray) -> dict:
+    """
+    Reta de mínimos quadrados para cada par (i, j) com todas as linhas completas do
+    par. As somas de quadrados são calculadas sobre os valores centrados na média do
+    par (Σx² − (Σx)²/n perde precisão por cancelamento quando a média é grande em
+    relação à dispersão).
+    Retorna {(i, j): (intercepto, inclinação)} para y = coluna i e x = coluna j.
+    """
+    lines = {}
+    p = values.shape[1]
+    for i in range(p):
+        for j in range(p):
+            if i == j:
+                continue
+            y, x = values[:, i], values[:, j]
+            valid = np.isfinite(x) & np.isfinite(y)
+            n = valid.sum()
+            if n < 2:
+                continue
+            x, y = x[valid], y[valid]
+            mx, my = x.mean(), y.mean()
+            dx = x - mx
+            sxx = np.dot(dx, dx)
+            if sxx <= 0:
+                continue
+            slope = np.dot(dx, y - my) / sxx
+            lines[(i, j)] = (my - slope * mx, slope)
+    return lines
+
+
+def pairplot_png(df: pd.DataFrame, cols, max_points: int = PAIRPLOT_MAX_POINTS, mode: str = "auto",
+                 strata=None, gridsize: int = 40, seed: int = 42, dpi: int = 100) -> bytes:
+    """
+    Matriz de dispersão renderizada em PNG (bytes), adequada para bases grandes:
+
+    - diagonal: histogramas sobre todos os dados;
+    - fora da diagonal: dispersão de uma amostra estratificada de até `max_points`
+      linhas (`mode="scatter"`) ou hexbin sobre todos os dados (`mode="hexbin"`);
+      `mode="auto"` usa hexbin quando há mais linhas que `max_points`, exceto com
+      `strata`, que pede a dispersão da amostra estratificada;
+    - retas de regressão ajustadas com todas as linhas completas de cada par, com os
+      momentos centrados na média do par (ver `pair_regression_lines`).
+    """
+    import io
+    from matplotlib.figure import Figure  # sem pyplot: não depende de backend nem de estado global
+
+    cols = list(cols)
+    values = df[cols].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    n, p = values.shape
+    if mode == "auto":
+        mode = "hexbin" if n > max_points and strata is None else "scatter"
+    lines = pair_regression_lines(values)
+    sample = values[stratified_sample_index(n, max_points, strata, seed)] if mode == "scatter" else None
+
+    size = min(2.5 * p, 20)
+    fig = Figure(figsize=(size, size))
+    axes = fig.subplots(p, p, squeeze=False)
+    for i in range(p):
+        for j in range(p):
+            ax = axes[i, j]
+            if i == j:
+                col = values[:, i]
+                col = col[np.isfinite(col)]
+                if col.size:
+                    counts, edges = np.histogram(col, bins=30)
+                    ax.stairs(counts, edges, fill=True, alpha=0.7)
+            else:
+                x, y = values[:, j], values[:, i]
+                valid = np.isfinite(x) & np.isfinite(y)
+                if mode == "hexbin":
+                    if valid.any():
+                        ax.hexbin(x[valid], y[valid], gridsize=gridsize, mincnt=1, bins="log", cmap="Blues")
+                else:
+                    ax.scatter(sample[:, j], sample[:, i], s=4, alpha=0.5, rasterized=True)
+                if (i, j) in lines and valid.any():
+                    intercept, slope = lines[(i, j)]
+                    x_line = np.array([np.nanmin(x[valid]), np.nanmax(x[valid])])
+                    ax.plot(x_line, intercept + slope * x_line, color="red", linewidth=1.2)
+            if i == p - 1:
+                ax.set_xlabel(cols[j])
+            else:
+                ax.set_xticklabels([])
+            if j == 0:
+                ax.set_ylabel(cols[i])
+            elif i != j:
+                ax.set_yticklabels([])
+    title = "Hexbin (todos os dados)" if mode == "hexbin" else f"Dispersão (amostra de {len(sample)} de {n} linhas)"
+    fig.suptitle(f"{title} · retas de regressão com todos os dados")
+    fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi)
+    return buffer.getvalue()
@@ -0,0 +1,267 @@
+# Motor de matrizes de correlação vetorizadas (parcial via matriz de precisão, postos)
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+try:  # numba é opcional: sem ele, o Kendall usa scipy.stats.kendalltau (também O(n log n))
+    from numba import njit
+except ImportError:  # pragma: no cover
+    njit = None
+
+
+def _complete_values(df: pd.DataFrame, cols) -> np.ndarray:
+    """Matriz float64 apenas com as linhas completas nas colunas indicadas."""
+    return df[list(cols)].dropna().to_numpy(dtype=np.float64)
+
+
+def _shrunk_correlation(values: np.ndarray):
+    """Correlação com encolhimento de Ledoit-Wolf em direção à identidade."""
+    from sklearn.covariance import ledoit_wolf
+    std = values.std(axis=0, ddof=0)
+    z = (values - values.mean(axis=0)) / np.where(std > 0, std, 1.0)
+    cov, shrinkage = ledoit_wolf(z, assume_centered=True)
+    d = np.sqrt(np.diag(cov))
+    return cov / np.outer(d, d), float(shrinkage)
+
+
+def correlation_pvalues(r: np.ndarray, n: int, k: int = 0) -> np.ndarray:
+    """Valores-p bicaudais (teste t com n - 2 - k graus de liberdade) para uma matriz de correlações."""
+    dof = n - 2 - k
+    if dof <= 0:
+        return np.full_like(r, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = r * np.sqrt(dof / (1.0 - r ** 2))
+    p = 2 * stats.t.sf(np.abs(t), dof)
+    np.fill_diagonal(p, np.nan)
+    return p
+
+
+def partial_correlation_matrix(df: pd.DataFrame, cols, covariates=None, shrinkage: bool = False) -> dict:
+    """
+    Matriz de correlações parciais para todos os pares de `cols`, calculada com uma
+    única inversão em vez de uma regressão por par:
+
+    - sem `covariates`: cada par é controlado por todas as outras variáveis
+      selecionadas (r_ij = -P_ij / sqrt(P_ii P_jj), P = inversa da correlação);
+    - com `covariates`: cada par é controlado apenas pelo conjunto Z, via complemento
+      de Schur R_xx - R_xz R_zz^-1 R_zx.
+
+    `shrinkage=True` usa a correlação encolhida de Ledoit-Wolf, útil quando o número
+    de variáveis se aproxima de n (os valores-p passam a ser aproximados).
+    Retorna dict com 'r', 'p' (DataFrames), 'n', 'k' e 'shrinkage'.
+    """
+    cols = list(cols)
+    covariates = [c for c in (covariates or []) if c not in cols]
+    values = _complete_values(df, cols + covariates)
+    n = values.shape[0]
+    p = len(cols)
+
+    if shrinkage:
+        corr, shrink_value = _shrunk_correlation(values)
+    else:
+        corr, shrink_value = np.corrcoef(values, rowvar=False), 0.0
+    corr = np.atleast_2d(corr)
+
+    if covariates:
+        r_xx = corr[:p, :p]
+        r_xz = corr[:p, p:]
+        r_zz = corr[p:, p:]
+        cond = r_xx - r_xz @ np.linalg.solve(r_zz, r_xz.T)
+        d = np.sqrt(np.diag(cond))
+        pcorr = cond / np.outer(d, d)
+        k = len(covariates)
+    else:
+        precision = np.linalg.pinv(corr)
+        d = np.sqrt(np.diag(precision))
+        pcorr = -precision / np.outer(d, d)
+        k = p - 2
+
+    pcorr = np.clip(pcorr, -1.0, 1.0)
+    np.fill_diagonal(pcorr, 1.0)
+    pvals = correlation_pvalues(pcorr, n, k)
+    return {
+        "r": pd.DataFrame(pcorr, index=cols, columns=cols),
+        "p": pd.DataFrame(pvals, index=cols, columns=cols),
+        "n": n,
+        "k": k,
+        "shrinkage": shrink_value,
+    }
+
+
+def matrix_to_pairs(r: pd.DataFrame, p: pd.DataFrame | None = None, r_label: str = "r", p_label: str = "p-valor") -> pd.DataFrame:
+    """Converte matrizes simétricas em tabela de pares (triângulo superior)."""
+    mask = np.triu(np.ones(r.shape), k=1).astype(bool)
+    pairs = r.where(mask).stack().reset_index()
+    pairs.columns = ["Var1", "Var2", r_label]
+    pairs = pairs.dropna(subset=[r_label]).reset_index(drop=True)
+    if p is not None:
+        p_pairs = p.where(mask).stack().reset_index()
+        p_pairs.columns = ["Var1", "Var2", p_label]
+        pairs = pd.merge(pairs, p_pairs, on=["Var1", "Var2"], how="left")
+    return pairs
+
+
+# --- Correlações de postos (Spearman / Kendall) ---
+
+def _average_ranks(values: np.ndarray) -> np.ndarray:
+    """Postos médios por coluna (empates recebem a média), uma única vez por coluna."""
+    return stats.rankdata(values, axis=0)
+
+
+def _dense_ranks(column: np.ndarray) -> np.ndarray:
+    """Postos densos inteiros (0..m-1); ausentes recebem -1."""
+    ranks = np.full(column.shape[0], -1, dtype=np.int64)
+    valid = ~np.isnan(column)
+    if valid.any():
+        ranks[valid] = np.unique(column[valid], return_inverse=True)[1]
+    return ranks
+
+
+def _pearson_from_ranks(ranks: np.ndarray) -> np.ndarray:
+    """Pearson de todas as colunas de uma vez (produto matricial BLAS sobre postos padronizados)."""
+    centered = ranks - ranks.mean(axis=0)
+    norms = np.sqrt((centered ** 2).sum(axis=0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = centered / norms
+        corr = z.T @ z
+    return np.clip(corr, -1.0, 1.0)
+
+
+def _spearman_pair(x: np.ndarray, y: np.ndarray) -> float:
+    valid = ~(np.isnan(x) | np.isnan(y))
+    if valid.sum() < 2:
+        return np.nan
+    ranks = _average_ranks(np.column_stack([x[valid], y[valid]]))
+    return float(_pearson_from_ranks(ranks)[0, 1])
+
+
+if njit is not None:
+    @njit(nogil=True, cache=True)
+    def _kendall_tau_b_kernel(order_x, x, y, n_levels_y):  # pragma: no cover - compilado pelo numba
+        # order_x: linhas ordenadas por x (calculado uma vez por coluna); x, y: postos
+        # densos com ausentes = -1. Pares discordantes são contados com uma árvore de
+        # Fenwick sobre y, consultando cada grupo de x empatado antes de inseri-lo, de
+        # modo que nenhuma ordenação é refeita por par: O(n log m).
+        tree = np.zeros(n_levels_y + 1, dtype=np.int64)
+        counts_y = np.zeros(n_levels_y, dtype=np.int64)
+        counts_group = np.zeros(n_levels_y, dtype=np.int64)
+        n = 0
+        n1 = 0  # empates em x
+        n3 = 0  # empates conjuntos em (x, y)
+        discordant = 0
+        m = order_x.shape[0]
+        start = 0
+        while start < m:
+            xv = x[order_x[start]]
+            stop = start
+            while stop < m and x[order_x[stop]] == xv:
+                stop += 1
+            if xv >= 0:
+                group = 0
+                # consulta: quantos já inseridos (x menor) têm y estritamente maior
+                for t in range(start, stop):
+                    yv = y[order_x[t]]
+                    if yv < 0:
+                        continue
+                    seen_le = 0
+                    k = yv + 1
+                    while k > 0:
+                        seen_le += tree[k]
+                        k -= k & (-k)
+                    discordant += n - seen_le
+                    n3 += counts_group[yv]
+                    counts_group[yv] += 1
+                    group += 1
+                # inserção do grupo e limpeza do contador local
+                for t in range(start, stop):
+                    yv = y[order_x[t]]
+                    if yv < 0:
+                        continue
+                    counts_group[yv] = 0
+                    counts_y[yv] += 1
+                    k = yv + 1
+                    while k <= n_levels_y:
+                        tree[k] += 1
+                        k += k & (-k)
+                n += group
+                n1 += group * (group - 1) // 2
+            start = stop
+
+        if n < 2:
+            return np.nan
+        n2 = 0  # empates em y
+        for c in counts_y:
+            n2 += c * (c - 1) // 2
+        n0 = n * (n - 1) // 2
+        denom = np.sqrt(float(n0 - n1) * float(n0 - n2))
+        if denom == 0.0:
+            return np.nan
+        return (n0 - n1 - n2 + n3 - 2 * discordant) / denom
+
+
+def _kendall_pair(rx: np.ndarray, ry: np.ndarray, order_x: np.ndarray) -> float:
+    """Tau-b de Kendall de um par (postos densos, ausentes = -1), com casos completos por par."""
+    if njit is not None:
+        return float(_kendall_tau_b_kernel(order_x, rx, ry, int(ry.max()) + 1))
+    valid = (rx >= 0) & (ry >= 0)
+    if valid.sum() < 2:
+        return np.nan
+    return float(stats.kendalltau(rx[valid], ry[valid]).statistic)
+
+
+def rank_correlation_matrix(df: pd.DataFrame, cols, method: str = "spearman", n_jobs: int | None = None) -> pd.DataFrame:
+    """
+    Matriz de correlações de postos com tratamento par-a-par de ausentes.
+
+    - Spearman: cada coluna é ranqueada uma vez e as colunas sem ausentes são
+      correlacionadas de uma só vez (Pearson sobre postos via BLAS); apenas os pares
+      envolvendo colunas com ausentes são recalculados nas linhas completas do par.
+    - Kendall (tau-b): postos densos por coluna calculados uma vez; cada par usa um
+      algoritmo O(n log n) (ordenação por x feita uma vez por coluna + contagem de
+      inversões em y com árvore de Fenwick), em paralelo entre pares.
+    """
+    cols = list(cols)
+    values = df[cols].to_numpy(dtype=np.float64, na_value=np.nan)
+    p = len(cols)
+    result = np.eye(p)
+    has_missing = np.isnan(values).any(axis=0)
+    pairs = [(i, j) for i in range(p) for j in range(i + 1, p)]
+
+    if method == "spearman":
+        complete = np.flatnonzero(~has_missing)
+        if complete.size >= 2:
+            corr = _pearson_from_ranks(_average_ranks(values[:, complete]))
+            result[np.ix_(complete, complete)] = corr
+        pending = [(i, j) for i, j in pairs if has_missing[i] or has_missing[j]]
+        pair_func = lambda ij: _spearman_pair(values[:, ij[0]], values[:, ij[1]])
+    elif method == "kendall":
+        ranks = [_dense_ranks(values[:, k]) for k in range(p)]
+        orders = [np.argsort(r, kind="stable") for r in ranks]
+        pending = pairs
+        pair_func = lambda ij: _kendall_pair(ranks[ij[0]], ranks[ij[1]], orders[ij[0]])
+    else:
+        raise ValueError(f"Método de correlação de postos não suportado: {method}")
+
+    if pending:
+        if n_jobs is None:
+            n_jobs = min(len(pending), os.cpu_count() or 1)
+        if n_jobs > 1:
+            with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+                pending_values = list(pool.map(pair_func, pending))
+        else:
+            pending_values = [pair_func(ij) for ij in pending]
+        for (i, j), r in zip(pending, pending_values):
+            result[i, j] = result[j, i] = r
+
+    # Colunas constantes (ou sem dados) não têm correlação definida
+    if method == "spearman":
+        for k in range(p):
+            col = values[:, k]
+            col = col[~np.isnan(col)]
+            if col.size < 2 or np.all(col == col[0]):
+                result[k, :] = result[:, k] = np.nan
+    return pd.DataFrame(result, index=cols, columns=cols)
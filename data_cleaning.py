@@ -5,6 +5,8 @@ import numpy as np
 from typing import Any, List, Tuple
 import datetime
 
+from telemetry import instrumented
+
 # --- Logging de Pré-processamento ---
 def init_preprocessing_log():
     """Inicializa histórico de transformações no session_state."""
@@ -43,6 +45,7 @@ def detect_outliers_iqr(df: pd.DataFrame, col: str, factor: float = 1.5) -> pd.I
     return df[(df[col] < lower) | (df[col] > upper)].index
 
 
+@instrumented()
 def handle_outliers(
     df: pd.DataFrame,
     cols: List[str],
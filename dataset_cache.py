@@ -0,0 +1,244 @@
+# Versões de dataset com impressão digital O(1) e cache de resultados compartilhado (LRU por memória)
+
+from collections import OrderedDict
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+import threading
+import time
+import uuid
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# Limite padrão do cache de resultados (MB); pode ser ajustado por variável de ambiente
+RESULT_CACHE_MAX_MB = int(os.environ.get("BDS_RESULT_CACHE_MB", "512"))
+
+
+class DatasetVersion:
+    """
+    Identificador de uma versão de dataset. A impressão digital é atribuída quando
+    a versão é criada (custo O(1), sem percorrer os dados) e é usada como chave
+    de cache no lugar do hash do DataFrame inteiro.
+    """
+
+    __slots__ = ("fingerprint", "shape", "columns", "dtypes", "created_at", "parent", "__weakref__")
+
+    def __init__(self, df: pd.DataFrame, parent: str | None = None):
+        self.fingerprint = uuid.uuid4().hex
+        self.shape = df.shape
+        self.columns = tuple(map(str, df.columns))
+        self.dtypes = tuple(map(str, df.dtypes))
+        self.created_at = time.time()
+        self.parent = parent
+
+    def matches(self, df: pd.DataFrame) -> bool:
+        """Confere (em O(colunas)) se o esquema do DataFrame ainda é o desta versão."""
+        return (
+            df.shape == self.shape
+            and tuple(map(str, df.columns)) == self.columns
+            and tuple(map(str, df.dtypes)) == self.dtypes
+        )
+
+    def __repr__(self):
+        return f"DatasetVersion({self.fingerprint[:12]}, shape={self.shape})"
+
+
+# id(df) -> (weakref para o DataFrame, versão)
+_VERSIONS: dict = {}
+_VERSIONS_LOCK = threading.Lock()
+
+
+def _forget(key):
+    with _VERSIONS_LOCK:
+        _VERSIONS.pop(key, None)
+
+
+def dataset_version(df: pd.DataFrame) -> DatasetVersion:
+    """
+    Retorna a versão associada a este objeto DataFrame, criando uma nova na primeira
+    vez que ele é visto ou se o esquema (forma, colunas, tipos) mudou in-place.
+    Cada novo DataFrame atribuído ao session_state vira, portanto, uma nova versão.
+    """
+    key = id(df)
+    with _VERSIONS_LOCK:
+        entry = _VERSIONS.get(key)
+        if entry is not None:
+            ref, version = entry
+            if ref() is df and version.matches(df):
+                return version
+        version = DatasetVersion(df, parent=entry[1].fingerprint if entry is not None else None)
+        _VERSIONS[key] = (weakref.ref(df, lambda _ref, k=key: _forget(k)), version)
+        return version
+
+
+def dataset_fingerprint(df: pd.DataFrame) -> str:
+    """Atalho para a impressão digital da versão atual do DataFrame."""
+    return dataset_version(df).fingerprint
+
+
+def derive_fingerprint(fingerprint: str, *parts) -> str:
+    """Impressão digital de um dado derivado deterministicamente (ex.: subconjunto de colunas)."""
+    h = hashlib.sha1(fingerprint.encode("utf-8"))
+    h.update(repr(_freeze(parts)).encode("utf-8"))
+    return h.hexdigest()
+
+
+def _freeze(value):
+    """Converte argumentos em estruturas imutáveis e hasheáveis para compor a chave."""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(map(repr, value)))
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        raise TypeError("Dados não devem compor a chave de cache; use um parâmetro com prefixo '_' e a impressão digital.")
+    return value
+
+
+def _data_signature(value):
+    """Parte da chave para argumentos de dados: apenas metadados O(colunas)."""
+    if isinstance(value, pd.DataFrame):
+        return ("DataFrame", tuple(map(str, value.columns)), value.shape)
+    if isinstance(value, pd.Series):
+        return ("Series", str(value.name), value.shape)
+    if isinstance(value, np.ndarray):
+        return ("ndarray", value.shape, str(value.dtype))
+    return (type(value).__name__,)
+
+
+def _estimate_nbytes(obj) -> int:
+    """Estimativa barata do tamanho em memória de um resultado."""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, (bytes, bytearray)):
+        return len(obj)
+    if isinstance(obj, (tuple, list)):
+        return sys.getsizeof(obj) + sum(_estimate_nbytes(o) for o in obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(_estimate_nbytes(v) for v in obj.values())
+    try:
+        return len(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(obj)
+
+
+def _copy_result(obj):
+    """Cópia rasa de estruturas pandas/NumPy para que o chamador não altere o valor em cache."""
+    if isinstance(obj, (pd.DataFrame, pd.Series, np.ndarray)):
+        return obj.copy()
+    if isinstance(obj, tuple):
+        return tuple(_copy_result(o) for o in obj)
+    if isinstance(obj, list):
+        return [_copy_result(o) for o in obj]
+    return obj
+
+
+class ResultCache:
+    """Cache LRU de resultados, limitado pelo total estimado de bytes, seguro entre threads."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key][0]
+            self.misses += 1
+            return default
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def set(self, key, value) -> None:
+        size = _estimate_nbytes(value)
+        if size > self.max_bytes:
+            return  # maior que o cache inteiro: não vale a pena guardar
+        with self._lock:
+            if key in self._data:
+                self.current_bytes -= self._data.pop(key)[1]
+            self._data[key] = (value, size)
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes and self._data:
+                _, (_, old_size) = self._data.popitem(last=False)
+                self.current_bytes -= old_size
+
+    def invalidate(self, fingerprint: str | None = None) -> None:
+        """Remove tudo ou apenas as entradas de uma impressão digital."""
+        with self._lock:
+            if fingerprint is None:
+                self._data.clear()
+                self.current_bytes = 0
+                return
+            for key in [k for k in self._data if k[1] == fingerprint]:
+                self.current_bytes -= self._data.pop(key)[1]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entradas": len(self._data),
+                "bytes": self.current_bytes,
+                "limite_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Cache único por processo, compartilhado por todas as sessões
+RESULT_CACHE = ResultCache(RESULT_CACHE_MAX_MB * 1024 * 1024)
+
+_MISSING = object()
+
+
+def cached_computation(func):
+    """
+    Decorador de cache keyed em (função, impressão digital, colunas, parâmetros).
+    A função decorada deve aceitar o argumento `fingerprint`. Argumentos cujo nome
+    começa com '_' (os dados) não são hasheados, como no st.cache_data: deles só
+    entram na chave as colunas/nome e a forma. Subconjuntos de linhas que não são
+    determinados pelas colunas (ex.: um grupo) devem ser descritos em um parâmetro.
+    Sem impressão digital, a função é executada sem cache.
+    """
+    signature = inspect.signature(func)
+    name = f"{func.__module__}.{func.__qualname__}"
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        fingerprint = bound.arguments.get("fingerprint")
+        if fingerprint is None:
+            return func(*args, **kwargs)
+        params = tuple(
+            (arg_name, _data_signature(value) if arg_name.startswith("_") else _freeze(value))
+            for arg_name, value in bound.arguments.items()
+            if arg_name != "fingerprint"
+        )
+        key = (name, fingerprint, params)
+        result = RESULT_CACHE.get(key, _MISSING)
+        if result is _MISSING:
+            result = func(*args, **kwargs)
+            RESULT_CACHE.set(key, result)
+        return _copy_result(result)
+
+    wrapper.cache = RESULT_CACHE
+    return wrapper
@@ -0,0 +1,192 @@
+# Estatísticas descritivas em passagem única com momentos combináveis
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Linhas processadas por bloco: mantém os temporários pequenos (cabem em cache)
+BLOCK_ROWS = 65536
+
+
+class RunningMoments:
+    """
+    Acumula, por coluna, contagem, média, M2, M3, M4, mínimo, máximo e ausentes.
+    Blocos podem ser adicionados em qualquer ordem e acumuladores parciais podem
+    ser combinados (fórmulas de Chan/Pébay), o que permite processar dados em
+    pedaços (out-of-core) ou em paralelo.
+    """
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        p = len(self.columns)
+        self.n = np.zeros(p)
+        self.mean = np.zeros(p)
+        self.m2 = np.zeros(p)
+        self.m3 = np.zeros(p)
+        self.m4 = np.zeros(p)
+        self.min = np.full(p, np.nan)
+        self.max = np.full(p, np.nan)
+        self.missing = np.zeros(p, dtype=np.int64)
+
+    @classmethod
+    def from_block(cls, columns, block: np.ndarray) -> "RunningMoments":
+        """Calcula os momentos centrais exatos de um bloco 2-D (linhas x colunas)."""
+        acc = cls(columns)
+        block = np.asarray(block, dtype=np.float64)
+        if block.ndim == 1:
+            block = block[:, None]
+        mask = ~np.isnan(block)
+        n = mask.sum(axis=0).astype(np.float64)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean = np.where(n > 0, np.where(mask, block, 0.0).sum(axis=0) / n, 0.0)
+        dev = np.where(mask, block - mean, 0.0)
+        dev2 = dev * dev
+        acc.n = n
+        acc.mean = mean
+        acc.m2 = dev2.sum(axis=0)
+        acc.m3 = (dev2 * dev).sum(axis=0)
+        acc.m4 = (dev2 * dev2).sum(axis=0)
+        # fmin/fmax ignoram NaN e só devolvem NaN se a coluna inteira for ausente
+        acc.min = np.fmin.reduce(block, axis=0) if block.shape[0] else acc.min
+        acc.max = np.fmax.reduce(block, axis=0) if block.shape[0] else acc.max
+        acc.missing = (block.shape[0] - n).astype(np.int64)
+        return acc
+
+    def merge(self, other: "RunningMoments") -> "RunningMoments":
+        """Combina outro acumulador (mesmas colunas) neste, in-place."""
+        na, nb = self.n, other.n
+        n = na + nb
+        delta = other.mean - self.mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            safe_n = np.where(n > 0, n, 1.0)
+            mean = self.mean + delta * nb / safe_n
+            m2 = self.m2 + other.m2 + delta ** 2 * na * nb / safe_n
+            m3 = (
+                self.m3 + other.m3
+                + delta ** 3 * na * nb * (na - nb) / safe_n ** 2
+                + 3.0 * delta * (na * other.m2 - nb * self.m2) / safe_n
+            )
+            m4 = (
+                self.m4 + other.m4
+                + delta ** 4 * na * nb * (na ** 2 - na * nb + nb ** 2) / safe_n ** 3
+                + 6.0 * delta ** 2 * (na ** 2 * other.m2 + nb ** 2 * self.m2) / safe_n ** 2
+                + 4.0 * delta * (na * other.m3 - nb * self.m3) / safe_n
+            )
+        self.n, self.mean, self.m2, self.m3, self.m4 = n, mean, m2, m3, m4
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+        self.missing = self.missing + other.missing
+        return self
+
+    def update(self, block: np.ndarray) -> "RunningMoments":
+        """Adiciona um novo bloco de linhas ao acumulador."""
+        return self.merge(RunningMoments.from_block(self.columns, block))
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Converte os momentos em tabela com as mesmas convenções do pandas:
+        desvio padrão amostral (ddof=1), assimetria e curtose (excesso) corrigidas.
+        """
+        n = self.n
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var = np.where(n > 1, self.m2 / (n - 1), np.nan)
+            m2n = self.m2 / n
+            m3n = self.m3 / n
+            m4n = self.m4 / n
+            g1 = m3n / m2n ** 1.5
+            skew = np.sqrt(n * (n - 1)) / (n - 2) * g1
+            skew = np.where(self.m2 == 0, 0.0, skew)
+            skew = np.where(n < 3, np.nan, skew)
+            g2 = m4n / m2n ** 2 - 3.0
+            kurt = ((n + 1) * g2 + 6.0) * (n - 1) / ((n - 2) * (n - 3))
+            kurt = np.where(self.m2 == 0, 0.0, kurt)
+            kurt = np.where(n < 4, np.nan, kurt)
+            mean = np.where(n > 0, self.mean, np.nan)
+            std = np.sqrt(var)
+        return pd.DataFrame({
+            "count": n,
+            "mean": mean,
+            "std": std,
+            "min": self.min,
+            "max": self.max,
+            "curtose": kurt,
+            "assimetria": skew,
+            "ausentes": self.missing,
+        }, index=pd.Index(self.columns))
+
+
+def _column_group_moments(df: pd.DataFrame, cols, block_rows: int) -> RunningMoments:
+    """Percorre o DataFrame em blocos de linhas, uma única vez, para um grupo de colunas."""
+    acc = RunningMoments(cols)
+    sub = df[cols]
+    for start in range(0, len(sub), block_rows):
+        block = sub.iloc[start:start + block_rows].to_numpy(dtype=np.float64, na_value=np.nan)
+        acc.merge(RunningMoments.from_block(cols, block))
+    return acc
+
+
+def compute_moments(df: pd.DataFrame, cols, block_rows: int = BLOCK_ROWS, n_jobs: int | None = None) -> RunningMoments:
+    """
+    Calcula os momentos das colunas em uma passagem por blocos, paralelizando por
+    grupos de colunas (o NumPy libera o GIL nas reduções).
+    """
+    cols = list(cols)
+    if n_jobs is None:
+        n_jobs = min(len(cols), os.cpu_count() or 1)
+    n_jobs = max(1, n_jobs)
+    if n_jobs == 1 or len(cols) < 2:
+        return _column_group_moments(df, cols, block_rows)
+
+    groups = [g.tolist() for g in np.array_split(np.array(cols, dtype=object), n_jobs) if len(g)]
+    with ThreadPoolExecutor(max_workers=len(groups)) as pool:
+        parts = list(pool.map(lambda g: _column_group_moments(df, g, block_rows), groups))
+
+    acc = RunningMoments(cols)
+    for attr in ("n", "mean", "m2", "m3", "m4", "min", "max", "missing"):
+        setattr(acc, attr, np.concatenate([getattr(p, attr) for p in parts]))
+    return acc
+
+
+def moments_from_chunks(chunks, cols=None) -> RunningMoments:
+    """
+    Acumula momentos a partir de um iterável de DataFrames (ex.: pd.read_csv(..., chunksize=...)),
+    sem manter o arquivo inteiro em memória.
+    """
+    acc = None
+    for chunk in chunks:
+        if cols is None:
+            cols = chunk.select_dtypes(include=["number"]).columns.tolist()
+        part = compute_moments(chunk, cols)
+        acc = part if acc is None else acc.merge(part)
+    return acc if acc is not None else RunningMoments(cols or [])
+
+
+def describe_numeric(df: pd.DataFrame, cols, quantiles: bool = True, moments: RunningMoments | None = None) -> pd.DataFrame:
+    """
+    Tabela descritiva (describe + coef_var, amplitude, curtose, assimetria e ausentes)
+    calculada a partir dos momentos em passagem única. Os quartis, por não serem
+    combináveis, são obtidos com uma única chamada vetorizada quando `quantiles=True`.
+    """
+    cols = list(cols)
+    if moments is None:
+        moments = compute_moments(df, cols)
+    stats_df = moments.to_frame()
+
+    desc_df = stats_df[["count", "mean", "std", "min"]].copy()
+    if quantiles and df is not None and len(df):
+        values = df[cols].to_numpy(dtype=np.float64, na_value=np.nan)
+        with warnings.catch_warnings():
+            # colunas totalmente ausentes geram "All-NaN slice" e resultam em NaN
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            q = np.nanquantile(values, [0.25, 0.5, 0.75], axis=0)
+        desc_df["25%"], desc_df["50%"], desc_df["75%"] = q[0], q[1], q[2]
+    desc_df["max"] = stats_df["max"]
+    desc_df["coef_var"] = desc_df["std"] / desc_df["mean"]
+    desc_df["amplitude"] = desc_df["max"] - desc_df["min"]
+    desc_df["curtose"] = stats_df["curtose"]
+    desc_df["assimetria"] = stats_df["assimetria"]
+    desc_df["ausentes"] = stats_df["ausentes"]
+    return desc_df
@@ -18,8 +18,8 @@ from statsmodels.stats.anova import anova_lm
 from statsmodels.stats.contingency_tables import Table
 from statsmodels.stats.multicomp import pairwise_tukeyhsd  # Para post-hoc Tukey
 
-from pingouin import welch_anova, pairwise_gameshowell  # Para Games-Howell e Welch
-import pingouin as pg # Importado aqui para uso direto no show_correlation_matrix_interface
+from lazy_imports import lazy_module
+pg = lazy_module("pingouin")  # Games-Howell e correlação parcial; importado só no primeiro uso
 
 from sklearn.preprocessing import StandardScaler
 from sklearn.decomposition import PCA  # Para PCA
@@ -29,16 +29,36 @@ from sklearn.metrics import silhouette_score
 from scipy.stats import skew, kurtosis
 from itertools import combinations # Para a função fisher_comparisons_by_pair
 
+from descriptive_stats import describe_numeric  # Estatísticas descritivas em passagem única
+from chart_aggregates import histogram_figure, box_figure, pairplot_png, PAIRPLOT_MAX_POINTS  # Histogramas/boxplots agregados no servidor
+from dataset_cache import cached_computation, dataset_fingerprint  # Cache por impressão digital do dataset
+from correlation_engine import partial_correlation_matrix, matrix_to_pairs, rank_correlation_matrix  # Correlações parciais vetorizadas
+from group_tests import two_group_screening, cohens_d_from_moments, P_ADJUST_METHODS  # Triagem de testes de duas amostras
+from permutation_tests import permutation_test, N_PERMUTATIONS  # Valores-p por permutação vetorizada
+from type_inference import infer_types, coerce_types, TARGET_TYPES  # Inferência e conversão vetorizada de tipos
+from artifact_store import build_zip, cached_artifact, content_hash  # Artefatos em memória (sem caminhos fixos em /tmp)
+from telemetry import instrumented  # Registro de tempo/memória das execuções reais (não dos acertos de cache)
+from bootstrap_ci import (  # Intervalos de confiança bootstrap vetorizados
+    bootstrap_ci, cohens_d_stat, paired_d_stat, correlation_stat, one_sample_d_statistic,
+    partial_eta_squared_statistic, anova_term_columns, N_BOOT,
+)
+
 
 # --- Funções Auxiliares para cálculo de tamanho de efeito ---
 # Estas funções são leves, não precisam de cache
-def cohens_d(x, y):
-    """Calcula o Cohen's d para duas amostras."""
-    nx = len(x)
-    ny = len(y)
-    dof = nx + ny - 2
-    pool_std = np.sqrt(((nx - 1) * np.std(x, ddof=1)**2 + (ny - 1) * np.std(y, ddof=1)**2) / dof)
-    return (np.mean(x) - np.mean(y)) / pool_std
+def cohens_d(x, y, axis=None):
+    """
+    Calcula o Cohen's d para duas amostras. Com `axis`, aceita arrays 2-D e devolve
+    um d por coluna/linha (ausentes ignorados).
+    """
+    if axis is None:
+        x, y = np.asarray(x), np.asarray(y)
+        return cohens_d_from_moments(np.mean(x), np.mean(y), np.std(x, ddof=1), np.std(y, ddof=1), len(x), len(y))
+    return cohens_d_from_moments(
+        np.nanmean(x, axis=axis), np.nanmean(y, axis=axis),
+        np.nanstd(x, axis=axis, ddof=1), np.nanstd(y, axis=axis, ddof=1),
+        np.sum(~np.isnan(x), axis=axis), np.sum(~np.isnan(y), axis=axis),
+    )
 
 def cohens_d_paired(x_pre, x_post):
     """Calcula o Cohen's d para amostras pareadas."""
@@ -64,6 +84,31 @@ def calculate_partial_eta_squared(anova_table, effect_term):
 
 
 # --- Função para comparação estatística entre correlações ---
+@cached_computation
+@instrumented()
+def _perform_bootstrap_ci(_data, statistic, fingerprint=None, columns=None, params=None, stratify=False, n_boot=N_BOOT):
+    """
+    IC bootstrap (BCa) para uma estatística nomeada: "cohens_d" (valores, indicador de grupo),
+    "paired_d" (pré, pós), "one_sample_d" (params: média), "correlation" (colunas numéricas)
+    ou "partial_eta_squared" (params: colunas completas/reduzidas; dados: y e delineamento).
+    """
+    if statistic == "one_sample_d":
+        func = one_sample_d_statistic(params)
+    elif statistic == "partial_eta_squared":
+        func = partial_eta_squared_statistic(*params)
+    else:
+        func = {"cohens_d": cohens_d_stat, "paired_d": paired_d_stat, "correlation": correlation_stat}[statistic]
+    strata = _data[:, 1] if stratify else None
+    result = bootstrap_ci(_data, func, n_boot=n_boot, strata=strata)
+    result.pop("replicates")
+    return result
+
+def _format_ci(result, index=()):
+    """Texto do intervalo bootstrap (ex.: 'IC 95% BCa [0.120, 0.480]')."""
+    low, high = result["low"][index], result["high"][index]
+    method = {"bca": "BCa", "percentile": "percentil"}[result["method"]]
+    return f"IC 95% {method} [{low:.3f}, {high:.3f}]"
+
 def compare_grouped_correlations(r1, n1, r2, n2):
     """
     Testa se duas correlações independentes são estatisticamente diferentes.
@@ -132,10 +177,12 @@ def fisher_comparisons_by_pair(df, group_col, num_vars):
 # --- Funções de Análise Exploratória (Refatoradas para Expander e com Cache) ---
 
 # 1. Análise de Contingência
-# Aplicar cache_data pois envolve cálculo de tabelas e qui-quadrado em potencialmente grandes DataFrames
-@st.cache_data(show_spinner=False) # show_spinner=False para controlar o spinner manualmente
-def _perform_contingency_analysis_core(df_temp, col1, col2):
+# Cache por impressão digital do dataset: evita hashear o DataFrame inteiro a cada chamada
+@cached_computation
+@instrumented()
+def _perform_contingency_analysis_core(_df_temp, col1, col2, fingerprint=None):
     """Função core para cálculo da tabela de contingência e qui-quadrado."""
+    df_temp = _df_temp
     observed_table = pd.crosstab(df_temp[col1].fillna("Valor_Ausente"), df_temp[col2].fillna("Valor_Ausente"), dropna=False)
     
     chi2, p, dof, expected = stats.chi2_contingency(observed_table)
@@ -160,7 +207,9 @@ def _perform_contingency_analysis_core(df_temp, col1, col2):
     return combined_table, chi2, p, dof, max_row_share
 
 
-def show_contingency_analysis(df):
+def show_contingency_analysis(df, fingerprint=None):
+    if fingerprint is None:
+        fingerprint = dataset_fingerprint(df)
     st.subheader("Análise de Contingência (Tabelas e Gráficos)")
     st.info("Utilize esta seção para explorar a relação entre duas variáveis categóricas ou a distribuição de uma única variável categórica.")
 
@@ -217,7 +266,7 @@ def show_contingency_analysis(df):
             if col1 and col2:
                 with st.spinner("Calculando tabela de contingência e Qui-Quadrado..."):
                     try:
-                        combined_table, chi2, p, dof, max_row_share = _perform_contingency_analysis_core(df_temp, col1, col2)
+                        combined_table, chi2, p, dof, max_row_share = _perform_contingency_analysis_core(df_temp, col1, col2, fingerprint=fingerprint)
                         
                         st.write(f"### Análise de Contingência Completa para '{col1}' vs '{col2}'")
                         st.dataframe(combined_table.round(3))
@@ -276,25 +325,127 @@ def show_contingency_analysis(df):
                 st.warning("Selecione ambas as variáveis para gerar a tabela de contingência.")
 
 # 2. Análise de Correlação
-@st.cache_data(show_spinner=False)
-def _calculate_correlations(df_selected_cols, method):
-    """Calcula a matriz de correlação para um método específico."""
-    return df_selected_cols.corr(method=method)
-
-@st.cache_data(show_spinner=False)
-def _calculate_partial_correlation(df_clean, col_x, col_y, col_z):
+@cached_computation
+def _calculate_correlations(_df_selected_cols, method, fingerprint=None, subset=None):
+    """Calcula a matriz de correlação para um método específico (`subset` identifica recortes de linhas)."""
+    if method in ("spearman", "kendall"):
+        # Postos calculados uma vez por coluna (Spearman via BLAS, Kendall O(n log n) por par)
+        return rank_correlation_matrix(_df_selected_cols, _df_selected_cols.columns, method=method)
+    return _df_selected_cols.corr(method=method)
+
+@cached_computation
+def _calculate_partial_correlation(_df_clean, col_x, col_y, col_z, fingerprint=None):
     """Calcula a correlação parcial usando pingouin."""
-    return pg.partial_corr(data=df_clean, x=col_x, y=col_y, covar=col_z)
+    return pg.partial_corr(data=_df_clean, x=col_x, y=col_y, covar=col_z)
+
+@cached_computation
+def _calculate_partial_correlation_matrix(_df, cols, covariates, shrinkage, fingerprint=None):
+    """Matriz de correlações parciais (uma inversão da matriz de correlação/precisão)."""
+    return partial_correlation_matrix(_df, cols, covariates=covariates, shrinkage=shrinkage)
+
+@cached_computation
+def _generate_pairplot(_df_selected_pair_cols, cols, fingerprint=None, max_points=PAIRPLOT_MAX_POINTS, mode="auto", strata_col=None):
+    """Gera o pairplot como PNG (bytes): amostra estratificada ou hexbin, retas com todos os dados."""
+    strata = _df_selected_pair_cols[strata_col] if strata_col else None
+    return pairplot_png(_df_selected_pair_cols, cols, max_points=max_points, mode=mode, strata=strata)
+
+
+def _show_partial_correlation_pair(df, num_cols, fingerprint):
+    """Correlação total e parcial de um par X, Y controlando por Z (pingouin)."""
+    col_x = st.selectbox("Variável X", [""] + num_cols, index=0, key="partial_x")
+    col_y = st.selectbox("Variável Y", [""] + num_cols, index=0, key="partial_y")
+    col_z = st.selectbox("Controlar por (Z)", [""] + num_cols, index=0, key="partial_z")
 
-@st.cache_data(show_spinner=False)
-def _generate_pairplot(df_selected_pair_cols):
-    """Gera o pairplot."""
-    return sns.pairplot(df_selected_pair_cols, kind="reg", plot_kws={'line_kws':{'color':'red'}, 'scatter_kws': {'alpha': 0.5}})
+    if st.button("Calcular Correlação Total e Parcial", key="calc_partial_corr"):
+        if col_x and col_y and col_z and len(set([col_x, col_y, col_z])) == 3:
+            df_clean = df[[col_x, col_y, col_z]].dropna()
 
+            if df_clean.shape[0] < 3:
+                st.warning("Número insuficiente de observações válidas após remoção de valores ausentes.")
+            else:
+                with st.spinner("Calculando correlação total e parcial..."):
+                    r_total, p_total = pearsonr(df_clean[col_x], df_clean[col_y])
+                    partial_result = _calculate_partial_correlation(df_clean, col_x, col_y, col_z, fingerprint=fingerprint)
 
-def show_correlation_matrix_interface(df):
+                result_table = pd.DataFrame({
+                    "Correlação Total (r)": [round(r_total, 3)],
+                    "p-valor Total": [round(p_total, 4)],
+                    "Correlação Parcial (r)": [round(partial_result["r"].iloc[0], 3)],
+                    "p-valor Parcial": [round(partial_result["p-val"].iloc[0], 4)]
+                })
+                st.dataframe(result_table)
+        else:
+            st.info("Selecione três variáveis distintas para comparar correlação total e parcial.")
+
+
+def _show_partial_correlation_matrix(df, num_cols, fingerprint):
+    """Matriz de correlações parciais para todos os pares das variáveis selecionadas."""
+    matrix_cols = st.multiselect(
+        "Variáveis da matriz parcial:",
+        options=num_cols,
+        default=[],
+        key="partial_matrix_vars"
+    )
+    covariate_options = [c for c in num_cols if c not in matrix_cols]
+    covariates = st.multiselect(
+        "Controlar por (opcional; vazio = cada par controlado por todas as outras variáveis selecionadas):",
+        options=covariate_options,
+        default=[],
+        key="partial_matrix_covars"
+    )
+    use_shrinkage = st.checkbox(
+        "Usar estimador com encolhimento (Ledoit-Wolf) — recomendado quando o nº de variáveis se aproxima de n",
+        value=False,
+        key="partial_matrix_shrinkage"
+    )
+
+    if st.button("Calcular Matriz de Correlação Parcial", key="calc_partial_corr_matrix"):
+        if len(matrix_cols) < 2 or (not covariates and len(matrix_cols) < 3):
+            st.info("Selecione ao menos três variáveis (ou duas variáveis e uma ou mais covariáveis).")
+            return
+        with st.spinner("Calculando matriz de correlação parcial..."):
+            try:
+                result = _calculate_partial_correlation_matrix(
+                    df[matrix_cols + covariates], matrix_cols, covariates, use_shrinkage, fingerprint=fingerprint
+                )
+            except np.linalg.LinAlgError as e:
+                st.error(f"Matriz de correlação singular: {e}. Remova variáveis redundantes ou ative o encolhimento.")
+                return
+
+        if result["n"] - 2 - result["k"] <= 0:
+            st.warning("Observações insuficientes para os graus de liberdade da correlação parcial; os valores-p não foram calculados.")
+        st.write(f"Observações completas: {result['n']} | Variáveis controladas por par: {result['k']}")
+        if use_shrinkage:
+            st.info(f"Intensidade do encolhimento (Ledoit-Wolf): {result['shrinkage']:.3f}. Os valores-p são aproximados.")
+
+        pairs = matrix_to_pairs(result["r"], result["p"], r_label="r parcial")
+        pairs["Significativo?"] = pairs["p-valor"].apply(lambda p: "✅ Sim" if p < 0.05 else "❌ Não")
+        st.dataframe(pairs.round(4))
+
+        fig, ax = plt.subplots(figsize=(min(1.2 * len(matrix_cols), 12), 1.2 * len(matrix_cols)))
+        sns.heatmap(
+            result["r"],
+            annot=len(matrix_cols) <= 20,
+            fmt=".2f",
+            cmap="RdBu_r",
+            center=0,
+            vmin=-1,
+            vmax=1,
+            square=True,
+            linewidths=0.5,
+            cbar_kws={"shrink": 0.7},
+            ax=ax
+        )
+        ax.set_title("Matriz de Correlação Parcial", fontsize=14, pad=12)
+        st.pyplot(fig)
+        plt.close(fig)
+
+
+def show_correlation_matrix_interface(df, fingerprint=None):
     import matplotlib.pyplot as plt
     import seaborn as sns
+    if fingerprint is None:
+        fingerprint = dataset_fingerprint(df)
     st.markdown("### Análise de Correlação Completa")
     st.info("Abaixo estão integradas as análises de Pearson, Spearman, Parcial e por Subgrupos.")
 
@@ -312,10 +463,13 @@ def show_correlation_matrix_interface(df):
         default=[],
         key="corr_combined_vars"
     )
+    include_kendall = st.checkbox("Incluir Kendall (tau-b)", value=False, key="corr_include_kendall")
+    include_corr_ci = st.checkbox(f"IC 95% bootstrap (BCa, {N_BOOT} réplicas) para Pearson", value=False, key="corr_include_ci")
     if selected_corr_cols and len(selected_corr_cols) >= 2:
         with st.spinner("Calculando correlações Pearson e Spearman..."):
-            pearson_corr = _calculate_correlations(df[selected_corr_cols], "pearson")
-            spearman_corr = _calculate_correlations(df[selected_corr_cols], "spearman")
+            pearson_corr = _calculate_correlations(df[selected_corr_cols], "pearson", fingerprint=fingerprint)
+            spearman_corr = _calculate_correlations(df[selected_corr_cols], "spearman", fingerprint=fingerprint)
+            kendall_corr = _calculate_correlations(df[selected_corr_cols], "kendall", fingerprint=fingerprint) if include_kendall else None
 
         # --- Tabela de pares ---
         pearson_pairs = pearson_corr.where(np.triu(np.ones(pearson_corr.shape), k=1).astype(bool)).stack().reset_index()
@@ -325,6 +479,21 @@ def show_correlation_matrix_interface(df):
         spearman_pairs.columns = ["Var1", "Var2", "Spearman"]
 
         paired_corrs = pd.merge(pearson_pairs, spearman_pairs, on=["Var1", "Var2"])
+        if kendall_corr is not None:
+            kendall_pairs = matrix_to_pairs(kendall_corr, r_label="Kendall")
+            paired_corrs = pd.merge(paired_corrs, kendall_pairs, on=["Var1", "Var2"], how="left")
+        if include_corr_ci:
+            # Bootstrap sobre as linhas completas (todas as variáveis reamostradas juntas)
+            with st.spinner("Calculando intervalos bootstrap para a matriz de correlação..."):
+                complete = df[selected_corr_cols].dropna()
+                corr_ci = _perform_bootstrap_ci(
+                    complete.to_numpy(dtype=np.float64), "correlation",
+                    fingerprint=fingerprint, columns=tuple(selected_corr_cols)
+                )
+            low = pd.DataFrame(corr_ci["low"], index=selected_corr_cols, columns=selected_corr_cols)
+            high = pd.DataFrame(corr_ci["high"], index=selected_corr_cols, columns=selected_corr_cols)
+            ci_pairs = matrix_to_pairs(low, high, r_label="IC 95% inf", p_label="IC 95% sup")
+            paired_corrs = pd.merge(paired_corrs, ci_pairs, on=["Var1", "Var2"], how="left")
         st.dataframe(paired_corrs.round(2))
 
         # --- Heatmap aprimorado (Pearson) ---
@@ -352,30 +521,17 @@ def show_correlation_matrix_interface(df):
     st.divider()
 
     st.markdown("#### Correlação Total vs Parcial")
-    col_x = st.selectbox("Variável X", [""] + num_cols, index=0, key="partial_x")
-    col_y = st.selectbox("Variável Y", [""] + num_cols, index=0, key="partial_y")
-    col_z = st.selectbox("Controlar por (Z)", [""] + num_cols, index=0, key="partial_z")
-
-    if st.button("Calcular Correlação Total e Parcial", key="calc_partial_corr"):
-        if col_x and col_y and col_z and len(set([col_x, col_y, col_z])) == 3:
-            df_clean = df[[col_x, col_y, col_z]].dropna()
-
-            if df_clean.shape[0] < 3:
-                st.warning("Número insuficiente de observações válidas após remoção de valores ausentes.")
-            else:
-                with st.spinner("Calculando correlação total e parcial..."):
-                    r_total, p_total = pearsonr(df_clean[col_x], df_clean[col_y])
-                    partial_result = _calculate_partial_correlation(df_clean, col_x, col_y, col_z)
+    partial_mode = st.radio(
+        "Modo da correlação parcial:",
+        ["Par de variáveis (X, Y | Z)", "Matriz parcial (todos os pares)"],
+        horizontal=True,
+        key="partial_mode"
+    )
 
-                result_table = pd.DataFrame({
-                    "Correlação Total (r)": [round(r_total, 3)],
-                    "p-valor Total": [round(p_total, 4)],
-                    "Correlação Parcial (r)": [round(partial_result["r"].iloc[0], 3)],
-                    "p-valor Parcial": [round(partial_result["p-val"].iloc[0], 4)]
-                })
-                st.dataframe(result_table)
-        else:
-            st.info("Selecione três variáveis distintas para comparar correlação total e parcial.")
+    if partial_mode == "Matriz parcial (todos os pares)":
+        _show_partial_correlation_matrix(df, num_cols, fingerprint)
+    else:
+        _show_partial_correlation_pair(df, num_cols, fingerprint)
 
 
     st.divider()
@@ -397,7 +553,7 @@ def show_correlation_matrix_interface(df):
                 for name, group in df.groupby(group_col):
                     try:
                         # Cached call for group correlation
-                        corr = _calculate_correlations(group[group_corr_cols], "pearson") 
+                        corr = _calculate_correlations(group[group_corr_cols], "pearson", fingerprint=fingerprint, subset=(group_col, name))
                         corr = corr.where(np.triu(np.ones(corr.shape), k=1).astype(bool))
                         corr = corr.stack().reset_index()
                         corr.columns = ["Var1", "Var2", f"r_{name}"]
@@ -509,13 +665,35 @@ def show_correlation_matrix_interface(df):
         default=[],
         key="pairplot_vars"
     )
+    pair_c1, pair_c2, pair_c3 = st.columns(3)
+    with pair_c1:
+        pair_max_points = st.number_input(
+            "Máximo de pontos por painel:", min_value=500, max_value=100000,
+            value=PAIRPLOT_MAX_POINTS, step=500, key="pairplot_max_points"
+        )
+    with pair_c2:
+        pair_mode_label = st.selectbox(
+            "Painéis:", ["Automático", "Dispersão (amostra)", "Hexbin (todos os dados)"], key="pairplot_mode"
+        )
+    with pair_c3:
+        pair_strata = st.selectbox(
+            "Estratificar amostra por:", ["Nenhum"] + cat_cols, key="pairplot_strata",
+            help="Vale para a dispersão; no modo Automático, escolher um estrato desenha a amostra "
+                 "estratificada em vez do hexbin. No modo Hexbin, todos os dados são usados e o estrato é ignorado."
+        )
+    pair_mode = {"Automático": "auto", "Dispersão (amostra)": "scatter", "Hexbin (todos os dados)": "hexbin"}[pair_mode_label]
+    strata_col = None if pair_strata == "Nenhum" else pair_strata
+
     if st.button("Gerar Gráfico de Pares", key="generate_pairplot_button"):
         if len(selected_pair_cols) >= 2:
             st.markdown("#### Gráfico de Dispersão com Regressão Linear (Pairplot)")
-            with st.spinner("Gerando Pairplot (pode demorar para muitos dados/colunas)..."):
-                fig = _generate_pairplot(df[selected_pair_cols])
-                st.pyplot(fig)
-                plt.close(fig.fig) # CHANGED THIS LINE: access the .fig attribute
+            with st.spinner("Gerando Pairplot..."):
+                pair_df_cols = selected_pair_cols + ([strata_col] if strata_col else [])
+                png = _generate_pairplot(
+                    df[pair_df_cols], selected_pair_cols, fingerprint=fingerprint,
+                    max_points=int(pair_max_points), mode=pair_mode, strata_col=strata_col
+                )
+                st.image(png, use_container_width=True)
         elif selected_pair_cols:
             st.warning("Selecione ao menos duas variáveis.")
         else:
@@ -523,9 +701,11 @@ def show_correlation_matrix_interface(df):
 
 
 # 3. Análise ANOVA
-@st.cache_data(show_spinner=False)
-def _perform_anova_core(df_anova, dv_col, iv_cols):
+@cached_computation
+@instrumented()
+def _perform_anova_core(_df_anova, dv_col, iv_cols, fingerprint=None):
     """Função core para execução da ANOVA."""
+    df_anova = _df_anova
     formula_terms = [f'C({col})' for col in iv_cols]
     if len(formula_terms) > 1:
         formula = f"{dv_col} ~ {' * '.join(formula_terms)}"
@@ -536,12 +716,15 @@ def _perform_anova_core(df_anova, dv_col, iv_cols):
     anova_table = anova_lm(model, typ=2)
     return anova_table, formula
 
-@st.cache_data(show_spinner=False)
-def _perform_levene_test(df_anova, dv_col, iv_cols):
+@cached_computation
+@instrumented()
+def _perform_levene_test(_df_anova, dv_col, iv_cols, fingerprint=None):
     """Função core para execução do Teste de Levene."""
+    df_anova = _df_anova
     if len(iv_cols) > 1:
-        df_anova['_combined_group_'] = df_anova[iv_cols].astype(str).agg('_'.join, axis=1)
-        levene_groups = [df_anova[dv_col][df_anova['_combined_group_'] == g].dropna() for g in df_anova['_combined_group_'].unique()]
+        # Série local: não altera o DataFrame recebido (que é guardado no session_state)
+        combined_group = df_anova[iv_cols].astype(str).agg('_'.join, axis=1)
+        levene_groups = [df_anova[dv_col][combined_group == g].dropna() for g in combined_group.unique()]
     else:
         levene_groups = [df_anova[dv_col][df_anova[iv_cols[0]] == g].dropna() for g in df_anova[iv_cols[0]].unique()]
 
@@ -553,18 +736,28 @@ def _perform_levene_test(df_anova, dv_col, iv_cols):
     stat_levene, levene_p_val = stats.levene(*levene_groups)
     return stat_levene, levene_p_val
 
-@st.cache_data(show_spinner=False)
-def _perform_tukey_hsd(endog_data, groups_data):
+@cached_computation
+@instrumented()
+def _perform_tukey_hsd(_endog_data, _groups_data, fingerprint=None, iv_cols=None):
     """Executa o teste post-hoc Tukey HSD."""
-    return pairwise_tukeyhsd(endog=endog_data, groups=groups_data, alpha=0.05)
+    return pairwise_tukeyhsd(endog=_endog_data, groups=_groups_data, alpha=0.05)
 
-@st.cache_data(show_spinner=False)
-def _perform_games_howell(df, dv_col, between_col):
+@cached_computation
+@instrumented()
+def _perform_games_howell(_df, dv_col, between_col, fingerprint=None, iv_cols=None):
     """Executa o teste post-hoc Games-Howell."""
     # This line is correct, it passes dv_col to pingouin's dv, etc.
-    return pg.pairwise_gameshowell(data=df, dv=dv_col, between=between_col)
+    return pg.pairwise_gameshowell(data=_df, dv=dv_col, between=between_col)
 
-def show_anova_analysis(df):
+@cached_computation
+@instrumented()
+def _perform_permutation_test(_values, _labels, statistic, n_permutations, fingerprint=None, columns=None):
+    """Valor-p por permutação dos rótulos de grupo (`columns` identifica variável e agrupamento)."""
+    return permutation_test(_values, _labels, statistic=statistic, n_permutations=n_permutations)
+
+def show_anova_analysis(df, fingerprint=None):
+    if fingerprint is None:
+        fingerprint = dataset_fingerprint(df)
     st.subheader("Análise de Variância (ANOVA)")
     st.info("Utilize a ANOVA para verificar se há diferenças significativas entre as médias de grupos.")
 
@@ -598,11 +791,14 @@ def show_anova_analysis(df):
             st.info("Selecione a variável independente para continuar.")
             return
         iv_cols.append(iv_col)
+        use_permutation = st.checkbox("Calcular também o valor-p por permutação do F", value=False, key="anova_use_permutation")
     else:  # ANOVA Fatorial
+        use_permutation = False
         iv_cols = st.multiselect("Variáveis Independentes (Categóricas - Fatores):", cat_cols, default=[], key="anova_iv_cols_factorial")
         if not iv_cols or len(iv_cols) < 2:
             st.warning("Para ANOVA Fatorial, selecione pelo menos duas variáveis independentes.")
             return
+    bootstrap_eta = st.checkbox(f"IC 95% bootstrap (BCa, {N_BOOT} réplicas) para ηp²", value=False, key="anova_bootstrap_eta")
 
     if st.button("Executar Análise ANOVA", key="run_anova"):
         # Limpa resultados anteriores para evitar confusão se o usuário mudar as seleções
@@ -632,7 +828,7 @@ def show_anova_analysis(df):
 
         st.write("#### Teste de Homogeneidade de Variâncias (Levene's Test)")
         with st.spinner("Executando Teste de Levene..."):
-            stat_levene, levene_p_val = _perform_levene_test(df_anova, st.session_state['anova_dv_current'], st.session_state['anova_ivs_current'])
+            stat_levene, levene_p_val = _perform_levene_test(df_anova, st.session_state['anova_dv_current'], st.session_state['anova_ivs_current'], fingerprint=fingerprint)
         
         if stat_levene is None: # Se _perform_levene_test retornou None, significa que não havia dados suficientes
             st.warning("Não há grupos suficientes com dados válidos para realizar o Teste de Levene.")
@@ -651,7 +847,7 @@ def show_anova_analysis(df):
         st.write("#### Resultados da ANOVA")
         with st.spinner("Executando ANOVA..."):
             try:
-                anova_table, formula = _perform_anova_core(df_anova, st.session_state['anova_dv_current'], st.session_state['anova_ivs_current'])
+                anova_table, formula = _perform_anova_core(df_anova, st.session_state['anova_dv_current'], st.session_state['anova_ivs_current'], fingerprint=fingerprint)
 
                 anova_table_fmt = (
                     anova_table
@@ -669,6 +865,14 @@ def show_anova_analysis(df):
                 st.markdown("#### Tabela ANOVA")
                 st.dataframe(anova_table_fmt)
 
+                if use_permutation:
+                    with st.spinner(f"Executando {N_PERMUTATIONS} permutações..."):
+                        perm = _perform_permutation_test(
+                            df_anova[dv_col].to_numpy(), df_anova[iv_cols[0]].to_numpy(), "f", N_PERMUTATIONS,
+                            fingerprint=fingerprint, columns=(dv_col, iv_cols[0])
+                        )
+                    st.write(f"Valor p por permutação ({perm['n_permutations']} permutações): {perm['p_value']:.4f}")
+
                 st.write("#### Tamanho do Efeito (Eta-Quadrado Parcial, ηp²)")
                 eta_squared_data = []
                 for term in anova_table.index:
@@ -676,6 +880,21 @@ def show_anova_analysis(df):
                         eta_p2 = calculate_partial_eta_squared(anova_table, term)
                         eta_squared_data.append({'Termo': term, 'ηp²': eta_p2})
                 
+                if eta_squared_data and bootstrap_eta:
+                    from patsy import dmatrices
+                    y_design, X_design = dmatrices(formula, df_anova, return_type="dataframe")
+                    design_data = np.column_stack([y_design.to_numpy().ravel(), X_design.to_numpy()])
+                    term_columns = anova_term_columns(X_design.design_info)
+                    with st.spinner("Calculando intervalos bootstrap para ηp²..."):
+                        for row in eta_squared_data:
+                            if row['Termo'] not in term_columns:
+                                continue
+                            eta_ci = _perform_bootstrap_ci(
+                                design_data, "partial_eta_squared", fingerprint=fingerprint,
+                                columns=(formula,), params=term_columns[row['Termo']]
+                            )
+                            row['IC 95% inf'], row['IC 95% sup'] = float(eta_ci["low"]), float(eta_ci["high"])
+
                 if eta_squared_data:
                     eta_squared_df = pd.DataFrame(eta_squared_data)
                     st.dataframe(eta_squared_df.set_index('Termo').round(3))
@@ -688,7 +907,8 @@ def show_anova_analysis(df):
                     'dv_col': st.session_state['anova_dv_current'],
                     'iv_cols': st.session_state['anova_ivs_current'],
                     'anova_table': anova_table,
-                    'formula': formula
+                    'formula': formula,
+                    'fingerprint': fingerprint
                 }
                 st.session_state['anova_table'] = anova_table
 
@@ -725,6 +945,7 @@ def show_anova_analysis(df):
         iv_cols_results = st.session_state['anova_results']['iv_cols']
         anova_table_results = st.session_state['anova_table']
         levene_p_val_results = st.session_state['levene_p_anova']
+        fingerprint_results = st.session_state['anova_results'].get('fingerprint')
 
         significant_main_factors = []
         for factor in iv_cols_results:
@@ -769,8 +990,10 @@ def show_anova_analysis(df):
                             with st.spinner("Executando Tukey HSD..."):
                                 try:
                                     tukey_result = _perform_tukey_hsd(
-                                        endog_data=df_anova_results[dv_col_results],
-                                        groups_data=df_anova_results[selected_posthoc_factor]
+                                        _endog_data=df_anova_results[dv_col_results],
+                                        _groups_data=df_anova_results[selected_posthoc_factor],
+                                        fingerprint=fingerprint_results,
+                                        iv_cols=iv_cols_results
                                     )
                                     tukey_df = pd.DataFrame(data=tukey_result._results_table.data[1:], columns=tukey_result._results_table.data[0])
                                     tukey_df["Significativo?"] = tukey_df["p-adj"].apply(lambda p: "✅ Sim" if float(p) < 0.05 else "❌ Não")
@@ -788,9 +1011,11 @@ def show_anova_analysis(df):
                             with st.spinner("Executando Games-Howell..."):
                                 try:
                                     gameshowell_result = _perform_games_howell(
-                                    df=df_anova_results,
+                                    _df=df_anova_results,
                                     dv_col=dv_col_results,
-                                    between_col=selected_posthoc_factor
+                                    between_col=selected_posthoc_factor,
+                                    fingerprint=fingerprint_results,
+                                    iv_cols=iv_cols_results
 )
                                     gameshowell_result["Significativo?"] = gameshowell_result["pval"].apply(lambda p: "✅ Sim" if p < 0.05 else "❌ Não")
                                     for col in ["diff", "se", "pval", "ci_low", "ci_high"]:
@@ -857,33 +1082,45 @@ def show_anova_analysis(df):
 
 # 4. Testes T
 # Os testes T são geralmente rápidos, mas para garantir, podemos cachear as funções que chamam stats.ttest
-@st.cache_data(show_spinner=False)
-def _perform_one_sample_ttest(sample_data, pop_mean):
+@cached_computation
+@instrumented()
+def _perform_one_sample_ttest(_sample_data, pop_mean, fingerprint=None):
     """Executa o teste t de uma amostra."""
-    stat, p = stats.ttest_1samp(sample_data, pop_mean)
+    stat, p = stats.ttest_1samp(_sample_data, pop_mean)
     return stat, p # Return serializable values
 
-@st.cache_data(show_spinner=False)
-def _perform_independent_ttest(group1_data, group2_data, equal_var):
+@cached_computation
+@instrumented()
+def _perform_independent_ttest(_group1_data, _group2_data, equal_var, fingerprint=None, groups=None):
     """Executa o teste t independente."""
-    stat, p = stats.ttest_ind(group1_data, group2_data, equal_var=equal_var)
+    stat, p = stats.ttest_ind(_group1_data, _group2_data, equal_var=equal_var)
     return stat, p # Return serializable values
 
-@st.cache_data(show_spinner=False)
-def _perform_levene_independent_ttest(group1_data, group2_data):
+@cached_computation
+@instrumented()
+def _perform_levene_independent_ttest(_group1_data, _group2_data, fingerprint=None, groups=None):
     """Executa o teste de Levene para o teste t independente."""
-    stat, p = stats.levene(group1_data, group2_data)
+    stat, p = stats.levene(_group1_data, _group2_data)
     return stat, p # Return serializable values (Levene's also returns a similar object)
 
 
-@st.cache_data(show_spinner=False)
-def _perform_paired_ttest(df_paired_col_pre, df_paired_col_post):
+@cached_computation
+@instrumented()
+def _perform_ttest_screening(_df, value_cols, group_col, groups, p_adjust, fingerprint=None):
+    """Triagem de todas as variáveis contra um agrupamento binário (Welch + Mann-Whitney)."""
+    return two_group_screening(_df, value_cols, group_col, groups=groups, p_adjust=p_adjust)
+
+@cached_computation
+@instrumented()
+def _perform_paired_ttest(_df_paired_col_pre, _df_paired_col_post, fingerprint=None):
     """Executa o teste t pareado."""
-    stat, p = stats.ttest_rel(df_paired_col_pre, df_paired_col_post)
+    stat, p = stats.ttest_rel(_df_paired_col_pre, _df_paired_col_post)
     return stat, p # Return serializable values
 
 
-def show_t_tests(df):
+def show_t_tests(df, fingerprint=None):
+    if fingerprint is None:
+        fingerprint = dataset_fingerprint(df)
     st.subheader("Testes T")
     st.info("Realize testes t para comparar médias de uma ou duas amostras.")
 
@@ -896,9 +1133,13 @@ def show_t_tests(df):
 
     test_type = st.radio(
         "Selecione o tipo de teste T:",
-        ["Teste T de Uma Amostra", "Teste T de Duas Amostras (Independentes)", "Teste T de Amostras Pareadas"],
+        ["Teste T de Uma Amostra", "Teste T de Duas Amostras (Independentes)", "Teste T de Amostras Pareadas",
+         "Triagem em Lote (Várias Variáveis)"],
         key="t_test_type"
     )
+    bootstrap_d = False
+    if test_type != "Triagem em Lote (Várias Variáveis)":
+        bootstrap_d = st.checkbox(f"IC 95% bootstrap (BCa, {N_BOOT} réplicas) para o Cohen's d", value=False, key="ttest_bootstrap_d")
 
     if test_type == "Teste T de Uma Amostra":
         st.markdown("#### Teste T de Uma Amostra")
@@ -914,7 +1155,7 @@ def show_t_tests(df):
                     st.warning("A coluna selecionada não possui dados válidos para o teste de uma amostra.")
                     return
                 with st.spinner("Executando Teste T de Uma Amostra..."):
-                    stat, p = _perform_one_sample_ttest(sample_data, pop_mean)
+                    stat, p = _perform_one_sample_ttest(sample_data, pop_mean, fingerprint=fingerprint)
                 d = cohens_d_one_sample(sample_data, pop_mean)
 
                 st.write(f"### Resultados do Teste T de Uma Amostra para '{one_sample_col}'")
@@ -924,6 +1165,12 @@ def show_t_tests(df):
                 st.write(f"Valor p: {p:.3f}")
                 st.write(f"Graus de Liberdade: {len(sample_data) - 1}")
                 st.write(f"Cohen's d (Tamanho do Efeito): {d:.3f}")
+                if bootstrap_d:
+                    d_ci = _perform_bootstrap_ci(
+                        sample_data.to_numpy(dtype=np.float64), "one_sample_d",
+                        fingerprint=fingerprint, columns=(one_sample_col,), params=float(pop_mean)
+                    )
+                    st.write(f"Cohen's d: {_format_ci(d_ci)}")
 
                 if p < 0.05:
                     st.success(f"A média da amostra é significativamente diferente da média da população ({pop_mean}).")
@@ -947,6 +1194,7 @@ def show_t_tests(df):
 
             group1_name, group2_name = unique_groups
             st.write(f"Grupos detectados: '{group1_name}' e '{group2_name}'.")
+            use_permutation_t = st.checkbox("Calcular também o valor-p por permutação (t de Welch)", value=False, key="ttest_use_permutation")
 
             if st.button("Executar Teste T Independente", key="run_independent_t_test"):
                 df_filtered = df[[dv_col_ind, group_col_ind]].dropna()
@@ -962,7 +1210,7 @@ def show_t_tests(df):
                 st.write(f"**Grupo '{group2_name}':** Média={group2_data.mean():.3f}, DP={group2_data.std():.3f}, N={len(group2_data)}")
 
                 with st.spinner("Executando Teste de Levene..."):
-                    stat_levene, p_levene = _perform_levene_independent_ttest(group1_data, group2_data)
+                    stat_levene, p_levene = _perform_levene_independent_ttest(group1_data, group2_data, fingerprint=fingerprint, groups=(group_col_ind, group1_name, group2_name))
                 
                 equal_var = p_levene >= 0.05
                 st.write("#### Teste de Homogeneidade de Variâncias (Levene)")
@@ -970,13 +1218,32 @@ def show_t_tests(df):
                 st.success("Variâncias homogêneas.") if equal_var else st.warning("Variâncias não homogêneas (usando Welch).")
 
                 with st.spinner("Executando Teste T Independente..."):
-                    stat_t, p_t = _perform_independent_ttest(group1_data, group2_data, equal_var=equal_var)
+                    stat_t, p_t = _perform_independent_ttest(group1_data, group2_data, equal_var=equal_var, fingerprint=fingerprint, groups=(group_col_ind, group1_name, group2_name))
                 d = cohens_d(group1_data, group2_data)
 
                 st.write("#### Resultado do Teste T")
                 st.write(f"Estatística T: {stat_t:.3f}")
                 st.write(f"Valor p: {p_t:.3f}")
                 st.write(f"Cohen's d: {d:.3f}")
+                if bootstrap_d:
+                    # Reamostragem estratificada: preserva o tamanho de cada grupo
+                    d_data = np.column_stack([
+                        np.concatenate([group1_data.to_numpy(dtype=np.float64), group2_data.to_numpy(dtype=np.float64)]),
+                        np.concatenate([np.ones(len(group1_data)), np.zeros(len(group2_data))]),
+                    ])
+                    d_ci = _perform_bootstrap_ci(
+                        d_data, "cohens_d", fingerprint=fingerprint,
+                        columns=(dv_col_ind, group_col_ind, group1_name, group2_name), stratify=True
+                    )
+                    st.write(f"Cohen's d: {_format_ci(d_ci)}")
+                if use_permutation_t:
+                    df_perm = df_filtered[df_filtered[group_col_ind].isin([group1_name, group2_name])]
+                    with st.spinner(f"Executando {N_PERMUTATIONS} permutações..."):
+                        perm = _perform_permutation_test(
+                            df_perm[dv_col_ind].to_numpy(), df_perm[group_col_ind].to_numpy(), "welch_t", N_PERMUTATIONS,
+                            fingerprint=fingerprint, columns=(dv_col_ind, group_col_ind)
+                        )
+                    st.write(f"Valor p por permutação ({perm['n_permutations']} permutações): {perm['p_value']:.4f}")
 
                 if p_t < 0.05:
                     maior = group1_name if group1_data.mean() > group2_data.mean() else group2_name
@@ -1001,23 +1268,65 @@ def show_t_tests(df):
                     st.warning("Não há dados suficientes para o teste pareado.")
                     return
                 with st.spinner("Executando Teste T Pareado..."):
-                    stat, p = _perform_paired_ttest(df_paired[col_pre], df_paired[col_post])
+                    stat, p = _perform_paired_ttest(df_paired[col_pre], df_paired[col_post], fingerprint=fingerprint)
                 d = cohens_d_paired(df_paired[col_pre], df_paired[col_post])
 
                 st.write(f"### Resultado do Teste T Pareado: '{col_pre}' vs '{col_post}'")
                 st.write(f"Estatística T: {stat:.3f}")
                 st.write(f"Valor p: {p:.3f}")
                 st.write(f"Cohen's d: {d:.3f}")
+                if bootstrap_d:
+                    d_ci = _perform_bootstrap_ci(
+                        df_paired[[col_pre, col_post]].to_numpy(dtype=np.float64), "paired_d",
+                        fingerprint=fingerprint, columns=(col_pre, col_post)
+                    )
+                    st.write(f"Cohen's d: {_format_ci(d_ci)}")
 
                 if p < 0.05:
                     st.success("Diferença significativa entre as condições.")
                 else:
                     st.info("Não há diferença estatisticamente significativa.")
 
+    elif test_type == "Triagem em Lote (Várias Variáveis)":
+        st.markdown("#### Triagem em Lote: Welch e Mann-Whitney para Várias Variáveis")
+        st.info("Todas as variáveis selecionadas são comparadas entre os dois grupos em uma única computação vetorizada, com valores-p ajustados para comparações múltiplas.")
+        screening_cols = st.multiselect("Variáveis numéricas:", num_cols, default=num_cols, key="screening_cols")
+        screening_group = st.selectbox("Variável de Agrupamento (2 grupos):", [""] + cat_cols, index=0, key="screening_group")
+        adjust_label = st.selectbox("Ajuste para comparações múltiplas:", list(P_ADJUST_METHODS), key="screening_adjust")
+        alpha = st.number_input("Nível de significância (α):", min_value=0.001, max_value=0.2, value=0.05, step=0.01, key="screening_alpha")
+
+        if not screening_cols or screening_group == "":
+            st.info("Selecione as variáveis numéricas e a variável de agrupamento.")
+        else:
+            unique_groups = df[screening_group].dropna().unique().tolist()
+            if len(unique_groups) != 2:
+                st.warning("A variável de agrupamento deve ter exatamente dois valores únicos.")
+                return
+            if st.button("Executar Triagem", key="run_ttest_screening"):
+                with st.spinner(f"Testando {len(screening_cols)} variáveis..."):
+                    screening = _perform_ttest_screening(
+                        df[screening_cols + [screening_group]], screening_cols, screening_group,
+                        unique_groups, P_ADJUST_METHODS[adjust_label], fingerprint=fingerprint
+                    )
+                screening["Significativo (Welch)?"] = np.where(screening["p ajustado (Welch)"] < alpha, "✅ Sim", "❌ Não")
+                screening["Significativo (Mann-Whitney)?"] = np.where(screening["p ajustado (Mann-Whitney)"] < alpha, "✅ Sim", "❌ Não")
+                n_sig = int((screening["p ajustado (Welch)"] < alpha).sum())
+                st.write(f"**{n_sig}** de {len(screening)} variáveis com diferença significativa (Welch, p ajustado < {alpha}).")
+                st.dataframe(screening.round(4))
+                st.download_button(
+                    "Baixar resultados (CSV)",
+                    screening.to_csv(index=False).encode("utf-8"),
+                    file_name="triagem_testes_t.csv",
+                    mime="text/csv",
+                    key="download_ttest_screening",
+                )
+
 # 5. Clustering
-@st.cache_data(show_spinner=False)
-def _perform_kmeans_and_pca(scaled_data, num_clusters):
+@cached_computation
+@instrumented()
+def _perform_kmeans_and_pca(_scaled_data, num_clusters, fingerprint=None, features=None):
     """Executa K-Means e PCA para visualização."""
+    scaled_data = _scaled_data
     kmeans = KMeans(n_clusters=num_clusters, random_state=42, n_init='auto')
     cluster_labels = kmeans.fit_predict(scaled_data)
 
@@ -1041,9 +1350,11 @@ def show_clustering_analysis(df):
     st.info("Utilize a Análise de Clusters para identificar grupos homogêneos (segmentos) dentro dos seus dados, com base nas características selecionadas.")
 
     if 'df_processed' in st.session_state and not st.session_state.df_processed.empty:
+        fingerprint = dataset_fingerprint(st.session_state.df_processed)
         df_base_for_clustering = st.session_state.df_processed.copy()
         st.info("Utilizando o DataFrame processado da sessão para a análise de clusters.")
     else:
+        fingerprint = dataset_fingerprint(df)
         df_base_for_clustering = df.copy()
         st.warning("DataFrame processado não encontrado na sessão. Utilizando o DataFrame original carregado para a análise de clusters. Por favor, certifique-se de carregar e pré-processar os dados primeiro.")
 
@@ -1119,7 +1430,7 @@ def show_clustering_analysis(df):
         with st.spinner(f"Executando K-Means com {num_clusters} clusters e PCA para visualização..."):
             try:
                 cluster_labels, silhouette_avg, principal_components, pca_explained_variance_ratio = \
-                    _perform_kmeans_and_pca(scaled_data, num_clusters)
+                    _perform_kmeans_and_pca(scaled_data, num_clusters, fingerprint=fingerprint, features=selected_cols_for_clustering)
 
                 if silhouette_avg is not None:
                     st.success(f"Silhouette Score: {silhouette_avg:.3f}")
@@ -1199,6 +1510,8 @@ def show_exploratory_analysis():
         st.warning("⚠️ Dados não carregados ou pré-processados. Por favor, complete as etapas anteriores.")
         return
 
+    # Impressão digital O(1) da versão atual: chave dos cálculos em cache das abas
+    fingerprint = dataset_fingerprint(st.session_state['df_processed'])
     df_ea = st.session_state['df_processed'].copy()
     key_prefix = "ea_"
 
@@ -1243,11 +1556,7 @@ def show_exploratory_analysis():
             )
 
             if selected_num_cols:
-                desc_df = df_ea[selected_num_cols].describe().T
-                desc_df["coef_var"] = desc_df["std"] / desc_df["mean"]
-                desc_df["amplitude"] = desc_df["max"] - desc_df["min"]
-                desc_df["curtose"] = df_ea[selected_num_cols].kurtosis()
-                desc_df["assimetria"] = df_ea[selected_num_cols].skew()
+                desc_df = describe_numeric(df_ea, selected_num_cols)
 
                 st.markdown("#### Estatísticas Descritivas")
                 st.dataframe(desc_df.round(2))
@@ -1274,19 +1583,19 @@ def show_exploratory_analysis():
                     st.markdown(f"📌 **{var}**: {skew_txt} e {kurt_txt}.")
 
                 for col in selected_num_cols:
-                    st.plotly_chart(px.histogram(df_ea, x=col, nbins=30, title=f"Histograma - {col}"))
-                    st.plotly_chart(px.box(df_ea, y=col, points="all", title=f"Boxplot - {col}"))
+                    # Apenas bins e resumos de cinco números são enviados ao navegador
+                    st.plotly_chart(histogram_figure(df_ea[col], col, nbins=30))
+                    st.plotly_chart(box_figure(df_ea[col], col))
 
                 if st.button("Exportar Resultados Numéricos Selecionados"):
                     
-                    zip_path = export_exploratory_results(df_ea, selected_num_cols, [])
-                    if zip_path:
-                        with open(zip_path, "rb") as f:
-                            st.download_button(
-                                label="Baixar ZIP com Resultados",
-                                data=f,
-                                file_name="resultados_numericos.zip"
-                            )
+                    zip_bytes = export_exploratory_results(df_ea, selected_num_cols, [], fingerprint=fingerprint)
+                    st.download_button(
+                        label="Baixar ZIP com Resultados",
+                        data=zip_bytes,
+                        file_name="resultados_numericos.zip",
+                        mime="application/zip"
+                    )
             else:
                 st.info("Selecione ao menos uma variável.")
 
@@ -1338,33 +1647,37 @@ def show_exploratory_analysis():
 
                 if st.button("Exportar Resultados Categóricos Selecionados"):
                     
-                    zip_path = export_exploratory_results(df_ea, [], selected_cat_cols)
-                    if zip_path:
-                        with open(zip_path, "rb") as f:
-                            st.download_button(
-                                label="Baixar ZIP com Resultados",
-                                data=f,
-                                file_name="resultados_categoricos.zip"
-                            )
+                    zip_bytes = export_exploratory_results(df_ea, [], selected_cat_cols, fingerprint=fingerprint)
+                    st.download_button(
+                        label="Baixar ZIP com Resultados",
+                        data=zip_bytes,
+                        file_name="resultados_categoricos.zip",
+                        mime="application/zip"
+                    )
             else:
                 st.info("Selecione ao menos uma variável.")
 
     with tabs[3]:
-        show_contingency_analysis(df_ea)
+        show_contingency_analysis(df_ea, fingerprint=fingerprint)
 
     with tabs[4]:
-        show_correlation_matrix_interface(df_ea)
+        show_correlation_matrix_interface(df_ea, fingerprint=fingerprint)
 
     with tabs[5]:
-        show_t_tests(df_ea)
+        show_t_tests(df_ea, fingerprint=fingerprint)
 
     with tabs[6]:
-        show_anova_analysis(df_ea)
+        show_anova_analysis(df_ea, fingerprint=fingerprint)
 
     with tabs[7]:
         show_clustering_analysis(df_ea)
 
     # Main part for Streamlit app
+@cached_computation
+def _infer_column_types(_df, missing_strategy, fingerprint=None):
+    """Inferência de tipos por amostragem (chaveada na versão dos dados brutos, estável enquanto o arquivo enviado for o mesmo, e na estratégia de ausentes)."""
+    return infer_types(_df)
+
 def app():
     st.set_page_config(layout="wide", page_title="Análise Exploratória de Dados")
 
@@ -1387,16 +1700,23 @@ def app():
 
     if uploaded_file is not None:
         try:
-            if uploaded_file.name.endswith('.csv'):
-                df_raw = pd.read_csv(uploaded_file)
-            else:
-                df_raw = pd.read_excel(uploaded_file)
-            st.session_state['df_raw'] = df_raw.copy()
+            # Só relê quando o arquivo enviado muda: o mesmo objeto df_raw mantém a impressão
+            # digital entre reruns, e os cálculos chaveados nela (inferência de tipos) são reaproveitados
+            file_id = getattr(uploaded_file, "file_id", None) or (uploaded_file.name, uploaded_file.size)
+            if st.session_state.get('df_raw_file_id') != file_id or st.session_state.get('df_raw') is None:
+                if uploaded_file.name.endswith('.csv'):
+                    df_raw = pd.read_csv(uploaded_file)
+                else:
+                    df_raw = pd.read_excel(uploaded_file)
+                st.session_state['df_raw'] = df_raw
+                st.session_state['df_raw_file_id'] = file_id
+            df_raw = st.session_state['df_raw']
             st.success("Dados carregados com sucesso!")
             st.dataframe(df_raw.head())
         except Exception as e:
             st.error(f"Erro ao carregar o arquivo: {e}")
             st.session_state['df_raw'] = None
+            st.session_state['df_raw_file_id'] = None
     else:
         st.info("Aguardando o upload de um arquivo.")
 
@@ -1427,50 +1747,49 @@ def app():
                         st.info(f"Coluna '{col}': NaNs imputados com a Moda.")
         
         st.subheader("Conversão de Tipos de Dados")
-        st.info("Ajuste os tipos de dados das colunas, se necessário.")
-        
-        cols_to_convert = df_processed_temp.columns.tolist()
-        
-        conversions = {}
-        for col in cols_to_convert:
-            current_dtype = str(df_processed_temp[col].dtype)
-            possible_types = ['object', 'category', 'int64', 'float64', 'bool', 'datetime64[ns]']
-            
-            # Ajustar a lista de opções com base no tipo atual para melhor UX
-            options_for_select = [current_dtype] + [t for t in possible_types if t != current_dtype]
+        st.info("Os tipos sugeridos são inferidos a partir de uma amostra de cada coluna. Ajuste a coluna 'Converter para', se necessário.")
 
-            selected_type = st.selectbox(
-                f"Converter '{col}' de {current_dtype} para:",
-                options=options_for_select,
-                key=f"convert_{col}"
-            )
-            if selected_type != current_dtype:
-                conversions[col] = selected_type
+        inferred = _infer_column_types(
+            df_processed_temp, missing_strategy, fingerprint=dataset_fingerprint(st.session_state['df_raw'])
+        )
+        inferred["Converter para"] = inferred["Tipo sugerido"]
+        # Colunas já tipadas (número, booleano, data, category) são mantidas como estão; as
+        # de texto (object) recebem o tipo sugerido, que é justamente o que a inferência corrige
+        keep_current = inferred["Tipo atual"].isin(TARGET_TYPES) & (inferred["Tipo atual"] != "object")
+        inferred.loc[keep_current, "Converter para"] = inferred.loc[keep_current, "Tipo atual"]
+        edited_types = st.data_editor(
+            inferred,
+            column_config={
+                "Converter para": st.column_config.SelectboxColumn("Converter para", options=TARGET_TYPES, required=True),
+            },
+            disabled=["Coluna", "Tipo atual", "Tipo sugerido", "Formato", "Confiança"],
+            hide_index=True,
+            key="type_conversion_editor",
+        )
+        pending = edited_types[edited_types["Converter para"] != edited_types["Tipo atual"]]
+        conversions = dict(zip(pending["Coluna"], pending["Converter para"]))
+        # O formato inferido só vale se o destino for o tipo sugerido
+        formats = {
+            row["Coluna"]: row["Formato"]
+            for _, row in pending.iterrows()
+            if row["Converter para"] == row["Tipo sugerido"] and isinstance(row["Formato"], str)
+        }
 
         if st.button("Aplicar Conversões", key="apply_conversions"):
-            for col, dtype in conversions.items():
-                try:
-                    if dtype == 'category':
-                        df_processed_temp[col] = df_processed_temp[col].astype('category')
-                    elif dtype == 'datetime64[ns]':
-                        df_processed_temp[col] = pd.to_datetime(df_processed_temp[col], errors='coerce')
-                    elif dtype == 'bool':
-                        # Converter para booleano de forma mais robusta
-                        df_processed_temp[col] = df_processed_temp[col].apply(
-                            lambda x: True if str(x).lower() in ['true', '1', 'yes'] else 
-                                      (False if str(x).lower() in ['false', '0', 'no'] else np.nan)
-                        ).astype('boolean') # Pandas nullable boolean
-                    else:
-                        df_processed_temp[col] = df_processed_temp[col].astype(dtype)
-                    st.success(f"Coluna '{col}' convertida para '{dtype}'.")
-                except Exception as e:
-                    st.error(f"Erro ao converter '{col}' para '{dtype}': {e}")
-            
+            with st.spinner(f"Convertendo {len(conversions)} colunas..."):
+                df_processed_temp, conversion_report = coerce_types(df_processed_temp, conversions, formats)
+            if not conversion_report.empty:
+                st.dataframe(conversion_report, hide_index=True)
+                failed = conversion_report[conversion_report["Falhas de conversão"].fillna(0) > 0]
+                for _, row in failed.iterrows():
+                    st.warning(f"Coluna '{row['Coluna']}': {int(row['Falhas de conversão'])} valores não puderam ser convertidos para '{row['Tipo']}' e ficaram ausentes.")
+                for _, row in conversion_report[conversion_report["Erro"].notna()].iterrows():
+                    st.error(f"Erro ao converter '{row['Coluna']}' para '{row['Tipo']}': {row['Erro']}")
+
             # Save the processed DataFrame to session state
             st.session_state['df_processed'] = df_processed_temp.copy()
             st.dataframe(st.session_state['df_processed'].head())
             st.success("Pré-processamento concluído!")
-            st.experimental_rerun() # Rerun to update subsequent sections with new dtypes
 
         # Se não clicou em "Aplicar Conversões" mas já tinha df_processed, mantém
         # ou se o usuário não fez nada na seção de conversão, mas as imputações foram aplicadas
@@ -1490,42 +1809,28 @@ if __name__ == "__main__":
     app()
 
 
-def export_exploratory_results(df: pd.DataFrame, numeric_vars: list, categorical_vars: list) -> str:
-    """Exporta os resultados descritivos selecionados para arquivos e retorna o caminho de um .zip."""
-    import os
-    import zipfile
-    from io import BytesIO
-
-    output_dir = "/tmp/export_exploratory"
-    os.makedirs(output_dir, exist_ok=True)
-
-    summary_files = []
-
-    if numeric_vars:
-        desc_df = df[numeric_vars].describe().T
-        desc_df["coef_var"] = desc_df["std"] / desc_df["mean"]
-        desc_df["amplitude"] = desc_df["max"] - desc_df["min"]
-        desc_df["curtose"] = df[numeric_vars].kurtosis()
-        desc_df["assimetria"] = df[numeric_vars].skew()
-        num_path = os.path.join(output_dir, "estatisticas_numericas.csv")
-        desc_df.to_csv(num_path)
-        summary_files.append(num_path)
-
-    if categorical_vars:
+def export_exploratory_results(df: pd.DataFrame, numeric_vars: list, categorical_vars: list, fingerprint=None) -> bytes:
+    """
+    Monta em memória um .zip com os resultados descritivos selecionados e retorna seus bytes.
+    O ZIP é reaproveitado enquanto a versão do dataset e as variáveis forem as mesmas.
+    `fingerprint` deve ser a do df_processed quando `df` é uma cópia dele (cada cópia é
+    uma nova versão, e o cache nunca acertaria).
+    """
+    if fingerprint is None:
+        fingerprint = dataset_fingerprint(df)
+    key = content_hash("export_exploratory", fingerprint, list(numeric_vars), list(categorical_vars))
+
+    def build():
+        files = {}
+        if numeric_vars:
+            files["estatisticas_numericas.csv"] = describe_numeric(df, numeric_vars)
         for var in categorical_vars:
             freq_abs = df[var].value_counts(dropna=False)
             freq_rel = df[var].value_counts(normalize=True, dropna=False) * 100
-            freq_df = pd.DataFrame({
+            files[f"frequencia_{var}.csv"] = pd.DataFrame({
                 "Frequência Absoluta": freq_abs,
                 "Frequência Relativa (%)": freq_rel.round(2)
             })
-            cat_path = os.path.join(output_dir, f"frequencia_{var}.csv")
-            freq_df.to_csv(cat_path)
-            summary_files.append(cat_path)
-
-    zip_path = "/tmp/resultado_exploratorio.zip"
-    with zipfile.ZipFile(zip_path, "w") as zf:
-        for file in summary_files:
-            zf.write(file, arcname=os.path.basename(file))
+        return build_zip(files)
 
-    return zip_path
+    return cached_artifact(key, build)
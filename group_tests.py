@@ -0,0 +1,132 @@
+# Triagem vetorizada de testes de duas amostras (Welch e Mann-Whitney) para várias variáveis
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+from statsmodels.stats.multitest import multipletests
+
+# Métodos de ajuste para comparações múltiplas (rótulo -> método do statsmodels)
+P_ADJUST_METHODS = {
+    "Holm": "holm",
+    "FDR (Benjamini-Hochberg)": "fdr_bh",
+    "Bonferroni": "bonferroni",
+}
+
+
+def cohens_d_from_moments(mean1, mean2, sd1, sd2, n1, n2):
+    """Cohen's d (desvio padrão combinado) a partir de médias, DPs e tamanhos; aceita arrays."""
+    mean1, mean2, sd1, sd2, n1, n2 = map(np.asarray, (mean1, mean2, sd1, sd2, n1, n2))
+    dof = n1 + n2 - 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pool_std = np.sqrt(((n1 - 1) * sd1 ** 2 + (n2 - 1) * sd2 ** 2) / dof)
+        return (mean1 - mean2) / pool_std
+
+
+def welch_from_moments(mean1, mean2, var1, var2, n1, n2):
+    """Estatística t de Welch, graus de liberdade (Welch-Satterthwaite) e valor-p bicaudal, em arrays."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        se1 = var1 / n1
+        se2 = var2 / n2
+        t = (mean1 - mean2) / np.sqrt(se1 + se2)
+        dof = (se1 + se2) ** 2 / (se1 ** 2 / (n1 - 1) + se2 ** 2 / (n2 - 1))
+    p = 2 * stats.t.sf(np.abs(t), dof)
+    return t, dof, p
+
+
+def _tie_term(ranks: np.ndarray) -> np.ndarray:
+    """Σ(t³ - t) dos grupos de empates de cada coluna (correção da variância de U)."""
+    out = np.zeros(ranks.shape[1])
+    for k in range(ranks.shape[1]):
+        col = ranks[:, k]
+        _, counts = np.unique(col[~np.isnan(col)], return_counts=True)
+        counts = counts[counts > 1].astype(np.float64)
+        out[k] = (counts ** 3 - counts).sum()
+    return out
+
+
+def mann_whitney_from_ranks(ranks: np.ndarray, in_first: np.ndarray):
+    """
+    Mann-Whitney U para todas as colunas a partir de postos já calculados (uma vez
+    por coluna, ausentes = NaN). Usa a aproximação normal com correção de empates e
+    de continuidade (equivalente a scipy.stats.mannwhitneyu(method="asymptotic")).
+    Retorna (U do primeiro grupo, valor-p, correlação rank-bisserial).
+    """
+    valid = ~np.isnan(ranks)
+    first = valid & in_first[:, None]
+    second = valid & ~in_first[:, None]
+    n1 = first.sum(axis=0).astype(np.float64)
+    n2 = second.sum(axis=0).astype(np.float64)
+    n = n1 + n2
+    r1 = np.where(first, ranks, 0.0).sum(axis=0)
+    u1 = r1 - n1 * (n1 + 1) / 2
+    u2 = n1 * n2 - u1
+    mu = n1 * n2 / 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma = np.sqrt(n1 * n2 / 12 * ((n + 1) - _tie_term(ranks) / (n * (n - 1))))
+        z = (np.maximum(u1, u2) - mu - 0.5) / sigma
+        rank_biserial = 1 - 2 * u2 / (n1 * n2)
+    p = np.clip(2 * stats.norm.sf(z), 0.0, 1.0)
+    return u1, p, rank_biserial
+
+
+def adjust_pvalues(p, method: str = "holm") -> np.ndarray:
+    """Ajusta valores-p para comparações múltiplas, ignorando NaN."""
+    p = np.asarray(p, dtype=np.float64)
+    adjusted = np.full_like(p, np.nan)
+    finite = np.isfinite(p)
+    if finite.any():
+        adjusted[finite] = multipletests(p[finite], method=method)[1]
+    return adjusted
+
+
+def two_group_screening(df: pd.DataFrame, value_cols, group_col: str, groups=None, p_adjust: str = "holm") -> pd.DataFrame:
+    """
+    Compara dois grupos em todas as variáveis de `value_cols` de uma só vez:
+    médias e variâncias de um único groupby, Welch t/gl/p em aritmética de arrays,
+    Mann-Whitney a partir de postos calculados uma vez por coluna, Cohen's d e
+    valores-p ajustados (`p_adjust`: método do statsmodels.multipletests).
+    Ausentes são tratados por variável (cada teste usa as linhas válidas da variável).
+    """
+    value_cols = list(value_cols)
+    data = df[df[group_col].notna()]
+    if groups is None:
+        groups = data[group_col].unique().tolist()
+    if len(groups) != 2:
+        raise ValueError("A variável de agrupamento deve ter exatamente dois grupos.")
+    g1, g2 = groups
+    data = data[data[group_col].isin([g1, g2])]
+
+    numeric = data[value_cols].apply(pd.to_numeric, errors="coerce")
+    summary = numeric.groupby(data[group_col], observed=True).agg(["count", "mean", "var"])
+    n1 = summary.loc[g1].xs("count", level=1).to_numpy(dtype=np.float64)
+    n2 = summary.loc[g2].xs("count", level=1).to_numpy(dtype=np.float64)
+    mean1 = summary.loc[g1].xs("mean", level=1).to_numpy(dtype=np.float64)
+    mean2 = summary.loc[g2].xs("mean", level=1).to_numpy(dtype=np.float64)
+    var1 = summary.loc[g1].xs("var", level=1).to_numpy(dtype=np.float64)
+    var2 = summary.loc[g2].xs("var", level=1).to_numpy(dtype=np.float64)
+
+    t, dof, p_t = welch_from_moments(mean1, mean2, var1, var2, n1, n2)
+    d = cohens_d_from_moments(mean1, mean2, np.sqrt(var1), np.sqrt(var2), n1, n2)
+
+    values = numeric.to_numpy(dtype=np.float64, na_value=np.nan)
+    ranks = stats.rankdata(values, axis=0, nan_policy="omit")
+    in_first = (data[group_col] == g1).to_numpy()
+    u, p_u, rank_biserial = mann_whitney_from_ranks(ranks, in_first)
+
+    result = pd.DataFrame({
+        "Variável": value_cols,
+        f"N ({g1})": n1.astype(np.int64),
+        f"N ({g2})": n2.astype(np.int64),
+        f"Média ({g1})": mean1,
+        f"Média ({g2})": mean2,
+        "t (Welch)": t,
+        "gl": dof,
+        "p (Welch)": p_t,
+        "p ajustado (Welch)": adjust_pvalues(p_t, p_adjust),
+        "Cohen's d": d,
+        "U (Mann-Whitney)": u,
+        "p (Mann-Whitney)": p_u,
+        "p ajustado (Mann-Whitney)": adjust_pvalues(p_u, p_adjust),
+        "Rank-bisserial": rank_biserial,
+    })
+    return result.sort_values("p ajustado (Welch)", na_position="last").reset_index(drop=True)
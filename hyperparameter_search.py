@@ -0,0 +1,536 @@
+# Busca de hiperparâmetros com orçamento de tempo e progresso: grade, aleatória, successive halving e SMBO
+
+from dataclasses import dataclass, field
+import math
+import os
+import shutil
+import tempfile
+import time
+import weakref
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import KFold, ParameterGrid, StratifiedKFold
+from sklearn.pipeline import Pipeline
+
+from boosting import EarlyStoppingBooster
+
+# Estratégias oferecidas na interface (rótulo -> identificador)
+SEARCH_STRATEGIES = {
+    "Grade exaustiva": "grid",
+    "Successive halving (grade)": "halving_grid",
+    "Successive halving (aleatória)": "halving_random",
+    "Aleatória (distribuições contínuas)": "random",
+    "Bayesiana sequencial (SMBO)": "smbo",
+}
+# Recurso do successive halving: linhas de treino ou número de árvores
+HALVING_RESOURCES = {"Linhas de treino": "n_samples", "Número de árvores (n_estimators)": "n_estimators"}
+
+HALVING_FACTOR = 3
+DEFAULT_BUDGET_S = 120
+DEFAULT_N_ITER = 30
+CV_FOLDS = 5
+# Candidatos aleatórios avaliados pela função de aquisição do SMBO a cada passo
+SMBO_CANDIDATES = 2000
+# Matrizes pré-processadas acima deste tamanho são gravadas em disco e mapeadas em memória
+# (mesmo limiar padrão do joblib para memmap automático)
+MEMMAP_MIN_BYTES = 1_000_000
+
+
+@dataclass(frozen=True)
+class Real:
+    """Hiperparâmetro contínuo em [low, high], amostrado em escala log se `log`."""
+    low: float
+    high: float
+    log: bool = False
+
+
+@dataclass(frozen=True)
+class Integer:
+    """Hiperparâmetro inteiro em [low, high] (inclusive), amostrado em escala log se `log`."""
+    low: int
+    high: int
+    log: bool = False
+
+
+@dataclass(frozen=True)
+class Categorical:
+    """Hiperparâmetro com valores discretos."""
+    choices: tuple
+
+
+# Grades (estratégias de grade) e espaços contínuos (aleatória, halving aleatório, SMBO) por modelo.
+# Os nomes dos parâmetros são os do estimador; o prefixo do passo do Pipeline é aplicado depois.
+PARAM_GRIDS = {
+    "Regressão Logística": {"C": [0.01, 0.1, 1, 10]},
+    "Random Forest": {"n_estimators": [100, 200], "max_depth": [None, 10, 20]},
+    "SVM": {"C": [0.1, 1, 10], "kernel": ["linear", "rbf"]},
+    "KNN": {"n_neighbors": [3, 5, 7]},
+    "XGBoost": {"n_estimators": [100, 200], "learning_rate": [0.01, 0.1, 0.2]},
+    "LightGBM": {"n_estimators": [100, 200], "learning_rate": [0.01, 0.1, 0.2]},
+}
+PARAM_SPACES = {
+    "Regressão Logística": {"C": Real(1e-3, 1e2, log=True)},
+    "Random Forest": {
+        "n_estimators": Integer(50, 500),
+        "max_depth": Categorical((None, 5, 10, 20, 40)),
+        "min_samples_leaf": Integer(1, 20, log=True),
+        "max_features": Real(0.2, 1.0),
+    },
+    # só RBF: o kernel linear do libsvm quase não converge com C alto (um ajuste pode levar minutos);
+    # o kernel linear continua disponível nas grades, com C até 10
+    "SVM": {"C": Real(1e-3, 1e3, log=True), "gamma": Real(1e-4, 1e1, log=True)},
+    "KNN": {"n_neighbors": Integer(1, 50), "weights": Categorical(("uniform", "distance"))},
+    "XGBoost": {
+        "n_estimators": Integer(50, 1000, log=True),
+        "learning_rate": Real(0.005, 0.3, log=True),
+        "max_depth": Integer(2, 10),
+        "subsample": Real(0.5, 1.0),
+        "colsample_bytree": Real(0.5, 1.0),
+        "min_child_weight": Real(0.1, 10.0, log=True),
+    },
+    "LightGBM": {
+        "n_estimators": Integer(50, 1000, log=True),
+        "learning_rate": Real(0.005, 0.3, log=True),
+        "num_leaves": Integer(8, 256, log=True),
+        "colsample_bytree": Real(0.5, 1.0),
+        "min_child_samples": Integer(5, 100, log=True),
+    },
+}
+
+
+def _model_family(model_option: str) -> str:
+    """'Random Forest Regressor' -> 'Random Forest' (mesmas grades para regressão e classificação)."""
+    for suffix in (" Regressor", " Classifier"):
+        if model_option.endswith(suffix):
+            return model_option[: -len(suffix)]
+    return model_option
+
+
+def param_grid_for(model_option: str, step: str) -> dict:
+    """Grade do modelo com o prefixo do passo do Pipeline (ex.: 'regressor__n_estimators')."""
+    return {f"{step}__{k}": v for k, v in PARAM_GRIDS.get(_model_family(model_option), {}).items()}
+
+
+def param_space_for(model_option: str, step: str) -> dict:
+    """Espaço contínuo do modelo com o prefixo do passo do Pipeline."""
+    return {f"{step}__{k}": v for k, v in PARAM_SPACES.get(_model_family(model_option), {}).items()}
+
+
+def supports_tree_resource(model_option: str) -> bool:
+    """Modelos em que o número de árvores pode ser usado como recurso do successive halving."""
+    return "n_estimators" in PARAM_SPACES.get(_model_family(model_option), {})
+
+
+# --- Amostragem e codificação do espaço ---
+
+def _sample_dimension(dim, rng, size):
+    if isinstance(dim, Categorical):
+        idx = rng.integers(0, len(dim.choices), size=size)
+        return [dim.choices[i] for i in idx]
+    if isinstance(dim, Integer) and not dim.log:
+        return [int(v) for v in rng.integers(dim.low, dim.high + 1, size=size)]
+    u = rng.random(size)
+    if dim.log:
+        values = np.exp(np.log(dim.low) + u * (np.log(dim.high) - np.log(dim.low)))
+    else:
+        values = dim.low + u * (dim.high - dim.low)
+    if isinstance(dim, Integer):
+        return [int(v) for v in np.clip(np.rint(values), dim.low, dim.high)]
+    return [float(v) for v in values]
+
+
+def sample_params(space: dict, n: int, rng) -> list:
+    """`n` combinações sorteadas do espaço (independentes por dimensão)."""
+    columns = {name: _sample_dimension(dim, rng, n) for name, dim in space.items()}
+    return [{name: columns[name][i] for name in space} for i in range(n)]
+
+
+def _encode(space: dict, params_list: list) -> np.ndarray:
+    """Codifica combinações no cubo unitário (log quando indicado; categorias em one-hot) para o surrogate."""
+    blocks = []
+    for name, dim in space.items():
+        values = [p[name] for p in params_list]
+        if isinstance(dim, Categorical):
+            onehot = np.zeros((len(values), len(dim.choices)))
+            for i, v in enumerate(values):
+                onehot[i, dim.choices.index(v)] = 1.0
+            blocks.append(onehot)
+            continue
+        x = np.asarray(values, dtype=np.float64)
+        low, high = float(dim.low), float(dim.high)
+        if dim.log:
+            x, low, high = np.log(x), np.log(low), np.log(high)
+        blocks.append(((x - low) / (high - low if high > low else 1.0))[:, None])
+    return np.hstack(blocks) if blocks else np.zeros((len(params_list), 0))
+
+
+def _expected_improvement(mu, sigma, best, xi=0.01):
+    from scipy.stats import norm
+
+    sigma = np.maximum(sigma, 1e-12)
+    z = (mu - best - xi) / sigma
+    return (mu - best - xi) * norm.cdf(z) + sigma * norm.pdf(z)
+
+
+# --- Execução ---
+
+@dataclass
+class SearchResult:
+    """Resultado de uma busca, com a mesma nomenclatura dos *SearchCV do scikit-learn."""
+    strategy: str
+    best_params_: dict
+    best_score_: float
+    best_estimator_: object
+    cv_results_: pd.DataFrame
+    n_fits: int
+    elapsed: float
+    budget_exhausted: bool
+    notes: list = field(default_factory=list)
+
+
+def _take(X, idx):
+    return X.iloc[idx] if hasattr(X, "iloc") else X[idx]
+
+
+def _fit_and_score(model, X_train, y_train, X_test, y_test, scorer, deadline=None):
+    """
+    Ajusta o modelo numa dobra e pontua; falhas viram NaN (como error_score=np.nan).
+    Se o prazo `deadline` (time.time(), comparável entre os processos do joblib) já
+    passou, a dobra não é ajustada e o retorno é (None, 0.0).
+    """
+    if deadline is not None and time.time() >= deadline:
+        return None, 0.0
+    start = time.perf_counter()
+    try:
+        model.fit(X_train, y_train)
+        fit_time = time.perf_counter() - start
+        return float(scorer(model, X_test, y_test)), fit_time
+    except Exception:
+        return np.nan, time.perf_counter() - start
+
+
+class FoldCache:
+    """
+    Pré-processamento por dobra, feito uma única vez e compartilhado por todos os
+    candidatos: o passo 'preprocessor' não depende dos hiperparâmetros do modelo, então
+    é ajustado no treino de cada dobra e as matrizes resultantes são reaproveitadas.
+    Matrizes grandes vão para um diretório temporário e são reabertas com memmap, de
+    modo que os workers do joblib recebem só a referência ao arquivo, sem re-serializar.
+    """
+
+    def __init__(self, preprocessor, cv):
+        self.preprocessor = preprocessor
+        self.cv = cv
+        self._folds = {}
+        self._dir = None
+        self._cleanup = None
+
+    def _store(self, array, name):
+        nbytes = getattr(array, "nbytes", 0) + sum(getattr(getattr(array, a, None), "nbytes", 0) for a in ("data", "indices", "indptr"))
+        if nbytes < MEMMAP_MIN_BYTES:
+            return array
+        if self._dir is None:
+            self._dir = tempfile.mkdtemp(prefix="bds_busca_")
+            # remove o diretório mesmo se a busca for interrompida por exceção
+            self._cleanup = weakref.finalize(self, shutil.rmtree, self._dir, True)
+        path = os.path.join(self._dir, f"{name}.joblib")
+        joblib.dump(array, path)
+        return joblib.load(path, mmap_mode="r")
+
+    def folds(self, key, X, y):
+        """Lista de (X_treino, y_treino, X_teste, y_teste) pré-processados para o subconjunto `key`."""
+        if key not in self._folds:
+            folds = []
+            y_values = np.asarray(y)
+            for i, (train_idx, test_idx) in enumerate(self.cv.split(X, y_values)):
+                X_train, X_test = _take(X, train_idx), _take(X, test_idx)
+                pre = clone(self.preprocessor).fit(X_train, y_values[train_idx])
+                folds.append((
+                    self._store(pre.transform(X_train), f"{key}_{i}_treino"), y_values[train_idx],
+                    self._store(pre.transform(X_test), f"{key}_{i}_teste"), y_values[test_idx],
+                ))
+            self._folds[key] = folds
+        return self._folds[key]
+
+    def close(self):
+        self._folds.clear()
+        if self._cleanup is not None:
+            self._cleanup()
+            self._dir = self._cleanup = None
+
+
+class _Evaluator:
+    """
+    Avalia combinações por validação cruzada, controlando o prazo e o progresso. O prazo
+    é conferido antes de cada dobra: um candidato interrompido no meio não entra nos
+    resultados (pontuação -inf) e marca `interrupted`.
+    """
+
+    def __init__(self, estimator, X, y, scoring, cv, budget_s, progress, total, n_jobs, random_state, precompute=True):
+        self.estimator = estimator
+        self.X, self.y = X, y
+        self.scoring = scoring
+        self.cv = cv
+        self.deadline = time.time() + budget_s if budget_s else None
+        self.start = time.perf_counter()
+        self.progress = progress
+        self.total = max(total, 1)
+        self.n_jobs = n_jobs
+        self.rng = np.random.default_rng(random_state)
+        self.rows = []
+        self.n_fits = 0
+        self.interrupted = False
+        self._subsamples = {}
+        self._scorer = get_scorer(scoring)
+        # pré-processamento por dobra só quando o Pipeline é (preprocessor, modelo)
+        self._fold_cache = None
+        if precompute and isinstance(estimator, Pipeline) and len(estimator.steps) == 2 and estimator.steps[0][0] == "preprocessor":
+            self._fold_cache = FoldCache(estimator.steps[0][1], cv)
+            self._step, self._final = estimator.steps[1]
+
+    def out_of_time(self) -> bool:
+        return self.deadline is not None and time.time() >= self.deadline
+
+    def close(self):
+        if self._fold_cache is not None:
+            self._fold_cache.close()
+
+    def _cross_validate(self, params, X, y, key):
+        """Pontuações e tempos das dobras concluídas e se todas foram ajustadas antes do prazo."""
+        prefix = f"{self._step}__" if self._fold_cache is not None else None
+        if prefix is None or not all(name.startswith(prefix) for name in params):
+            model = clone(self.estimator).set_params(**params)
+            y_values = np.asarray(y)
+            folds = ((_take(X, tr), y_values[tr], _take(X, te), y_values[te]) for tr, te in self.cv.split(X, y_values))
+        else:
+            model = clone(self._final).set_params(**{name[len(prefix):]: value for name, value in params.items()})
+            folds = self._fold_cache.folds(key, X, y)
+        out = joblib.Parallel(n_jobs=self.n_jobs)(
+            joblib.delayed(_fit_and_score)(clone(model), X_tr, y_tr, X_te, y_te, self._scorer, self.deadline)
+            for X_tr, y_tr, X_te, y_te in folds
+        )
+        done = [o for o in out if o[0] is not None]
+        return (np.array([o[0] for o in done], dtype=np.float64), np.array([o[1] for o in done]),
+                len(done) == len(out))
+
+    def __call__(self, params: dict, n_samples: int | None = None, round_index: int = 0, resource=None) -> float:
+        X, y = self.X, self.y
+        key = "completo"
+        if n_samples is not None and n_samples < len(y):
+            # mesma subamostra para todos os candidatos de uma rodada (comparação justa)
+            if n_samples not in self._subsamples:
+                self._subsamples[n_samples] = np.sort(self.rng.choice(len(y), size=n_samples, replace=False))
+            idx = self._subsamples[n_samples]
+            X = X.iloc[idx] if hasattr(X, "iloc") else X[idx]
+            y = y.iloc[idx] if hasattr(y, "iloc") else y[idx]
+            key = f"n{n_samples}"
+        scores, fit_times, complete = self._cross_validate(params, X, y, key)
+        self.n_fits += len(scores)
+        if not complete:
+            # prazo esgotado no meio da validação cruzada: o candidato não é comparável aos demais
+            self.interrupted = True
+            return -np.inf
+        score = float(np.nanmean(scores)) if np.isfinite(scores).any() else -np.inf
+        self.rows.append({
+            "params": params,
+            "mean_test_score": score,
+            "std_test_score": float(np.nanstd(scores)),
+            "mean_fit_time": float(np.mean(fit_times)),
+            "iter": round_index,
+            "n_resources": resource,
+        })
+        if self.progress is not None:
+            done = len(self.rows)
+            self.progress(min(done / self.total, 1.0),
+                          f"{done}/{self.total} avaliações · melhor {self.best_score():.4f} · {time.perf_counter() - self.start:.0f} s")
+        return score
+
+    def best_score(self) -> float:
+        return max((r["mean_test_score"] for r in self.rows), default=-np.inf)
+
+    def results_frame(self) -> pd.DataFrame:
+        df = pd.DataFrame(self.rows)
+        if df.empty:
+            return df
+        params = pd.json_normalize(df["params"].tolist()).add_prefix("param_")
+        df = pd.concat([df.reset_index(drop=True), params], axis=1)
+        df["rank_test_score"] = df["mean_test_score"].rank(ascending=False, method="min").astype(int)
+        return df
+
+
+def _halving_schedule(n_candidates: int, max_resources: int, min_resources: int, factor: int):
+    """Recursos por rodada (crescentes) no esquema do HalvingGridSearchCV: cada rodada multiplica por `factor`."""
+    n_rounds = max(1, min(
+        math.ceil(math.log(max(n_candidates, 1), factor)) + 1,
+        int(math.log(max(max_resources // max(min_resources, 1), 1), factor)) + 1,
+    ))
+    return [max(min_resources, int(max_resources / factor ** (n_rounds - 1 - i))) for i in range(n_rounds)]
+
+
+def run_search(estimator, X, y, model_option: str, step: str, task: str, strategy: str = "halving_random",
+               scoring: str | None = None, budget_s: float | None = DEFAULT_BUDGET_S, n_iter: int = DEFAULT_N_ITER,
+               resource: str = "n_samples", factor: int = HALVING_FACTOR, random_state: int = 42,
+               progress=None, n_jobs: int = -1, precompute: bool = True) -> SearchResult:
+    """
+    Busca os hiperparâmetros de `estimator` (Pipeline cujo passo final é `step`) e
+    reajusta o melhor em todo o (X, y).
+
+    - "grid": grade exaustiva (mesma grade do GridSearchCV anterior).
+    - "halving_grid"/"halving_random": successive halving sobre a grade ou sobre
+      `n_iter` sorteios do espaço contínuo; cada rodada mantém 1/`factor` dos
+      candidatos e multiplica o recurso (linhas de treino ou n_estimators) por `factor`.
+    - "random": `n_iter` sorteios do espaço contínuo (log-uniformes onde indicado).
+    - "smbo": otimização sequencial com surrogate de processo gaussiano e Expected
+      Improvement; começa com sorteios aleatórios e depois propõe um ponto por vez.
+
+    O orçamento `budget_s` é verificado antes de cada dobra (um ajuste em andamento
+    não é interrompido); ao esgotá-lo, a busca retorna o melhor candidato avaliado por
+    completo até então, e uma nota registra quando o tempo total passou do orçamento.
+    `progress(fração, mensagem)` é chamado após cada avaliação.
+
+    Com `precompute`, o passo 'preprocessor' é ajustado uma vez por dobra (e por
+    subamostra do halving) e as matrizes transformadas são compartilhadas por todos os
+    candidatos, em vez de reajustar o ColumnTransformer a cada candidato × dobra.
+    Se o passo final usa early stopping (EarlyStoppingBooster), n_estimators sai da
+    busca: cada ajuste decide o número de árvores na sua validação interna.
+    """
+    scoring = scoring or ("r2" if task == "regressao" else "accuracy")
+    cv = (KFold(CV_FOLDS, shuffle=True, random_state=random_state) if task == "regressao"
+          else StratifiedKFold(CV_FOLDS, shuffle=True, random_state=random_state))
+    rng = np.random.default_rng(random_state)
+    grid = param_grid_for(model_option, step)
+    space = param_space_for(model_option, step)
+    notes = []
+    start = time.perf_counter()
+    n_estimators_key = f"{step}__n_estimators"
+    early_stopping = isinstance(estimator, Pipeline) and isinstance(estimator.named_steps.get(step), EarlyStoppingBooster)
+    if early_stopping:
+        # o número de árvores é decidido pela validação interna de cada ajuste
+        grid.pop(n_estimators_key, None)
+        space.pop(n_estimators_key, None)
+        if resource == "n_estimators":
+            notes.append("Com early stopping o número de árvores não é buscado: usando linhas de treino como recurso.")
+            resource = "n_samples"
+
+    if strategy in ("grid", "halving_grid"):
+        candidates = list(ParameterGrid(grid)) if grid else [{}]
+    elif space:
+        candidates = sample_params(space, n_iter, rng) if strategy != "smbo" else []
+    else:
+        candidates = [{}]
+        notes.append("Modelo sem hiperparâmetros a buscar: ajustado com os valores padrão.")
+
+    best_resource = None
+    if strategy in ("halving_grid", "halving_random") and len(candidates) > 1:
+        if resource == "n_estimators" and not supports_tree_resource(model_option):
+            notes.append("O modelo não tem n_estimators: usando linhas de treino como recurso.")
+            resource = "n_samples"
+        if resource == "n_estimators":
+            max_resources = int(max(grid.get(n_estimators_key, [500])) if strategy == "halving_grid" else space[n_estimators_key].high)
+            # o recurso define n_estimators; os candidatos diferem nos demais parâmetros
+            candidates = [{k: v for k, v in c.items() if k != n_estimators_key} for c in candidates]
+            candidates = [dict(t) for t in {tuple(sorted(c.items(), key=lambda kv: kv[0])) for c in candidates}] or [{}]
+            min_resources = max(10, max_resources // factor ** 3)
+        else:
+            max_resources = len(y)
+            n_classes = len(np.unique(y)) if task != "regressao" else 1
+            min_resources = max(CV_FOLDS * 2 * n_classes, 50)
+        schedule = _halving_schedule(len(candidates), max_resources, min_resources, factor)
+        total = sum(math.ceil(len(candidates) / factor ** i) for i in range(len(schedule)))
+        evaluate = _Evaluator(estimator, X, y, scoring, cv, budget_s, progress, total, n_jobs, random_state, precompute)
+        survivors = candidates
+        exhausted = False
+        for round_index, r in enumerate(schedule):
+            scored = []
+            for params in survivors:
+                if evaluate.out_of_time():
+                    exhausted = True
+                    break
+                run_params = dict(params)
+                if resource == "n_estimators":
+                    run_params[n_estimators_key] = int(r)
+                    score = evaluate(run_params, round_index=round_index, resource=int(r))
+                else:
+                    score = evaluate(run_params, n_samples=int(r), round_index=round_index, resource=int(r))
+                scored.append((score, run_params))
+            if not scored:
+                break
+            scored.sort(key=lambda t: t[0], reverse=True)
+            best_resource = (round_index, scored[0])
+            if exhausted or round_index == len(schedule) - 1:
+                break
+            keep = max(1, math.ceil(len(scored) / factor))
+            survivors = [p if resource == "n_samples" else {k: v for k, v in p.items() if k != n_estimators_key}
+                         for _, p in scored[:keep]]
+        best_score, best_params = best_resource[1] if best_resource else (-np.inf, candidates[0])
+    else:
+        exhausted = False
+        if strategy == "smbo" and space:
+            evaluate = _Evaluator(estimator, X, y, scoring, cv, budget_s, progress, n_iter, n_jobs, random_state, precompute)
+            best_params, best_score, exhausted = _smbo(evaluate, space, n_iter, rng)
+        else:
+            evaluate = _Evaluator(estimator, X, y, scoring, cv, budget_s, progress, len(candidates), n_jobs, random_state, precompute)
+            best_score, best_params = -np.inf, candidates[0]
+            for params in candidates:
+                if evaluate.out_of_time():
+                    exhausted = True
+                    break
+                score = evaluate(params)
+                if score > best_score:
+                    best_score, best_params = score, params
+
+    evaluate.close()
+    if exhausted or evaluate.interrupted:
+        notes.append("Orçamento de tempo esgotado: retornado o melhor candidato avaliado até então.")
+    best_estimator = clone(estimator).set_params(**best_params).fit(X, y)
+    elapsed = time.perf_counter() - start
+    if budget_s and elapsed > budget_s:
+        notes.append(f"A busca levou {elapsed:.0f} s, acima do orçamento de {budget_s:.0f} s: o prazo é conferido "
+                     "antes de cada dobra, mas um ajuste em andamento e o reajuste final não são interrompidos.")
+    return SearchResult(
+        strategy=strategy,
+        best_params_=best_params,
+        best_score_=float(best_score),
+        best_estimator_=best_estimator,
+        cv_results_=evaluate.results_frame(),
+        n_fits=evaluate.n_fits,
+        elapsed=elapsed,
+        budget_exhausted=exhausted,
+        notes=notes,
+    )
+
+
+def _smbo(evaluate: _Evaluator, space: dict, n_iter: int, rng):
+    """Laço do SMBO: processo gaussiano (Matern + ruído) como surrogate e Expected Improvement como aquisição."""
+    from sklearn.gaussian_process import GaussianProcessRegressor
+    from sklearn.gaussian_process.kernels import ConstantKernel, Matern, WhiteKernel
+
+    n_initial = min(n_iter, max(5, n_iter // 4))
+    tried, scores = [], []
+    exhausted = False
+    for i in range(n_iter):
+        if evaluate.out_of_time():
+            exhausted = True
+            break
+        finite = np.isfinite(scores)
+        if i < n_initial or finite.sum() < 2:
+            params = sample_params(space, 1, rng)[0]
+        else:
+            gp = GaussianProcessRegressor(
+                kernel=ConstantKernel(1.0) * Matern(nu=2.5) + WhiteKernel(1e-3),
+                normalize_y=True, n_restarts_optimizer=2, random_state=int(rng.integers(2**31 - 1)),
+            )
+            gp.fit(_encode(space, [p for p, ok in zip(tried, finite) if ok]), np.asarray(scores)[finite])
+            pool = sample_params(space, SMBO_CANDIDATES, rng)
+            mu, sigma = gp.predict(_encode(space, pool), return_std=True)
+            params = pool[int(np.argmax(_expected_improvement(mu, sigma, np.max(np.asarray(scores)[finite]))))]
+        tried.append(params)
+        scores.append(evaluate(params))
+    best = int(np.argmax(scores)) if scores else None
+    if best is None:
+        return sample_params(space, 1, rng)[0], -np.inf, exhausted
+    return tried[best], scores[best], exhausted
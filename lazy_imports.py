@@ -0,0 +1,77 @@
+# Importação preguiçosa de páginas e bibliotecas pesadas, com registro dos tempos de importação
+
+import importlib
+import sys
+import threading
+import time
+import types
+
+import pandas as pd
+
+# módulo -> segundos gastos na primeira importação (feita por este registro)
+IMPORT_TIMINGS: dict = {}
+_LOCK = threading.Lock()
+
+
+def timed_import(module_name: str) -> types.ModuleType:
+    """Importa o módulo (se ainda não carregado) e registra quanto tempo a importação levou."""
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    with _LOCK:
+        module = sys.modules.get(module_name)
+        if module is not None:
+            return module
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        IMPORT_TIMINGS[module_name] = time.perf_counter() - start
+    return module
+
+
+class LazyModule(types.ModuleType):
+    """
+    Substituto de um módulo que só o importa no primeiro acesso a um atributo.
+    Uso: `shap = lazy_module("shap")` no topo do arquivo; `shap.TreeExplainer(...)`
+    dispara a importação real apenas quando (e se) for executado.
+    """
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__["_lazy_target"] = None
+
+    def _load(self) -> types.ModuleType:
+        target = self.__dict__["_lazy_target"]
+        if target is None:
+            target = timed_import(self.__name__)
+            self.__dict__["_lazy_target"] = target
+        return target
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = "carregado" if self.__dict__["_lazy_target"] is not None else "não carregado"
+        return f"<LazyModule {self.__name__} ({state})>"
+
+
+def lazy_module(module_name: str) -> types.ModuleType:
+    """Retorna o módulo, se já estiver carregado, ou um LazyModule que o importará sob demanda."""
+    return sys.modules.get(module_name) or LazyModule(module_name)
+
+
+def lazy_callable(module_name: str, attr: str):
+    """Função que importa `module_name` na primeira chamada e delega para `module_name.attr`."""
+    def call(*args, **kwargs):
+        return getattr(timed_import(module_name), attr)(*args, **kwargs)
+    call.__name__ = attr
+    call.__qualname__ = f"{module_name}.{attr}"
+    return call
+
+
+def import_timings_frame() -> pd.DataFrame:
+    """Tabela com os tempos de importação registrados, do mais lento ao mais rápido."""
+    df = pd.DataFrame(list(IMPORT_TIMINGS.items()), columns=["Módulo", "Segundos"])
+    return df.sort_values("Segundos", ascending=False).reset_index(drop=True)
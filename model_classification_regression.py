@@ -2,27 +2,18 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import tempfile
-import shap
 import matplotlib.pyplot as plt
 import seaborn as sns
 from fpdf import FPDF
 import io
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV, KFold
-from sklearn.preprocessing import LabelEncoder, StandardScaler, OneHotEncoder
-from sklearn.impute import SimpleImputer
-from sklearn.compose import ColumnTransformer
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.pipeline import Pipeline
-from sklearn.linear_model import LinearRegression, LogisticRegression
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-from sklearn.svm import SVC, SVR
-from sklearn.neighbors import KNeighborsClassifier, KNeighborsRegressor
 from sklearn.metrics import (
     accuracy_score, precision_score, recall_score, f1_score,
     confusion_matrix, roc_auc_score, mean_squared_error,
     r2_score, mean_absolute_error
 )
-from xgboost import XGBClassifier, XGBRegressor
-from lightgbm import LGBMClassifier, LGBMRegressor
 import plotly.graph_objs as go
 import plotly.express as px # Added for unsupervised plots
 from sklearn.cluster import KMeans, DBSCAN, AgglomerativeClustering
@@ -30,23 +21,52 @@ from sklearn.mixture import GaussianMixture
 from sklearn.decomposition import PCA
 from sklearn.manifold import TSNE
 
+from lazy_imports import lazy_module
+from telemetry import track
+from dataset_cache import dataset_fingerprint
+from hyperparameter_search import (
+    SEARCH_STRATEGIES, HALVING_RESOURCES, DEFAULT_BUDGET_S, DEFAULT_N_ITER,
+    param_space_for, param_grid_for, supports_tree_resource,
+)
+from training_results import training_key, result_store, get_result, put_result, train_model
+from shap_explanations import (
+    KERNEL_MAX_ROWS, compute_shap, kmeans_background, native_contributions, parallel_kernel_shap,
+    supports_native_contributions, uses_kernel_explainer,
+)
+from model_registry import save_model
+from model_leaderboard import (
+    REGRESSION_MODELS, CLASSIFICATION_MODELS, build_preprocessor, build_estimator, build_native_preprocessor,
+    build_early_stopping_estimator, train_leaderboard,
+)
+from boosting import BOOSTING_MODELS, EARLY_STOPPING_ROUNDS, MAX_ESTIMATORS, VALIDATION_FRACTION
+
+# SHAP importado apenas quando usado (XGBoost/LightGBM são importados por build_estimator)
+shap = lazy_module("shap")
+
+# Pontos desenhados no Summary Plot (beeswarm) quando o dataset completo é explicado
+SHAP_SUMMARY_MAX_ROWS = 5000
+
 
 def reset_machine_learning_state():
     keys_to_reset = [
         "reg_target", "reg_features", "reg_test_size", "reg_random_state",
-        "reg_gridsearch", "reg_enable_shap", "reg_model_select", "train_reg_model_button",
-        "reg_shap_var", "reg_obs_idx", "download_reg_csv", "generate_reg_pdf_button",
+        "reg_gridsearch", "reg_search_strategy", "reg_search_budget", "reg_search_n_iter", "reg_search_resource",
+        "reg_enable_shap", "reg_model_select", "reg_native_boosting", "train_reg_model_button",
+        "reg_shap_var", "reg_obs_idx", "reg_shap_scope", "reg_shap_kernel_rows", "reg_registry_name", "reg_registry_compress", "reg_registry_save", "download_reg_csv", "generate_reg_pdf_button",
 
         "clf_target", "clf_features", "clf_test_size", "clf_random_state",
-        "clf_gridsearch", "clf_enable_shap", "clf_model_select", "train_clf_model_button",
-        "clf_shap_class_select", "clf_shap_var", "clf_obs_idx", "download_clf_csv", "generate_clf_pdf_button",
+        "clf_gridsearch", "clf_search_strategy", "clf_search_budget", "clf_search_n_iter", "clf_search_resource",
+        "clf_enable_shap", "clf_model_select", "clf_native_boosting", "train_clf_model_button",
+        "clf_shap_class_select", "clf_shap_var", "clf_obs_idx", "clf_shap_scope", "clf_shap_kernel_rows", "clf_registry_name", "clf_registry_compress", "clf_registry_save", "download_clf_csv", "generate_clf_pdf_button",
 
+        "ml_training_results", "reg_result_key", "clf_result_key",
+        "reg_leaderboard", "clf_leaderboard", "reg_leaderboard_button", "clf_leaderboard_button",
         "trained_reg_model", "reg_model_metrics", "reg_y_test", "reg_X_test", "reg_X_train", "reg_y_train",
-        "reg_task_type", "reg_model_option", "reg_enable_gridsearch", "reg_best_params_found",
+        "reg_task_type", "reg_model_option", "reg_enable_gridsearch", "reg_best_params_found", "reg_search_label",
         "reg_fig_summary", "reg_fig_waterfall", "reg_fig_scatter_shap",
 
         "trained_clf_model", "clf_model_metrics", "clf_y_test", "clf_X_test", "clf_X_train", "clf_y_train",
-        "clf_task_type", "clf_model_option", "clf_enable_gridsearch", "clf_best_params_found",
+        "clf_task_type", "clf_model_option", "clf_enable_gridsearch", "clf_best_params_found", "clf_search_label",
         "clf_original_target_values", "clf_label_encoder_mapping",
         "clf_fig_summary", "clf_fig_waterfall", "clf_fig_scatter_shap",
     ]
@@ -56,6 +76,19 @@ def reset_machine_learning_state():
             del st.session_state[k]
 
 def compute_shap_values(model, X_sampled, model_type="tree", predict_fn=None, class_index=None):
+    if model_type == "tree" and supports_native_contributions(model):
+        values, base_values = native_contributions(model, X_sampled)
+        if values.ndim == 3:
+            if class_index is None:
+                raise ValueError("Modelo multiclasse requer class_index para SHAP.")
+            values, base_values = values[:, :, class_index], base_values[:, class_index]
+        return shap.Explanation(
+            values=values,
+            base_values=base_values,
+            data=np.asarray(X_sampled),
+            feature_names=X_sampled.columns.tolist() if hasattr(X_sampled, "columns") else None
+        )
+
     if model_type == "tree":
         explainer = shap.TreeExplainer(model)
         shap_output = explainer(X_sampled)
@@ -87,21 +120,14 @@ def compute_shap_values(model, X_sampled, model_type="tree", predict_fn=None, cl
         )
 
     elif model_type == "kernel":
-        explainer = shap.KernelExplainer(predict_fn, shap.utils.sample(X_sampled, 50))
-        shap_values_raw = explainer.shap_values(X_sampled)
-        if isinstance(shap_values_raw, list):
-            if class_index is not None:
-                return shap.Explanation(
-                    values=shap_values_raw[class_index],
-                    base_values=explainer.expected_value[class_index],
-                    data=X_sampled.values,
-                    feature_names=X_sampled.columns.tolist()
-                )
-            else:
+        values, expected_value = parallel_kernel_shap(predict_fn, kmeans_background(X_sampled.values), X_sampled.values)
+        if values.ndim == 3:
+            if class_index is None:
                 raise ValueError("Modelo multiclasse requer class_index para SHAP.")
+            values, expected_value = values[:, :, class_index], expected_value[class_index]
         return shap.Explanation(
-            values=shap_values_raw,
-            base_values=explainer.expected_value,
+            values=values,
+            base_values=expected_value,
             data=X_sampled.values,
             feature_names=X_sampled.columns.tolist()
         )
@@ -128,6 +154,196 @@ def shap_scatter_plot(shap_values, feature_idx, feature_names):
     st.plotly_chart(fig)
     return fig
 
+def _search_settings(prefix: str, model_option: str) -> dict:
+    """Controles da busca de hiperparâmetros: estratégia, orçamento de tempo, candidatos e recurso do halving."""
+    label = st.selectbox(
+        "Estratégia de busca:", list(SEARCH_STRATEGIES), index=2, key=f"{prefix}_search_strategy",
+        help="Successive halving descarta cedo os candidatos ruins avaliando-os com poucos recursos; "
+             "a busca aleatória e a SMBO exploram espaços contínuos com um número fixo de candidatos.",
+    )
+    strategy = SEARCH_STRATEGIES[label]
+    col1, col2 = st.columns(2)
+    budget_s = col1.number_input("Orçamento de tempo (s)", min_value=10, value=DEFAULT_BUDGET_S, step=10, key=f"{prefix}_search_budget")
+    n_iter = DEFAULT_N_ITER
+    if strategy in ("random", "halving_random", "smbo"):
+        n_iter = col2.number_input("Número de candidatos", min_value=5, max_value=500, value=DEFAULT_N_ITER, step=5, key=f"{prefix}_search_n_iter")
+    resource = "n_samples"
+    if strategy.startswith("halving"):
+        options = list(HALVING_RESOURCES) if supports_tree_resource(model_option) else ["Linhas de treino"]
+        resource = HALVING_RESOURCES[st.radio("Recurso do successive halving:", options, horizontal=True, key=f"{prefix}_search_resource")]
+    return {"label": label, "strategy": strategy, "budget_s": int(budget_s), "n_iter": int(n_iter), "resource": resource}
+
+
+def _native_boosting_option(prefix: str, model_option: str) -> bool:
+    """Early stopping e categóricas nativas para XGBoost/LightGBM (pode ser desligado para comparar com o one-hot)."""
+    if model_option not in BOOSTING_MODELS:
+        return False
+    return st.checkbox(
+        "⚡ Early stopping e categóricas nativas", value=True, key=f"{prefix}_native_boosting",
+        help=f"Separa {VALIDATION_FRACTION:.0%} do treino para validação e para de adicionar árvores quando ela não "
+             f"melhora por {EARLY_STOPPING_ROUNDS} rodadas (até {MAX_ESTIMATORS}); as variáveis categóricas entram "
+             "como dtype category, sem one-hot.",
+    )
+
+
+def _search_results_table(cv_results: pd.DataFrame) -> pd.DataFrame:
+    """Tabela dos candidatos avaliados, do melhor para o pior."""
+    if cv_results.empty:
+        return cv_results
+    columns = ["rank_test_score", "mean_test_score", "std_test_score", "mean_fit_time", "iter", "n_resources"]
+    columns += [c for c in cv_results.columns if c.startswith("param_")]
+    return cv_results[columns].sort_values(["rank_test_score", "iter"], ascending=[True, False]).round(4)
+
+
+@st.fragment
+def _shap_detail_fragment(prefix: str, shap_result, output: int):
+    """Scatter e waterfall a partir dos valores guardados; o seletor e o slider reexecutam só este fragmento."""
+    explanation = shap_result.explanation(output)
+    names = shap_result.feature_names
+    shap_var = st.selectbox("Escolha uma variável para Scatter Plot SHAP:", names, key=f"{prefix}_shap_var")
+    fig_scatter_shap = shap_scatter_plot(explanation, names.index(shap_var), names)
+
+    st.markdown("#### 🌊 Waterfall Plot (Explicabilidade para uma Observação Individual)")
+    obs_idx = st.slider("Selecione o índice da observação para Waterfall Plot", 0, shap_result.n_rows - 1, 0, key=f"{prefix}_obs_idx")
+    fig_waterfall = plt.figure(figsize=(10, 6))
+    shap.plots.waterfall(explanation[obs_idx], show=False)
+    plt.tight_layout()
+    st.pyplot(fig_waterfall)
+    plt.close(fig_waterfall)
+
+    st.session_state[f'{prefix}_fig_waterfall'] = fig_waterfall
+    st.session_state[f'{prefix}_fig_scatter_shap'] = fig_scatter_shap
+
+
+def _shap_section(prefix: str, result, model_option: str, random_state: int, label_encoder_mapping: dict | None = None):
+    """
+    Explicabilidade SHAP do modelo treinado. Os valores são calculados uma única vez
+    e guardados no resultado do treino; interações com os gráficos apenas os leem.
+    """
+    st.markdown("### 🧠 Explicabilidade com SHAP")
+    try:
+        step = "regressor" if result.task == "regressao" else "classifier"
+        scope = "teste"
+        if supports_native_contributions(result.model.named_steps[step]):
+            # contribuições nativas do XGBoost/LightGBM: rápidas o bastante para explicar todos os dados
+            choice = st.radio("Observações explicadas:", ["Conjunto de teste", "Dataset completo (treino + teste)"],
+                              horizontal=True, key=f"{prefix}_shap_scope")
+            scope = "completo" if choice.startswith("Dataset") else "teste"
+        kernel_rows = KERNEL_MAX_ROWS
+        if uses_kernel_explainer(result.model.named_steps[step]):
+            st.warning("O modelo selecionado não é um modelo de árvore nem linear. Usando Kernel SHAP, paralelizado entre processos e com o fundo resumido por k-means; o custo cresce com o número de observações explicadas.")
+            # conjuntos de teste com menos de 20 linhas (ex.: 90 linhas e test_size 0.2) também são aceitos
+            n_test = len(result.X_test)
+            kernel_rows = int(st.number_input("Observações explicadas (Kernel SHAP)", min_value=min(20, n_test), max_value=5000,
+                                              value=min(KERNEL_MAX_ROWS, n_test), step=50, key=f"{prefix}_shap_kernel_rows"))
+            scope = f"teste_{kernel_rows}"
+        if scope not in result.shap:
+            X_explain = pd.concat([result.X_train, result.X_test]) if scope == "completo" else result.X_test
+            with st.spinner("Calculando os valores SHAP (uma única vez para este modelo)..."):
+                progress_bar = st.progress(0.0, text="Calculando os valores SHAP...")
+                result.shap[scope] = compute_shap(
+                    result.model, result.X_train, X_explain, step, result.task, random_state, kernel_max_rows=kernel_rows,
+                    progress=lambda frac, msg: progress_bar.progress(frac, text=msg),
+                )
+                progress_bar.empty()
+        shap_result = result.shap[scope]
+        if shap_result.explainer == "kernel" and shap_result.n_rows < len(result.X_test):
+            st.info(f"Amostrando {shap_result.n_rows} observações do conjunto de teste para o Kernel SHAP.")
+        st.caption(f"Valores SHAP de {shap_result.n_rows} observações calculados em {shap_result.compute_time:.1f} s "
+                   f"({'contribuições nativas' if shap_result.explainer == 'nativo' else shap_result.explainer}; "
+                   f"{shap_result.values.nbytes / 1e6:.1f} MB em float32).")
+
+        output = 0
+        if label_encoder_mapping:
+            if len(label_encoder_mapping) == 2:
+                output = 1 if shap_result.n_outputs > 1 else 0
+                st.info(f"Explicando os valores SHAP para a classe: '{label_encoder_mapping.get(1, 1)}'.")
+            elif len(label_encoder_mapping) > 2:
+                class_options = {label_encoder_mapping[i]: i for i in sorted(label_encoder_mapping.keys())}
+                selected_class_name = st.selectbox(
+                    "Selecione a Classe para Explicação SHAP (Multi-classe):",
+                    options=list(class_options.keys()),
+                    index=0,
+                    key=f"{prefix}_shap_class_select"
+                )
+                output = class_options[selected_class_name] if shap_result.n_outputs > 1 else 0
+                st.info(f"Explicando os valores SHAP para a classe: '{selected_class_name}' (codificada como {class_options[selected_class_name]}).")
+            else:
+                st.warning("Não foi possível determinar as classes para explicação SHAP ou há apenas uma classe. A explicação SHAP pode não ser aplicável.")
+
+        st.markdown("#### 🔍 Summary Plot (Importância Global das Features)")
+        summary_explanation, summary_frame = shap_result.explanation(output), shap_result.frame()
+        if shap_result.n_rows > SHAP_SUMMARY_MAX_ROWS:
+            # o beeswarm desenha um ponto por observação: amostra só para o gráfico
+            rows = np.sort(np.random.default_rng(random_state).choice(shap_result.n_rows, SHAP_SUMMARY_MAX_ROWS, replace=False))
+            summary_explanation, summary_frame = summary_explanation[rows], summary_frame.iloc[rows]
+            st.caption(f"Summary Plot desenhado com {SHAP_SUMMARY_MAX_ROWS} das {shap_result.n_rows} observações explicadas.")
+        fig_summary = plt.figure(figsize=(10, 6))
+        shap.summary_plot(summary_explanation, summary_frame, show=False)
+        plt.tight_layout()
+        st.pyplot(fig_summary)
+        plt.close(fig_summary)
+        st.session_state[f'{prefix}_fig_summary'] = fig_summary
+
+        _shap_detail_fragment(prefix, shap_result, output)
+
+    except Exception as e:
+        kind = "Regressão" if result.task == "regressao" else "Classificação"
+        st.error(f"Não foi possível gerar os gráficos SHAP para o modelo de {kind} ({model_option}). Detalhes do erro: {e}")
+        st.info("Isso pode ocorrer devido a incompatibilidades de versão do SHAP, modelos não totalmente suportados, ou problemas de desempenho com grandes volumes de dados. Por favor, tente um modelo diferente ou verifique a versão da biblioteca SHAP.")
+
+
+def _registry_save_section(prefix: str, result, metrics: dict):
+    """
+    Salva o pipeline treinado no registro de modelos, para recarregá-lo sem novo treino.
+    Alvo, features, tipos, classes e versão dos dados vêm do próprio resultado: os
+    widgets podem ter mudado depois do treino enquanto o modelo antigo segue exibido.
+    """
+    target, features = result.target, list(result.X_train.columns)
+    with st.expander("💾 Salvar no registro de modelos"):
+        name = st.text_input("Nome do modelo:", value=f"{result.model_option} · {target}", key=f"{prefix}_registry_name")
+        compress = st.checkbox("Comprimir arquivo (menor em disco, carga mais lenta)", value=False, key=f"{prefix}_registry_compress")
+        if st.button("💾 Salvar no registro", key=f"{prefix}_registry_save"):
+            try:
+                metadata = save_model(
+                    result.model, name, result.task, result.model_option, target, features, metrics, result.fingerprint,
+                    result.fit_time, best_params=result.best_params, search_label=result.search_label,
+                    classes=result.classes, dtypes=result.X_train.dtypes.astype(str).to_dict(), compress=compress,
+                )
+                st.success(f"Modelo salvo ({metadata['tamanho_mb']:.2f} MB). Veja em 🗂️ Registro de Modelos.")
+            except Exception as e:
+                st.error(f"Não foi possível salvar o modelo: {e}")
+
+
+def _leaderboard_section(prefix: str, key: str, X, y, task_type: str, numeric_features, categorical_features, random_state: int):
+    """Modo "treinar todos": todas as famílias em paralelo, numa tabela ordenada pela validação cruzada."""
+    st.markdown("---")
+    st.markdown("### 🏁 Leaderboard (treinar todos os modelos)")
+    st.caption("Ajusta todas as famílias de modelo em paralelo (pool de processos) sobre as mesmas 5 dobras, "
+               "com hiperparâmetros padrão. Os dados pré-processados de cada dobra são compartilhados via memória mapeada.")
+    stored = st.session_state.get(f"{prefix}_leaderboard")
+    if st.button("🏁 Treinar todos os modelos", key=f"{prefix}_leaderboard_button"):
+        if stored is not None and stored[0] == key:
+            st.info("Leaderboard já calculado para estes dados e esta configuração; reaproveitando o resultado.")
+        else:
+            progress_bar = st.progress(0.0, text="Pré-processando as dobras...")
+            with track(f"model_classification_regression.{task_type}.leaderboard", shape=X.shape):
+                board = train_leaderboard(
+                    X, y, task_type, numeric_features, categorical_features, random_state=random_state,
+                    progress=lambda frac, msg: progress_bar.progress(frac, text=msg),
+                )
+            stored = (key, board)
+            st.session_state[f"{prefix}_leaderboard"] = stored
+    if stored is not None:
+        if stored[0] != key:
+            st.caption("⚠️ Leaderboard calculado com outra configuração (alvo, preditoras, seed ou dados).")
+        metric = "R²" if task_type == "regressao" else "acurácia"
+        st.dataframe(
+            stored[1].rename(columns={"CV_Media": f"Média CV ({metric})", "CV_Desvio": "Desvio CV", "Tempo_Ajuste_s": "Tempo de ajuste (s)"}),
+            hide_index=True, use_container_width=True,
+        )
+
+
 def show_machine_learning_page():
     from sklearn.preprocessing import StandardScaler
     if st.button("🔄 Limpar e reiniciar", key="ml_reset_button"):
@@ -156,7 +372,7 @@ def show_machine_learning_page():
     if model_category_selection == "Modelos Preditivos (Regressão)":
         with st.expander("⚙️ Configuração e Treinamento de Modelos Preditivos (Regressão)", expanded=True):
             st.markdown("### 📊 Configuração de Regressão")
-            st.markdown("Configure os parâmetros do modelo de regressão. Use hiperparametrização (GridSearchCV) se desejar encontrar os melhores hiperparâmetros.")
+            st.markdown("Configure os parâmetros do modelo de regressão. Use a busca de hiperparâmetros se desejar encontrar os melhores hiperparâmetros.")
 
             # Filter for numeric columns for regression target and features
             numeric_cols = df.select_dtypes(include=np.number).columns.tolist()
@@ -181,7 +397,7 @@ def show_machine_learning_page():
 
             test_size = st.slider("🔀 Proporção de dados para teste", 0.1, 0.5, 0.2, 0.05, key="reg_test_size")
             random_state = st.number_input("Seed (random_state)", min_value=0, value=42, step=1, key="reg_random_state")
-            enable_gridsearch = st.checkbox("🔍 Ativar GridSearchCV para hiperparametrização", key="reg_gridsearch")
+            enable_gridsearch = st.checkbox("🔍 Ativar busca de hiperparâmetros", key="reg_gridsearch")
 
             enable_shap = st.checkbox("⚙️ Ativar Explicabilidade com SHAP (pode ser computacionalmente intensivo)", value=False, key="reg_enable_shap")
 
@@ -198,114 +414,89 @@ def show_machine_learning_page():
             numeric_features = X.select_dtypes(include=np.number).columns
             categorical_features = X.select_dtypes(include='object').columns
 
-            numeric_transformer = Pipeline(steps=[
-                ('imputer', SimpleImputer(strategy='mean')),
-                ('scaler', StandardScaler())
-            ])
-
-            categorical_transformer = Pipeline(steps=[
-                ('imputer', SimpleImputer(strategy='most_frequent')),
-                ('onehot', OneHotEncoder(handle_unknown='ignore'))
-            ])
+            model_option = st.selectbox("🧠 Escolha o modelo de Regressão:", REGRESSION_MODELS, key="reg_model_select")
+            native_boosting = _native_boosting_option("reg", model_option)
 
-            preprocessor = ColumnTransformer(
-                transformers=[
-                    ('num', numeric_transformer, numeric_features),
-                    ('cat', categorical_transformer, categorical_features)
-                ],
-                remainder='passthrough'
-            )
-
-            model_option = st.selectbox("🧠 Escolha o modelo de Regressão:", [
-                "Regressão Linear", "Random Forest Regressor", "SVM Regressor", "KNN Regressor", "XGBoost Regressor", "LightGBM Regressor"
-            ], key="reg_model_select")
-
-            base_model = None
-            param_grid = {}
-
-            if model_option == "Regressão Linear":
-                base_model = LinearRegression()
-            elif model_option == "Random Forest Regressor":
-                base_model = RandomForestRegressor(random_state=random_state)
-                if enable_gridsearch:
-                    param_grid = {'regressor__n_estimators': [100, 200], 'regressor__max_depth': [None, 10, 20]}
-            elif model_option == "SVM Regressor":
-                base_model = SVR()
-                if enable_gridsearch:
-                    param_grid = {'regressor__C': [0.1, 1, 10], 'regressor__kernel': ['linear', 'rbf']}
-            elif model_option == "KNN Regressor":
-                base_model = KNeighborsRegressor()
-                if enable_gridsearch:
-                    param_grid = {'regressor__n_neighbors': [3, 5, 7]}
-            elif model_option == "XGBoost Regressor":
-                base_model = XGBRegressor(random_state=random_state)
-                if enable_gridsearch:
-                    param_grid = {'regressor__n_estimators': [100, 200], 'regressor__learning_rate': [0.01, 0.1, 0.2]}
-            elif model_option == "LightGBM Regressor":
-                base_model = LGBMRegressor(random_state=random_state)
-                if enable_gridsearch:
-                    param_grid = {'regressor__n_estimators': [100, 200], 'regressor__learning_rate': [0.01, 0.1, 0.2]}
+            if native_boosting:
+                preprocessor = build_native_preprocessor(numeric_features, categorical_features)
+                base_model = build_early_stopping_estimator(model_option, random_state)
+            else:
+                preprocessor = build_preprocessor(numeric_features, categorical_features)
+                base_model = build_estimator(model_option, random_state)
 
             model_pipeline = Pipeline(steps=[('preprocessor', preprocessor),
                                            ('regressor', base_model)])
 
+            search_settings = None
+            if enable_gridsearch and (param_space_for(model_option, "regressor") or param_grid_for(model_option, "regressor")):
+                search_settings = _search_settings("reg", model_option)
+
             X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
 
-            trained_model = None
-            best_params_found = "N/A"
+            result_key = training_key(dataset_fingerprint(df), task_type, {
+                "target": target, "features": features, "test_size": test_size, "random_state": random_state,
+                "model": model_option, "search": search_settings, "native_boosting": native_boosting,
+            })
+            results = result_store(st.session_state)
 
             if st.button(f"Treinar Modelo de {model_option}", key="train_reg_model_button"):
-                with st.spinner(f"Treinando {model_option} e otimizando hiperparâmetros..." if enable_gridsearch else f"Treinando {model_option}..."):
-                    if enable_gridsearch and param_grid:
-                        st.info("Executando GridSearchCV...")
-                        grid = GridSearchCV(model_pipeline, param_grid, cv=5, scoring='r2', n_jobs=-1)
-                        grid.fit(X_train, y_train)
-                        trained_model = grid.best_estimator_
-                        best_params_found = grid.best_params_
-                        st.success(f"Melhor modelo encontrado com GridSearchCV: {trained_model}")
-                        st.write("Melhores Hiperparâmetros:", best_params_found)
+                result = get_result(results, result_key)
+                if result is not None:
+                    st.info(f"{model_option} já foi treinado com estes dados e esta configuração; reaproveitando o resultado (sem novo ajuste).")
+                else:
+                    with st.spinner(f"Treinando {model_option} e otimizando hiperparâmetros..." if search_settings else f"Treinando {model_option}..."):
+                        progress = None
+                        if search_settings:
+                            st.info(f"Executando busca: {search_settings['label']} (orçamento de {search_settings['budget_s']} s)...")
+                            progress_bar = st.progress(0.0, text="Iniciando a busca...")
+                            progress = lambda frac, msg: progress_bar.progress(frac, text=msg)
+                        result = train_model(
+                            model_pipeline, X, y, X_train, X_test, y_train, y_test, task_type, model_option, result_key,
+                            "regressor", random_state=random_state, search_settings=search_settings, progress=progress,
+                            target=target, fingerprint=dataset_fingerprint(df),
+                        )
+                    put_result(results, result)
+                    for note in result.notes:
+                        st.warning(note)
+                    if result.search_summary:
+                        st.success(f"Melhor modelo: R² médio na validação cruzada = {result.search_summary['best_score']:.4f} "
+                                   f"({result.search_summary['n_fits']} ajustes em {result.search_summary['elapsed']:.1f} s)")
+                        st.write("Melhores Hiperparâmetros:", result.best_params)
                     else:
-                        trained_model = model_pipeline
-                        trained_model.fit(X_train, y_train)
                         st.success(f"Modelo {model_option} treinado com sucesso!")
+                    if native_boosting:
+                        st.info(f"Early stopping: {result.model.named_steps['regressor'].n_estimators_} árvores "
+                                f"(de até {MAX_ESTIMATORS}), escolhidas na validação interna.")
 
-                    st.session_state['trained_reg_model'] = trained_model
-                    st.session_state['reg_y_test'] = y_test
-                    st.session_state['reg_X_test'] = X_test
-                    st.session_state['reg_X_train'] = X_train
-                    st.session_state['reg_y_train'] = y_train
-                    st.session_state['reg_task_type'] = task_type
-                    st.session_state['reg_model_option'] = model_option
-                    st.session_state['reg_enable_gridsearch'] = enable_gridsearch
-                    st.session_state['reg_best_params_found'] = best_params_found
-                    st.session_state['reg_original_target_values'] = None
-                    st.session_state['reg_label_encoder_mapping'] = None
-                    # The value of enable_shap is already available from the checkbox widget via its key
-                    # st.session_state['reg_enable_shap'] = enable_shap # REMOVED: This line caused the error
-
-                    y_pred = trained_model.predict(X_test)
-                    current_r2 = r2_score(y_test, y_pred)
-                    current_rmse = np.sqrt(mean_squared_error(y_test, y_pred))
-                    current_mae = mean_absolute_error(y_test, y_pred)
-
-                    cv_scores = cross_val_score(trained_model, X, y, cv=KFold(n_splits=5, shuffle=True, random_state=random_state), scoring='r2', n_jobs=-1)
-                    current_mean_cv_score = np.mean(cv_scores)
-
-                    model_metrics_entry = {
+                    st.session_state['reg_model_metrics'].append({
                         'Modelo': model_option,
-                        'R2_Score': f"{current_r2:.4f}",
-                        'RMSE': f"{current_rmse:.4f}",
-                        'MAE': f"{current_mae:.4f}",
-                        'Media_CV_R2': f"{current_mean_cv_score:.4f}",
-                        'GridSearchCV_Ativado': enable_gridsearch,
-                        'Melhores_Hiperparametros': str(best_params_found),
-                        'SHAP_Ativado': enable_shap # This correctly uses the value from the checkbox
-                    }
-                    st.session_state['reg_model_metrics'].append(model_metrics_entry)
-
-
-            if 'trained_reg_model' in st.session_state and st.session_state['trained_reg_model'] is not None and st.session_state['reg_task_type'] == "regressao":
-                trained_model = st.session_state['trained_reg_model']
+                        'R2_Score': f"{r2_score(result.y_test, result.y_pred_test):.4f}",
+                        'RMSE': f"{np.sqrt(mean_squared_error(result.y_test, result.y_pred_test)):.4f}",
+                        'MAE': f"{mean_absolute_error(result.y_test, result.y_pred_test):.4f}",
+                        'Media_CV_R2': f"{result.cv_mean:.4f}",
+                        'Busca_Hiperparametros': result.search_label,
+                        'Melhores_Hiperparametros': str(result.best_params),
+                        'SHAP_Ativado': enable_shap
+                    })
+
+                st.session_state['reg_result_key'] = result.key
+                st.session_state['trained_reg_model'] = result.model
+                st.session_state['reg_y_test'] = result.y_test
+                st.session_state['reg_X_test'] = result.X_test
+                st.session_state['reg_X_train'] = result.X_train
+                st.session_state['reg_y_train'] = result.y_train
+                st.session_state['reg_task_type'] = task_type
+                st.session_state['reg_model_option'] = model_option
+                st.session_state['reg_enable_gridsearch'] = enable_gridsearch
+                st.session_state['reg_best_params_found'] = result.best_params
+                st.session_state['reg_search_label'] = result.search_label
+                st.session_state['reg_original_target_values'] = None
+                st.session_state['reg_label_encoder_mapping'] = None
+
+
+            reg_result = get_result(results, st.session_state.get('reg_result_key'))
+            if reg_result is not None and st.session_state.get('reg_task_type') == "regressao":
+                trained_model = reg_result.model
                 y_test = st.session_state['reg_y_test']
                 X_test = st.session_state['reg_X_test']
                 X_train = st.session_state['reg_X_train']
@@ -319,7 +510,7 @@ def show_machine_learning_page():
                 current_enable_shap = st.session_state.get('reg_enable_shap', False) # Safely get the value
 
 
-                y_pred = trained_model.predict(X_test)
+                y_pred = reg_result.y_pred_test
 
                 st.markdown("### 📊 Avaliação - Regressão")
                 st.write("**R²:**", r2_score(y_test, y_pred))
@@ -336,103 +527,17 @@ def show_machine_learning_page():
                 st.pyplot(fig_resid)
 
                 st.markdown("### 🔁 Validação Cruzada")
-                cv = KFold(n_splits=5, shuffle=True, random_state=random_state)
-                # Ensure current_X_for_cv and current_y_for_cv are consistent
-                current_X_for_cv = df_model[features]
-                current_y_for_cv = df_model[target]
-                scores = cross_val_score(trained_model, current_X_for_cv, current_y_for_cv, cv=cv, scoring='r2', n_jobs=-1)
+                scores = reg_result.fold_scores
                 st.write("Scores de Validação Cruzada:", scores)
-                st.write("Média dos Scores de Validação Cruzada:", np.mean(scores))
-                st.write("Desvio Padrão dos Scores de Validação Cruzada:", np.std(scores))
+                st.write("Média dos Scores de Validação Cruzada:", reg_result.cv_mean)
+                st.write("Desvio Padrão dos Scores de Validação Cruzada:", reg_result.cv_std)
+                st.write("R² das predições fora da dobra (OOF):", reg_result.oof_score)
+                if reg_result.cv_results_ is not None:
+                    with st.expander("📋 Candidatos avaliados na busca"):
+                        st.dataframe(_search_results_table(reg_result.cv_results_), use_container_width=True)
 
                 if current_enable_shap:
-                    st.markdown("### 🧠 Explicabilidade com SHAP")
-                    try:
-                        X_test_preprocessed = trained_model.named_steps['preprocessor'].transform(X_test)
-                        feature_names_out_raw = trained_model.named_steps['preprocessor'].get_feature_names_out()
-                        cleaned_feature_names = []
-                        for name in feature_names_out_raw:
-                            name = name.replace('num__', '')
-                            if 'cat__' in name:
-                                parts = name.split('__')
-                                if len(parts) > 1:
-                                    feature_and_value = parts[1]
-                                    last_underscore_idx = feature_and_value.rfind('_')
-                                    if last_underscore_idx != -1:
-                                        original_feature_name = feature_and_value[:last_underscore_idx]
-                                        category_value = feature_and_value[last_underscore_idx+1:]
-                                        name = f"{original_feature_name}: {category_value}"
-                                    else:
-                                        name = feature_and_value.replace('cat__', '')
-                                else:
-                                    name = name.replace('cat__', '')
-                            cleaned_feature_names.append(name)
-
-                        X_test_df_shap = pd.DataFrame(X_test_preprocessed, columns=cleaned_feature_names)
-                        model_for_shap = trained_model.named_steps['regressor']
-
-                        if isinstance(model_for_shap, (RandomForestRegressor, XGBRegressor, LGBMRegressor)):
-                            explainer = shap.TreeExplainer(model_for_shap)
-                            shap_values = explainer(X_test_df_shap)
-                        elif isinstance(model_for_shap, LinearRegression):
-                            background_data_for_linear = trained_model.named_steps['preprocessor'].transform(X_train)
-                            if background_data_for_linear.shape[0] > 1000:
-                                background_data_for_linear = shap.utils.sample(background_data_for_linear, 1000, random_state=random_state)
-                            explainer = shap.LinearExplainer(model_for_shap, background_data_for_linear)
-                            shap_values_raw = explainer.shap_values(X_test_df_shap)
-                            shap_values = shap.Explanation(
-                                values=shap_values_raw,
-                                base_values=explainer.expected_value,
-                                data=X_test_df_shap.values,
-                                feature_names=X_test_df_shap.columns.tolist()
-                            )
-                        else:
-                            st.warning("O modelo selecionado não é um modelo de árvore nem linear. Usando `KernelExplainer` do SHAP, que pode ser muito lento para grandes conjuntos de dados. **Recomenda-se reduzir o tamanho do conjunto de dados de teste** para explicabilidade SHAP para este modelo.")
-                            X_test_df_shap_sampled = X_test_df_shap
-                            if X_test_df_shap.shape[0] > 100:
-                                 X_test_df_shap_sampled = shap.utils.sample(X_test_df_shap, 100, random_state=random_state)
-                                 st.info(f"Amostrando {X_test_df_shap_sampled.shape[0]} observações para `KernelExplainer` para melhorar o desempenho.")
-
-                            background_data = trained_model.named_steps['preprocessor'].transform(X_train)
-                            if background_data.shape[0] > 50:
-                                background_data = shap.utils.sample(background_data, 50, random_state=random_state)
-
-                            explainer = shap.KernelExplainer(model_for_shap.predict, background_data)
-                            shap_values_raw = explainer.shap_values(X_test_df_shap_sampled)
-                            shap_values = shap.Explanation(
-                                values=shap_values_raw,
-                                base_values=explainer.expected_value,
-                                data=X_test_df_shap_sampled.values,
-                                feature_names=X_test_df_shap_sampled.columns.tolist()
-                            )
-
-                        if not isinstance(shap_values, shap.Explanation):
-                            st.error("Erro interno: `shap_values` não é um objeto `shap.Explanation` após a inicialização. Isso pode causar problemas de plotagem.")
-                        else:
-                            st.markdown("#### 🔍 Summary Plot (Importância Global das Features)")
-                            fig_summary = plt.figure(figsize=(10, 6))
-                            shap.summary_plot(shap_values, X_test_df_shap, show=False)
-                            plt.tight_layout()
-                            st.pyplot(fig_summary)
-
-                            shap_var = st.selectbox("Escolha uma variável para Scatter Plot SHAP:", list(X_test_df_shap.columns), key="reg_shap_var")
-                            feature_idx = list(X_test_df_shap.columns).index(shap_var)
-                            fig_scatter_shap = shap_scatter_plot(shap_values, feature_idx, list(X_test_df_shap.columns))
-
-                            st.markdown("#### 🌊 Waterfall Plot (Explicabilidade para uma Observação Individual)")
-                            obs_idx = st.slider("Selecione o índice da observação para Waterfall Plot", 0, len(X_test_df_shap) - 1, 0, key="reg_obs_idx")
-                            fig_waterfall = plt.figure(figsize=(10, 6))
-                            shap.plots.waterfall(shap_values[obs_idx], show=False)
-                            plt.tight_layout()
-                            st.pyplot(fig_waterfall)
-
-                            st.session_state['reg_fig_summary'] = fig_summary
-                            st.session_state['reg_fig_waterfall'] = fig_waterfall
-                            st.session_state['reg_fig_scatter_shap'] = fig_scatter_shap
-
-                    except Exception as e:
-                        st.error(f"Não foi possível gerar os gráficos SHAP para o modelo de Regressão ({model_option}). Detalhes do erro: {e}")
-                        st.info("Isso pode ocorrer devido a incompatibilidades de versão do SHAP, modelos não totalmente suportados, ou problemas de desempenho com grandes volumes de dados. Por favor, tente um modelo diferente ou verifique a versão da biblioteca SHAP.")
+                    _shap_section("reg", reg_result, model_option, random_state)
                 else:
                     st.info("A geração de gráficos SHAP está desativada. Ative o checkbox 'Ativar Explicabilidade com SHAP' para visualizá-los.")
                     # Clear SHAP related figures from session state if SHAP is disabled
@@ -447,7 +552,7 @@ def show_machine_learning_page():
                     'Score_Medio_CV': [np.mean(scores)],
                     'Target': [target],
                     'Features': [", ".join(features)],
-                    'GridSearchCV_Ativado': [enable_gridsearch],
+                    'Busca_Hiperparametros': [st.session_state.get('reg_search_label', "Não")],
                     'Melhores_Hiperparametros': [str(best_params_found)],
                     'R2_Score': [r2_score(y_test, y_pred)],
                     'RMSE': [np.sqrt(mean_squared_error(y_test, y_pred))],
@@ -456,6 +561,10 @@ def show_machine_learning_page():
                 result_df = pd.DataFrame(metrics)
                 csv = result_df.to_csv(index=False).encode('utf-8')
                 st.download_button("📥 Baixar CSV de Resultados", data=csv, file_name="resultados_regressao.csv", mime="text/csv", key="download_reg_csv")
+                _registry_save_section("reg", reg_result, {
+                    "R2": r2_score(y_test, y_pred), "RMSE": np.sqrt(mean_squared_error(y_test, y_pred)),
+                    "MAE": mean_absolute_error(y_test, y_pred), "CV_Media": reg_result.cv_mean, "CV_Desvio": reg_result.cv_std,
+                })
 
                 if st.button("📄 Gerar PDF do Relatório de Regressão", key="generate_reg_pdf_button"):
                     pdf = FPDF()
@@ -512,10 +621,9 @@ def show_machine_learning_page():
                         pdf.set_font("Arial", size=12)
                         pdf.multi_cell(0, 7, txt="A geração de gráficos SHAP estava desativada para este modelo e, portanto, não foram incluídos neste relatório PDF.")
 
-                    pdf.output("relatorio_regressao.pdf")
-                    with open("relatorio_regressao.pdf", "rb") as f:
-                        pdf_bytes = f.read()
-                        st.download_button("📄 Baixar Relatório PDF de Regressão", pdf_bytes, file_name="relatorio_regressao.pdf", mime="application/pdf", key="download_reg_pdf")
+                    # Gerado em memória: nada é gravado no diretório de trabalho compartilhado
+                    pdf_bytes = pdf.output(dest='S').encode('latin-1')
+                    st.download_button("📄 Baixar Relatório PDF de Regressão", pdf_bytes, file_name="relatorio_regressao.pdf", mime="application/pdf", key="download_reg_pdf")
 
                 st.markdown("---")
                 st.markdown("### 📊 Comparação de Modelos de Regressão")
@@ -525,11 +633,16 @@ def show_machine_learning_page():
                 else:
                     st.info("Nenhum modelo de regressão foi treinado ainda para comparação.")
 
+            _leaderboard_section(
+                "reg", training_key(dataset_fingerprint(df), "leaderboard", {"target": target, "features": features, "random_state": random_state}),
+                X, y, task_type, numeric_features, categorical_features, random_state,
+            )
+
 
     elif model_category_selection == "Modelos de Classificação":
         with st.expander("⚙️ Configuração e Treinamento de Modelos de Classificação", expanded=True):
             st.markdown("### 📊 Configuração de Classificação")
-            st.markdown("Configure os parâmetros do modelo de classificação. Use hiperparametrização (GridSearchCV) se desejar encontrar os melhores hiperparâmetros.")
+            st.markdown("Configure os parâmetros do modelo de classificação. Use a busca de hiperparâmetros se desejar encontrar os melhores hiperparâmetros.")
 
             # For classification target, allow all column types (binary/categorical are handled by LabelEncoder)
             clf_target_options = ["Selecione a variável alvo..."] + df.columns.tolist()
@@ -548,7 +661,7 @@ def show_machine_learning_page():
 
             test_size = st.slider("🔀 Proporção de dados para teste", 0.1, 0.5, 0.2, 0.05, key="clf_test_size")
             random_state = st.number_input("Seed (random_state)", min_value=0, value=42, step=1, key="clf_random_state")
-            enable_gridsearch = st.checkbox("🔍 Ativar GridSearchCV para hiperparametrização", key="clf_gridsearch")
+            enable_gridsearch = st.checkbox("🔍 Ativar busca de hiperparâmetros", key="clf_gridsearch")
 
             enable_shap = st.checkbox("⚙️ Ativar Explicabilidade com SHAP (pode ser computacionalmente intensivo)", value=False, key="clf_enable_shap")
 
@@ -576,120 +689,90 @@ def show_machine_learning_page():
             numeric_features = X.select_dtypes(include=np.number).columns
             categorical_features = X.select_dtypes(include='object').columns
 
-            numeric_transformer = Pipeline(steps=[
-                ('imputer', SimpleImputer(strategy='mean')),
-                ('scaler', StandardScaler())
-            ])
+            model_option = st.selectbox("🧠 Escolha o modelo de Classificação:", CLASSIFICATION_MODELS, key="clf_model_select")
+            native_boosting = _native_boosting_option("clf", model_option)
 
-            categorical_transformer = Pipeline(steps=[
-                ('imputer', SimpleImputer(strategy='most_frequent')),
-                ('onehot', OneHotEncoder(handle_unknown='ignore'))
-            ])
-
-            preprocessor = ColumnTransformer(
-                transformers=[
-                    ('num', numeric_transformer, numeric_features),
-                    ('cat', categorical_transformer, categorical_features)
-                ],
-                remainder='passthrough'
-            )
-
-            model_option = st.selectbox("🧠 Escolha o modelo de Classificação:", [
-                "Regressão Logística", "Random Forest Classifier", "SVM Classifier", "KNN Classifier", "XGBoost Classifier", "LightGBM Classifier"
-            ], key="clf_model_select")
-
-            base_model = None
-            param_grid = {}
-
-            if model_option == "Regressão Logística":
-                base_model = LogisticRegression(max_iter=1000, random_state=random_state)
-                if enable_gridsearch:
-                    param_grid = {'classifier__C': [0.01, 0.1, 1, 10]}
-            elif model_option == "Random Forest Classifier":
-                base_model = RandomForestClassifier(random_state=random_state)
-                if enable_gridsearch:
-                    param_grid = {'classifier__n_estimators': [100, 200], 'classifier__max_depth': [None, 10, 20]}
-            elif model_option == "SVM Classifier":
-                base_model = SVC(probability=True, random_state=random_state)
-                if enable_gridsearch:
-                    param_grid = {'classifier__C': [0.1, 1, 10], 'classifier__kernel': ['linear', 'rbf']}
-            elif model_option == "KNN Classifier":
-                base_model = KNeighborsClassifier()
-                if enable_gridsearch:
-                    param_grid = {'classifier__n_neighbors': [3, 5, 7]}
-            elif model_option == "XGBoost Classifier":
-                base_model = XGBClassifier(eval_metric='logloss', random_state=random_state)
-                if enable_gridsearch:
-                    param_grid = {'classifier__n_estimators': [100, 200], 'classifier__learning_rate': [0.01, 0.1, 0.2]}
-            elif model_option == "LightGBM Classifier":
-                base_model = LGBMClassifier(random_state=random_state)
-                if enable_gridsearch:
-                    param_grid = {'classifier__n_estimators': [100, 200], 'classifier__learning_rate': [0.01, 0.1, 0.2]}
+            if native_boosting:
+                preprocessor = build_native_preprocessor(numeric_features, categorical_features)
+                base_model = build_early_stopping_estimator(model_option, random_state)
+            else:
+                preprocessor = build_preprocessor(numeric_features, categorical_features)
+                base_model = build_estimator(model_option, random_state)
 
             model_pipeline = Pipeline(steps=[('preprocessor', preprocessor),
                                            ('classifier', base_model)])
 
+            search_settings = None
+            if enable_gridsearch and (param_space_for(model_option, "classifier") or param_grid_for(model_option, "classifier")):
+                search_settings = _search_settings("clf", model_option)
+
             X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
 
-            trained_model = None
-            best_params_found = "N/A"
+            result_key = training_key(dataset_fingerprint(df), task_type, {
+                "target": target, "features": features, "test_size": test_size, "random_state": random_state,
+                "model": model_option, "search": search_settings, "native_boosting": native_boosting,
+            })
+            results = result_store(st.session_state)
 
             if st.button(f"Treinar Modelo de {model_option}", key="train_clf_model_button"):
-                with st.spinner(f"Treinando {model_option} e otimizando hiperparâmetros..." if enable_gridsearch else f"Treinando {model_option}..."):
-                    if enable_gridsearch and param_grid:
-                        st.info("Executando GridSearchCV...")
-                        grid = GridSearchCV(model_pipeline, param_grid, cv=5, scoring='accuracy', n_jobs=-1)
-                        grid.fit(X_train, y_train)
-                        trained_model = grid.best_estimator_
-                        best_params_found = grid.best_params_
-                        st.success(f"Melhor modelo encontrado com GridSearchCV: {trained_model}")
-                        st.write("Melhores Hiperparâmetros:", best_params_found)
+                result = get_result(results, result_key)
+                if result is not None:
+                    st.info(f"{model_option} já foi treinado com estes dados e esta configuração; reaproveitando o resultado (sem novo ajuste).")
+                else:
+                    with st.spinner(f"Treinando {model_option} e otimizando hiperparâmetros..." if search_settings else f"Treinando {model_option}..."):
+                        progress = None
+                        if search_settings:
+                            st.info(f"Executando busca: {search_settings['label']} (orçamento de {search_settings['budget_s']} s)...")
+                            progress_bar = st.progress(0.0, text="Iniciando a busca...")
+                            progress = lambda frac, msg: progress_bar.progress(frac, text=msg)
+                        result = train_model(
+                            model_pipeline, X, y, X_train, X_test, y_train, y_test, task_type, model_option, result_key,
+                            "classifier", random_state=random_state, search_settings=search_settings, progress=progress,
+                            target=target, classes=label_encoder_mapping, fingerprint=dataset_fingerprint(df),
+                        )
+                    put_result(results, result)
+                    for note in result.notes:
+                        st.warning(note)
+                    if result.search_summary:
+                        st.success(f"Melhor modelo: acurácia média na validação cruzada = {result.search_summary['best_score']:.4f} "
+                                   f"({result.search_summary['n_fits']} ajustes em {result.search_summary['elapsed']:.1f} s)")
+                        st.write("Melhores Hiperparâmetros:", result.best_params)
                     else:
-                        trained_model = model_pipeline
-                        trained_model.fit(X_train, y_train)
                         st.success(f"Modelo {model_option} treinado com sucesso!")
+                    if native_boosting:
+                        st.info(f"Early stopping: {result.model.named_steps['classifier'].n_estimators_} árvores "
+                                f"(de até {MAX_ESTIMATORS}), escolhidas na validação interna.")
 
-                    st.session_state['trained_clf_model'] = trained_model
-                    st.session_state['clf_y_test'] = y_test
-                    st.session_state['clf_X_test'] = X_test
-                    st.session_state['clf_X_train'] = X_train
-                    st.session_state['clf_y_train'] = y_train
-                    st.session_state['clf_task_type'] = task_type
-                    st.session_state['clf_model_option'] = model_option
-                    st.session_state['clf_enable_gridsearch'] = enable_gridsearch
-                    st.session_state['clf_best_params_found'] = best_params_found
-                    st.session_state['clf_original_target_values'] = original_target_values
-                    st.session_state['clf_label_encoder_mapping'] = label_encoder_mapping
-                    # The value of enable_shap is already available from the checkbox widget via its key
-                    # st.session_state['clf_enable_shap'] = enable_shap # REMOVED: This line caused the error
-
-                    y_pred = trained_model.predict(X_test)
-                    current_accuracy = accuracy_score(y_test, y_pred)
-                    current_precision = precision_score(y_test, y_pred, average='weighted', zero_division=0)
-                    current_recall = recall_score(y_test, y_pred, average='weighted', zero_division=0)
-                    current_f1 = f1_score(y_test, y_pred, average='weighted', zero_division=0)
-
-                    current_X_for_cv = df_model[features]
-                    current_y_for_cv = y
-                    cv_scores = cross_val_score(trained_model, current_X_for_cv, current_y_for_cv, cv=KFold(n_splits=5, shuffle=True, random_state=random_state), scoring='accuracy', n_jobs=-1)
-                    current_mean_cv_score = np.mean(cv_scores)
-
-                    model_metrics_entry = {
+                    st.session_state['clf_model_metrics'].append({
                         'Modelo': model_option,
-                        'Acuracia': f"{current_accuracy:.4f}",
-                        'Precision': f"{current_precision:.4f}",
-                        'Recall': f"{current_recall:.4f}",
-                        'F1_Score': f"{current_f1:.4f}",
-                        'Media_CV_Acuracia': f"{current_mean_cv_score:.4f}",
-                        'GridSearchCV_Ativado': enable_gridsearch,
-                        'Melhores_Hiperparametros': str(best_params_found),
-                        'SHAP_Ativado': enable_shap # This correctly uses the value from the checkbox
-                    }
-                    st.session_state['clf_model_metrics'].append(model_metrics_entry)
-
-
-            if 'trained_clf_model' in st.session_state and st.session_state['trained_clf_model'] is not None and st.session_state['clf_task_type'] == "classificacao":
-                trained_model = st.session_state['trained_clf_model']
+                        'Acuracia': f"{accuracy_score(result.y_test, result.y_pred_test):.4f}",
+                        'Precision': f"{precision_score(result.y_test, result.y_pred_test, average='weighted', zero_division=0):.4f}",
+                        'Recall': f"{recall_score(result.y_test, result.y_pred_test, average='weighted', zero_division=0):.4f}",
+                        'F1_Score': f"{f1_score(result.y_test, result.y_pred_test, average='weighted', zero_division=0):.4f}",
+                        'Media_CV_Acuracia': f"{result.cv_mean:.4f}",
+                        'Busca_Hiperparametros': result.search_label,
+                        'Melhores_Hiperparametros': str(result.best_params),
+                        'SHAP_Ativado': enable_shap
+                    })
+
+                st.session_state['clf_result_key'] = result.key
+                st.session_state['trained_clf_model'] = result.model
+                st.session_state['clf_y_test'] = result.y_test
+                st.session_state['clf_X_test'] = result.X_test
+                st.session_state['clf_X_train'] = result.X_train
+                st.session_state['clf_y_train'] = result.y_train
+                st.session_state['clf_task_type'] = task_type
+                st.session_state['clf_model_option'] = model_option
+                st.session_state['clf_enable_gridsearch'] = enable_gridsearch
+                st.session_state['clf_best_params_found'] = result.best_params
+                st.session_state['clf_search_label'] = result.search_label
+                st.session_state['clf_original_target_values'] = original_target_values
+                st.session_state['clf_label_encoder_mapping'] = label_encoder_mapping
+
+
+            clf_result = get_result(results, st.session_state.get('clf_result_key'))
+            if clf_result is not None and st.session_state.get('clf_task_type') == "classificacao":
+                trained_model = clf_result.model
                 y_test = st.session_state['clf_y_test']
                 X_test = st.session_state['clf_X_test']
                 X_train = st.session_state['clf_X_train']
@@ -705,7 +788,7 @@ def show_machine_learning_page():
                 current_enable_shap = st.session_state.get('clf_enable_shap', False) # Safely get the value
 
 
-                y_pred = trained_model.predict(X_test)
+                y_pred = clf_result.y_pred_test
 
                 st.markdown("### 📊 Avaliação - Classificação")
                 st.write("**Acurácia:**", accuracy_score(y_test, y_pred))
@@ -724,166 +807,17 @@ def show_machine_learning_page():
                 st.pyplot(fig_cm)
 
                 st.markdown("### 🔁 Validação Cruzada")
-                cv = KFold(n_splits=5, shuffle=True, random_state=random_state)
-                current_X_for_cv = df_model[features]
-                current_y_for_cv = y
-                scores = cross_val_score(trained_model, current_X_for_cv, current_y_for_cv, cv=cv, scoring='accuracy', n_jobs=-1)
+                scores = clf_result.fold_scores
                 st.write("Scores de Validação Cruzada:", scores)
-                st.write("Média dos Scores de Validação Cruzada:", np.mean(scores))
-                st.write("Desvio Padrão dos Scores de Validação Cruzada:", np.std(scores))
+                st.write("Média dos Scores de Validação Cruzada:", clf_result.cv_mean)
+                st.write("Desvio Padrão dos Scores de Validação Cruzada:", clf_result.cv_std)
+                st.write("Acurácia das predições fora da dobra (OOF):", clf_result.oof_score)
+                if clf_result.cv_results_ is not None:
+                    with st.expander("📋 Candidatos avaliados na busca"):
+                        st.dataframe(_search_results_table(clf_result.cv_results_), use_container_width=True)
 
                 if current_enable_shap:
-                    st.markdown("### 🧠 Explicabilidade com SHAP")
-                    try:
-                        X_test_preprocessed = trained_model.named_steps['preprocessor'].transform(X_test)
-                        feature_names_out_raw = trained_model.named_steps['preprocessor'].get_feature_names_out()
-                        cleaned_feature_names = []
-                        for name in feature_names_out_raw:
-                            name = name.replace('num__', '')
-                            if 'cat__' in name:
-                                parts = name.split('__')
-                                if len(parts) > 1:
-                                    feature_and_value = parts[1]
-                                    last_underscore_idx = feature_and_value.rfind('_')
-                                    if last_underscore_idx != -1:
-                                        original_feature_name = feature_and_value[:last_underscore_idx]
-                                        category_value = feature_and_value[last_underscore_idx+1:]
-                                        name = f"{original_feature_name}: {category_value}"
-                                    else:
-                                        name = feature_and_value.replace('cat__', '')
-                                else:
-                                    name = name.replace('cat__', '')
-                            cleaned_feature_names.append(name)
-
-                        X_test_df_shap = pd.DataFrame(X_test_preprocessed, columns=cleaned_feature_names)
-                        model_for_shap = trained_model.named_steps['classifier']
-
-                        num_classes_shap = len(original_target_values)
-                        class_to_explain_idx = 0
-
-                        if num_classes_shap == 2:
-                            class_to_explain_idx = 1
-                            st.info(f"Explicando os valores SHAP para a classe: '{label_encoder_mapping.get(class_to_explain_idx, class_to_explain_idx)}'.")
-                        elif num_classes_shap > 2:
-                            class_options = {label_encoder_mapping[i]: i for i in sorted(label_encoder_mapping.keys())}
-                            selected_class_name = st.selectbox(
-                                "Selecione a Classe para Explicação SHAP (Multi-classe):",
-                                options=list(class_options.keys()),
-                                index=0,
-                                key="clf_shap_class_select"
-                            )
-                            class_to_explain_idx = class_options[selected_class_name]
-                            st.info(f"Explicando os valores SHAP para a classe: '{selected_class_name}' (codificada como {class_to_explain_idx}).")
-                        else:
-                            st.warning("Não foi possível determinar as classes para explicação SHAP ou há apenas uma classe. A explicação SHAP pode não ser aplicável.")
-                            class_to_explain_idx = 0
-
-                        shap_values = None
-
-                        if isinstance(model_for_shap, (RandomForestClassifier, XGBClassifier, LGBMClassifier)):
-                            explainer = shap.TreeExplainer(model_for_shap)
-                            shap_output = explainer(X_test_df_shap)
-                            if isinstance(shap_output, list):
-                                if len(shap_output) > class_to_explain_idx:
-                                    shap_values = shap_output[class_to_explain_idx]
-                                else:
-                                    st.error(f"Não foi possível explicar a classe {class_to_explain_idx} para o modelo de árvore. Verifique a seleção da classe.")
-                                    return
-                            else:
-                                shap_values = shap_output
-                        elif isinstance(model_for_shap, LogisticRegression):
-                            background_data_for_linear = trained_model.named_steps['preprocessor'].transform(X_train)
-                            if background_data_for_linear.shape[0] > 1000:
-                                background_data_for_linear = shap.utils.sample(background_data_for_linear, 1000, random_state=random_state)
-
-                            explainer = shap.LinearExplainer(model_for_shap, background_data_for_linear)
-                            shap_values_raw = explainer.shap_values(X_test_df_shap)
-                            if isinstance(shap_values_raw, list):
-                                if len(shap_values_raw) > class_to_explain_idx:
-                                    shap_values = shap.Explanation(
-                                        values=shap_values_raw[class_to_explain_idx],
-                                        base_values=explainer.expected_value[class_to_explain_idx],
-                                        data=X_test_df_shap.values,
-                                        feature_names=X_test_df_shap.columns.tolist()
-                                    )
-                                else:
-                                    st.error(f"Não foi possível explicar a classe {class_to_explain_idx} para o modelo linear. Verifique a seleção da classe.")
-                                    return
-                            else:
-                                shap_values = shap.Explanation(
-                                    values=shap_values_raw,
-                                    base_values=explainer.expected_value,
-                                    data=X_test_df_shap.values,
-                                    feature_names=X_test_df_shap.columns.tolist()
-                                )
-                        else:
-                            st.warning("O modelo selecionado não é um modelo de árvore nem linear. Usando `KernelExplainer` do SHAP, que pode ser muito lento para grandes conjuntos de dados. **Recomenda-se reduzir o tamanho do conjunto de dados de teste** para explicabilidade SHAP para este modelo.")
-                            X_test_df_shap_sampled = X_test_df_shap
-                            if X_test_df_shap.shape[0] > 100:
-                                 X_test_df_shap_sampled = shap.utils.sample(X_test_df_shap, 100, random_state=random_state)
-                                 st.info(f"Amostrando {X_test_df_shap_sampled.shape[0]} observações para `KernelExplainer` para melhorar o desempenho.")
-
-                            background_data = trained_model.named_steps['preprocessor'].transform(X_train)
-                            if background_data.shape[0] > 50:
-                                background_data = shap.utils.sample(background_data, 50, random_state=random_state)
-
-                            explainer = shap.KernelExplainer(model_for_shap.predict_proba, background_data)
-                            shap_values_raw = explainer.shap_values(X_test_df_shap_sampled)
-
-                            if isinstance(shap_values_raw, list):
-                                if len(shap_values_raw) > class_to_explain_idx:
-                                    shap_values = shap.Explanation(
-                                        values=shap_values_raw[class_to_explain_idx],
-                                        base_values=explainer.expected_value[class_to_explain_idx],
-                                        data=X_test_df_shap_sampled.values,
-                                        feature_names=X_test_df_shap_sampled.columns.tolist()
-                                    )
-                                else:
-                                    st.error(f"Não foi possível explicar a classe {class_to_explain_idx} para o KernelExplainer. Verifique a seleção da classe.")
-                                    return
-                            else:
-                                shap_values = shap.Explanation(
-                                    values=shap_values_raw,
-                                    base_values=explainer.expected_value,
-                                    data=X_test_df_shap_sampled.values,
-                                    feature_names=X_test_df_shap_sampled.columns.tolist()
-                                )
-
-                        if not isinstance(shap_values, shap.Explanation):
-                            st.error("Erro interno: `shap_values` não é um objeto `shap.Explanation` válido após a inicialização. Isso pode causar problemas de plotagem.")
-                            return
-                        else:
-                            st.markdown("#### 🔍 Summary Plot (Importância Global das Features)")
-                            fig_summary = plt.figure(figsize=(10, 6))
-                            shap.summary_plot(shap_values, X_test_df_shap, show=False)
-                            plt.tight_layout()
-                            st.pyplot(fig_summary)
-
-                            shap_var = st.selectbox("Escolha uma variável para Scatter Plot SHAP:", list(X_test_df_shap.columns), key="clf_shap_var")
-                            feature_idx = list(X_test_df_shap.columns).index(shap_var)
-                            fig_scatter_shap = shap_scatter_plot(shap_values, feature_idx, list(X_test_df_shap.columns))
-
-                            st.markdown("#### 🌊 Waterfall Plot (Explicabilidade para uma Observação Individual)")
-                            obs_idx = st.slider("Selecione o índice da observação para Waterfall Plot", 0, len(X_test_df_shap) - 1, 0, key="clf_obs_idx")
-                            fig_waterfall = plt.figure(figsize=(10, 6))
-
-                            single_explanation_for_waterfall = shap.Explanation(
-                                values=shap_values.values[obs_idx],
-                                base_values=shap_values.base_values if np.isscalar(shap_values.base_values) else shap_values.base_values[obs_idx],
-                                data=X_test_df_shap.iloc[obs_idx].values,
-                                feature_names=X_test_df_shap.columns.tolist()
-                            )
-                            shap.plots.waterfall(single_explanation_for_waterfall, show=False)
-                            plt.tight_layout()
-                            st.pyplot(fig_waterfall)
-
-                            st.session_state['clf_fig_summary'] = fig_summary
-                            st.session_state['clf_fig_waterfall'] = fig_waterfall
-                            st.session_state['clf_fig_scatter_shap'] = fig_scatter_shap
-
-                    except Exception as e:
-                        st.error(f"Não foi possível gerar os gráficos SHAP para o modelo de Classificação ({model_option}). Detalhes do erro: {e}")
-                        st.info("Isso pode ocorrer devido a incompatibilidades de versão do SHAP, modelos não totalmente suportados, ou problemas de desempenho com grandes volumes de dados. Por favor, tente um modelo diferente ou verifique a versão da biblioteca SHAP.")
+                    _shap_section("clf", clf_result, model_option, random_state, label_encoder_mapping)
                 else:
                     st.info("A geração de gráficos SHAP está desativada. Ative o checkbox 'Ativar Explicabilidade com SHAP' para visualizá-los.")
                     # Clear SHAP related figures from session state if SHAP is disabled
@@ -899,7 +833,7 @@ def show_machine_learning_page():
                     'Score_Medio_CV': [np.mean(scores)],
                     'Target': [target],
                     'Features': [", ".join(features)],
-                    'GridSearchCV_Ativado': [enable_gridsearch],
+                    'Busca_Hiperparametros': [st.session_state.get('clf_search_label', "Não")],
                     'Melhores_Hiperparametros': [str(best_params_found)],
                     'Acuracia': [accuracy_score(y_test, y_pred)],
                     'Precision': [precision_score(y_test, y_pred, average='weighted', zero_division=0)],
@@ -909,6 +843,13 @@ def show_machine_learning_page():
                 result_df = pd.DataFrame(metrics)
                 csv = result_df.to_csv(index=False).encode('utf-8')
                 st.download_button("📥 Baixar CSV de Resultados", data=csv, file_name="resultados_classificacao.csv", mime="text/csv", key="download_clf_csv")
+                _registry_save_section("clf", clf_result, {
+                    "Acuracia": accuracy_score(y_test, y_pred),
+                    "Precision": precision_score(y_test, y_pred, average='weighted', zero_division=0),
+                    "Recall": recall_score(y_test, y_pred, average='weighted', zero_division=0),
+                    "F1": f1_score(y_test, y_pred, average='weighted', zero_division=0),
+                    "CV_Media": clf_result.cv_mean, "CV_Desvio": clf_result.cv_std,
+                })
 
                 if st.button("📄 Gerar PDF do Relatório de Classificação", key="generate_clf_pdf_button"):
                     pdf = FPDF()
@@ -966,10 +907,9 @@ def show_machine_learning_page():
                         pdf.set_font("Arial", size=12)
                         pdf.multi_cell(0, 7, txt="A geração de gráficos SHAP estava desativada para este modelo e, portanto, não foram incluídos neste relatório PDF.")
 
-                    pdf.output("relatorio_classificacao.pdf")
-                    with open("relatorio_classificacao.pdf", "rb") as f:
-                        pdf_bytes = f.read()
-                        st.download_button("📄 Baixar Relatório PDF de Classificação", pdf_bytes, file_name="relatorio_classificacao.pdf", mime="application/pdf", key="download_clf_pdf")
+                    # Gerado em memória: nada é gravado no diretório de trabalho compartilhado
+                    pdf_bytes = pdf.output(dest='S').encode('latin-1')
+                    st.download_button("📄 Baixar Relatório PDF de Classificação", pdf_bytes, file_name="relatorio_classificacao.pdf", mime="application/pdf", key="download_clf_pdf")
 
                 st.markdown("---")
                 st.markdown("### 📊 Comparação de Modelos de Classificação")
@@ -979,6 +919,11 @@ def show_machine_learning_page():
                 else:
                     st.info("Nenhum modelo de classificação foi treinado ainda para comparação.")
 
+            _leaderboard_section(
+                "clf", training_key(dataset_fingerprint(df), "leaderboard", {"target": target, "features": features, "random_state": random_state}),
+                X, y, task_type, numeric_features, categorical_features, random_state,
+            )
+
 
     elif model_category_selection == "Modelos Não-Supervisionados":
         with st.expander("⚙️ Clustering e Redução de Dimensionalidade", expanded=True):
@@ -9,13 +9,18 @@ from sklearn.model_selection import KFold, train_test_split, StratifiedKFold
 from sklearn.metrics import r2_score, mean_absolute_error
 from sklearn.cluster import KMeans, AgglomerativeClustering
 from scipy.stats import f_oneway, kruskal
+from permutation_tests import permutation_test, N_PERMUTATIONS
+from dataset_cache import cached_computation
+from artifact_store import content_hash
+from telemetry import instrumented
 import plotly.express as px
 import plotly.graph_objects as go
 
 # Importa a função para o teste post-hoc de Tukey
 from statsmodels.stats.multicomp import pairwise_tukeyhsd
 
-import shap
+from lazy_imports import lazy_module
+shap = lazy_module("shap")  # importado apenas quando as explicações SHAP são calculadas
 import matplotlib.pyplot as plt
 import seaborn as sns
 from sklearn.ensemble import RandomForestClassifier
@@ -24,6 +29,30 @@ from sklearn.metrics import confusion_matrix, classification_report, roc_curve,
 from io import StringIO
 # shap.initjs()  # Comentado para compatibilidade com deploy Streamlit
 
+def l4_dimension_score(df_temp: pd.DataFrame, method: str) -> pd.Series:
+    """
+    Escore de uma dimensão L4 a partir das variáveis selecionadas: média por linha
+    ("Média") ou 1º componente principal das linhas completas ("PCA (1º componente)").
+    """
+    if method == "Média":
+        return df_temp.mean(axis=1)
+    df_pca = df_temp.dropna()
+    if df_pca.shape[1] == 1:  # PCA com 1 componente em 1 variável é a própria variável
+        return df_pca.iloc[:, 0]
+    scores = PCA(n_components=1).fit_transform(df_pca)
+    return pd.Series(scores.flatten(), index=df_pca.index)
+
+
+@cached_computation
+@instrumented()
+def _l4_permutation_test(_values, _labels, statistic, n_permutations, fingerprint=None, columns=None):
+    """
+    Valor-p por permutação de uma dimensão L4 (`columns` identifica dimensão e agrupamento).
+    O df_l4 é recopiado a cada rerun, então a impressão digital vem do conteúdo das colunas.
+    """
+    return permutation_test(_values, _labels, statistic=statistic, n_permutations=n_permutations)
+
+
 # Modify this line: Add 'df' as an argument
 def show_l4_model(df_main):
     st.subheader("🔷 Modelo L4 Estendido - Realismo Crítico")
@@ -188,19 +217,15 @@ def show_l4_model(df_main):
                 if df_temp.isnull().all().all():
                     st.warning(f"Todas as variáveis selecionadas para '{label}' contêm apenas valores nulos. Escores serão NaN.")
                     return pd.Series(np.nan, index=current_df.index)
-                return df_temp.mean(axis=1)
+                return l4_dimension_score(df_temp, method)
             elif method == "PCA (1º componente)":
                 df_pca = df_temp.dropna()
                 # Verifica se há dados suficientes para PCA
                 if df_pca.empty or df_pca.shape[1] == 0:
                     st.warning(f"Não há dados válidos para PCA na dimensão {label}. Retornando NaN.")
                     return pd.Series(np.nan, index=current_df.index)
-                if df_pca.shape[1] == 1: # PCA com 1 componente em 1 variável é a própria variável
-                    return df_pca.iloc[:, 0]
                 try:
-                    pca = PCA(n_components=1)
-                    scores = pca.fit_transform(df_pca)
-                    return pd.Series(scores.flatten(), index=df_pca.index)
+                    return l4_dimension_score(df_temp, method)
                 except ValueError as e:
                     st.error(f"Erro ao calcular PCA para {label}: {e}. Verifique se há variância suficiente nos dados selecionados.")
                     return pd.Series(np.nan, index=current_df.index)
@@ -280,6 +305,11 @@ def show_l4_model(df_main):
             if cat_cols:
                 group_col = st.selectbox("Selecione a variável de agrupamento:", cat_cols, key="l4x_group_test")
                 test_type = st.radio("Tipo de teste estatístico:", ["ANOVA", "Kruskal-Wallis"], horizontal=True, key="l4x_test_type_radio")
+                use_permutation = st.checkbox("Calcular valor-p por permutação (grupos pequenos ou assimétricos)", value=False, key="l4x_use_permutation")
+                n_permutations = st.number_input("Número de permutações:", min_value=1000, max_value=100000, value=N_PERMUTATIONS, step=1000, key="l4x_n_permutations") if use_permutation else N_PERMUTATIONS
+
+                # Hash do conteúdo das colunas testadas: sem ele, qualquer widget da página refaria as permutações
+                perm_fingerprint = content_hash(df[l4_score_cols + [group_col]]) if use_permutation else None
 
                 resultado = []
                 for col in l4_score_cols:
@@ -293,6 +323,7 @@ def show_l4_model(df_main):
                             "Dimensão": col,
                             "Estatística": stat,
                             "p-valor": p,
+                            **({"p-valor (permutação)": np.nan} if use_permutation else {}),
                             "Interpretação": interpretacao
                         })
                         continue # Pula para a próxima dimensão
@@ -301,12 +332,22 @@ def show_l4_model(df_main):
 
                     # Ensure there are at least two valid groups for the statistical test
                     grupos_validos = [g for g in grupos_validos if len(g) > 0 and not np.all(np.isnan(g))] # Filter out empty or all-NaN groups
+                    p_perm = np.nan
                     if len(grupos_validos) < 2:
                         stat, p, interpretacao = np.nan, np.nan, "Poucos grupos com dados válidos para o teste."
                     else:
                         try:
                             stat, p = f_oneway(*grupos_validos) if test_type == "ANOVA" else kruskal(*grupos_validos)
-                            interpretacao = "✅ Diferença significativa (p < 0.05)" if p < 0.05 else "🔸 Sem diferença significativa (p >= 0.05)"
+                            if use_permutation:
+                                # Mesma estatística, com distribuição nula obtida por permutação dos rótulos
+                                p_perm = _l4_permutation_test(
+                                    data_for_test[col].to_numpy(), data_for_test[group_col].to_numpy(),
+                                    statistic="f" if test_type == "ANOVA" else "kruskal",
+                                    n_permutations=int(n_permutations),
+                                    fingerprint=perm_fingerprint, columns=(col, group_col),
+                                )["p_value"]
+                            p_decisao = p_perm if use_permutation else p
+                            interpretacao = "✅ Diferença significativa (p < 0.05)" if p_decisao < 0.05 else "🔸 Sem diferença significativa (p >= 0.05)"
                         except Exception as e:
                             stat, p, interpretacao = np.nan, np.nan, f"Erro: {e}"
 
@@ -314,8 +355,9 @@ def show_l4_model(df_main):
                         "Dimensão": col,
                         "Estatística": stat,
                         "p-valor": p,
+                        **({"p-valor (permutação)": p_perm} if use_permutation else {}),
                         "Interpretação": interpretacao,
-                        "P_Value_Raw": p # Guarda o p-valor bruto para a lógica do post-hoc
+                        "P_Value_Raw": p_perm if use_permutation else p # Guarda o p-valor bruto para a lógica do post-hoc
                     })
 
                 result_df = pd.DataFrame(resultado)
@@ -0,0 +1,181 @@
+# Leaderboard "treinar todos": todas as famílias de modelo ajustadas em paralelo sobre as mesmas dobras
+
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import KFold
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from boosting import MAX_ESTIMATORS, EarlyStoppingBooster, NativeCategoricalEncoder
+from hyperparameter_search import FoldCache
+
+REGRESSION_MODELS = [
+    "Regressão Linear", "Random Forest Regressor", "SVM Regressor", "KNN Regressor", "XGBoost Regressor", "LightGBM Regressor",
+]
+CLASSIFICATION_MODELS = [
+    "Regressão Logística", "Random Forest Classifier", "SVM Classifier", "KNN Classifier", "XGBoost Classifier", "LightGBM Classifier",
+]
+CV_FOLDS = 5
+
+
+def build_preprocessor(numeric_features, categorical_features) -> ColumnTransformer:
+    """Imputação + padronização das numéricas e imputação + one-hot das categóricas."""
+    numeric_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='mean')),
+        ('scaler', StandardScaler())
+    ])
+    categorical_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='most_frequent')),
+        ('onehot', OneHotEncoder(handle_unknown='ignore'))
+    ])
+    return ColumnTransformer(
+        transformers=[
+            ('num', numeric_transformer, numeric_features),
+            ('cat', categorical_transformer, categorical_features)
+        ],
+        remainder='passthrough'
+    )
+
+
+def build_native_preprocessor(numeric_features, categorical_features) -> ColumnTransformer:
+    """
+    Pré-processamento para XGBoost/LightGBM: numéricas sem imputação nem padronização
+    (as árvores tratam ausentes e não dependem de escala) e categóricas como dtype
+    category, sem one-hot. A saída é um DataFrame com os nomes originais das colunas.
+    """
+    return ColumnTransformer(
+        transformers=[
+            ('num', 'passthrough', numeric_features),
+            ('cat', NativeCategoricalEncoder(), categorical_features)
+        ],
+        remainder='passthrough',
+        verbose_feature_names_out=False
+    ).set_output(transform="pandas")
+
+
+def build_estimator(model_option: str, random_state: int = 42):
+    """Estimador de cada opção da interface (XGBoost/LightGBM importados só quando escolhidos)."""
+    if model_option == "Regressão Linear":
+        from sklearn.linear_model import LinearRegression
+        return LinearRegression()
+    if model_option == "Random Forest Regressor":
+        from sklearn.ensemble import RandomForestRegressor
+        return RandomForestRegressor(random_state=random_state)
+    if model_option == "SVM Regressor":
+        from sklearn.svm import SVR
+        return SVR()
+    if model_option == "KNN Regressor":
+        from sklearn.neighbors import KNeighborsRegressor
+        return KNeighborsRegressor()
+    if model_option == "XGBoost Regressor":
+        import xgboost
+        return xgboost.XGBRegressor(random_state=random_state)
+    if model_option == "LightGBM Regressor":
+        import lightgbm
+        return lightgbm.LGBMRegressor(random_state=random_state)
+    if model_option == "Regressão Logística":
+        from sklearn.linear_model import LogisticRegression
+        return LogisticRegression(max_iter=1000, random_state=random_state)
+    if model_option == "Random Forest Classifier":
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(random_state=random_state)
+    if model_option == "SVM Classifier":
+        from sklearn.svm import SVC
+        return SVC(probability=True, random_state=random_state)
+    if model_option == "KNN Classifier":
+        from sklearn.neighbors import KNeighborsClassifier
+        return KNeighborsClassifier()
+    if model_option == "XGBoost Classifier":
+        import xgboost
+        return xgboost.XGBClassifier(eval_metric='logloss', random_state=random_state)
+    if model_option == "LightGBM Classifier":
+        import lightgbm
+        return lightgbm.LGBMClassifier(random_state=random_state)
+    raise ValueError(f"Modelo desconhecido: {model_option}")
+
+
+def build_early_stopping_estimator(model_option: str, random_state: int = 42) -> EarlyStoppingBooster:
+    """XGBoost/LightGBM com categóricas nativas, até MAX_ESTIMATORS árvores e early stopping na validação interna."""
+    estimator = build_estimator(model_option, random_state).set_params(n_estimators=MAX_ESTIMATORS)
+    if model_option.startswith("XGBoost"):
+        estimator.set_params(enable_categorical=True, tree_method="hist")
+    else:
+        estimator.set_params(verbose=-1)
+    return EarlyStoppingBooster(estimator, random_state=random_state)
+
+
+def thread_budget(n_workers: int, n_cpus: int | None = None) -> int:
+    """Threads por processo para que workers × threads não passe do número de núcleos."""
+    return max(1, (n_cpus or os.cpu_count() or 1) // max(n_workers, 1))
+
+
+def _fit_family(model_option: str, random_state: int, threads: int, folds: list, scoring: str) -> dict:
+    """
+    Executado em um processo do pool: ajusta uma família nas dobras pré-processadas
+    (memmap), limitando as threads do próprio modelo (n_jobs/OpenMP) e das bibliotecas
+    BLAS ao orçamento do processo.
+    """
+    from threadpoolctl import threadpool_limits
+
+    row = {"Modelo": model_option}
+    try:
+        estimator = build_estimator(model_option, random_state)
+        if "n_jobs" in estimator.get_params():
+            estimator.set_params(n_jobs=threads)
+        scorer = get_scorer(scoring)
+        scores, fit_time = [], 0.0
+        with threadpool_limits(limits=threads):
+            for X_train, y_train, X_test, y_test in folds:
+                model = clone(estimator)
+                start = time.perf_counter()
+                model.fit(X_train, y_train)
+                fit_time += time.perf_counter() - start
+                scores.append(scorer(model, X_test, y_test))
+        row.update({"CV_Media": float(np.mean(scores)), "CV_Desvio": float(np.std(scores)),
+                    "Tempo_Ajuste_s": fit_time, "Status": "ok"})
+    except Exception as e:
+        row.update({"CV_Media": np.nan, "CV_Desvio": np.nan, "Tempo_Ajuste_s": np.nan,
+                    "Status": f"erro: {type(e).__name__}: {e}"})
+    return row
+
+
+def train_leaderboard(X, y, task: str, numeric_features, categorical_features, random_state: int = 42,
+                      models: list | None = None, n_workers: int | None = None, progress=None) -> pd.DataFrame:
+    """
+    Ajusta todas as famílias de modelo da tarefa em um pool de processos e retorna uma
+    tabela ordenada pela média da validação cruzada (R² ou acurácia).
+
+    O pré-processamento é feito uma vez por dobra no processo principal e as matrizes
+    são mapeadas em memória (FoldCache), de modo que os workers recebem apenas a
+    referência aos arquivos em vez de uma cópia serializada de X/y. Cada worker recebe
+    `núcleos // workers` threads, aplicadas ao n_jobs dos modelos (RF, XGBoost,
+    LightGBM, KNN) e às bibliotecas BLAS/OpenMP, evitando a sobreinscrição de núcleos.
+    """
+    models = models or (REGRESSION_MODELS if task == "regressao" else CLASSIFICATION_MODELS)
+    scoring = "r2" if task == "regressao" else "accuracy"
+    n_workers = min(len(models), n_workers or os.cpu_count() or 1)
+    threads = thread_budget(n_workers)
+    cache = FoldCache(build_preprocessor(numeric_features, categorical_features),
+                      KFold(n_splits=CV_FOLDS, shuffle=True, random_state=random_state))
+    start = time.perf_counter()
+    rows = []
+    try:
+        folds = cache.folds("completo", X, y)
+        tasks = (joblib.delayed(_fit_family)(option, random_state, threads, folds, scoring) for option in models)
+        for row in joblib.Parallel(n_jobs=n_workers, backend="loky", return_as="generator_unordered")(tasks):
+            rows.append(row)
+            if progress is not None:
+                progress(len(rows) / len(models), f"{len(rows)}/{len(models)} modelos · {time.perf_counter() - start:.0f} s")
+    finally:
+        cache.close()
+    board = pd.DataFrame(rows).sort_values("CV_Media", ascending=False, na_position="last").reset_index(drop=True)
+    board.insert(0, "Posição", np.arange(1, len(board) + 1))
+    return board
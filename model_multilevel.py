@@ -14,6 +14,8 @@ from fpdf import FPDF
 from datetime import datetime
 import tempfile
 
+from telemetry import track
+
 # --- Função principal ---
 def show_multilevel_model_extended():
     st.subheader("🌳 Análise Multinível Estendida (MixedLM com ICC, Checagem e Exportação)")
@@ -127,7 +129,8 @@ def show_multilevel_model_extended():
                     groups=df_model[group_var]
                 )
 
-                results = model.fit()
+                with track("model_multilevel.mixedlm", shape=df_model.shape):
+                    results = model.fit()
 
                 st.success("✅ Modelo treinado com sucesso!")
 
@@ -7,9 +7,11 @@ from scipy import stats
 import plotly.express as px
 import plotly.graph_objects as go
 import io
-import zipfile
 import os
 
+from artifact_store import cached_zip
+from telemetry import track
+
 
 def reset_multilevel_cross_state():
     keys_to_reset = [
@@ -75,7 +77,8 @@ def show_multilevel_model_cross():
                              re_formula="1",
                              vc_formula={group_2: f"0 + C({group_2})"})
 
-            mdf = md.fit(reml=True)
+            with track("model_multilevel_cross_classified.mixedlm", shape=df_model.shape):
+                mdf = md.fit(reml=True)
             st.success("✅ Modelo ajustado com sucesso.")
 
             st.markdown("### 📋 Sumário do Modelo")
@@ -133,24 +136,17 @@ def show_multilevel_model_cross():
                                file_name="relatorio_cross_classificado.txt",
                                mime="text/plain")
 
-            zip_path = "/tmp/modelo_cross_classificado.zip"
-            with zipfile.ZipFile(zip_path, "w") as zipf:
-                with open("/tmp/summary_cross.txt", "w") as f:
-                    f.write(mdf.summary().as_text())
-                zipf.write("/tmp/summary_cross.txt", arcname="summary_cross.txt")
-
-                df_icc.to_csv("/tmp/icc_cross.csv", index=False)
-                zipf.write("/tmp/icc_cross.csv", arcname="icc_cross.csv")
-
-                if st.session_state.get("df_l4") is not None:
-                    st.session_state["df_l4"].to_csv("/tmp/escores_l4_cross.csv", index=False)
-                    zipf.write("/tmp/escores_l4_cross.csv", arcname="escores_l4_cross.csv")
-
-            with open(zip_path, "rb") as f:
-                st.download_button("📥 Baixar ZIP com todos os resultados",
-                                   data=f,
-                                   file_name="modelo_cross_classificado_resultados.zip",
-                                   mime="application/zip")
+            # ZIP montado em memória (sem caminhos fixos compartilhados entre sessões)
+            zip_files = {
+                "summary_cross.txt": mdf.summary().as_text(),
+                "icc_cross.csv": df_icc.to_csv(index=False),
+            }
+            if st.session_state.get("df_l4") is not None:
+                zip_files["escores_l4_cross.csv"] = st.session_state["df_l4"].to_csv(index=False)
+            st.download_button("📥 Baixar ZIP com todos os resultados",
+                               data=cached_zip(zip_files),
+                               file_name="modelo_cross_classificado_resultados.zip",
+                               mime="application/zip")
 
         except Exception as e:
             st.error(f"Erro ao ajustar o modelo: {e}")
@@ -8,6 +8,8 @@ from scipy import stats
 import plotly.express as px
 import plotly.graph_objects as go
 
+from telemetry import track
+
 def show_multilevel_model_lvl3_full():
     st.subheader("📚 Modelo Multinível Nível 3 — Versão Completa")
     st.markdown("Este módulo permite ajustar modelos multiníveis com até três níveis, com ICCs, comparações e relatórios integrados.")
@@ -99,7 +101,8 @@ def show_multilevel_model_lvl3_full():
                               re_formula=re_formula,
                               vc_formula={group_lvl2: f"0 + C({group_lvl2})"})
 
-            mdf3 = md3.fit(reml=True)
+            with track("model_multilevel_lvl3.mixedlm_3_niveis", shape=df_clean.shape):
+                mdf3 = md3.fit(reml=True)
             st.success("✅ Modelo de 3 níveis ajustado com sucesso.")
 
             st.markdown("### 📋 Sumário do Modelo (Nível 3)")
@@ -183,7 +186,8 @@ def show_multilevel_model_lvl3_full():
                               groups=df_clean[group_lvl2],
                               re_formula="1")
 
-            mdf2 = md2.fit(reml=True)
+            with track("model_multilevel_lvl3.mixedlm_2_niveis", shape=df_clean.shape):
+                mdf2 = md2.fit(reml=True)
             st.success("✅ Modelo de 2 níveis ajustado.")
 
             # Comparar métricas
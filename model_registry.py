@@ -0,0 +1,282 @@
+# Registro de modelos treinados: pipelines persistidos com joblib + metadados em JSON, carregados sob demanda
+
+import datetime
+import functools
+import json
+import os
+import shutil
+import time
+import uuid
+
+import joblib
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from dataset_cache import dataset_fingerprint
+
+# Diretório do registro (um subdiretório por modelo: modelo.joblib + metadata.json)
+MODEL_REGISTRY_DIR = os.environ.get(
+    "BDS_MODEL_REGISTRY", os.path.join(os.path.expanduser("~"), ".bds_mep", "modelos")
+)
+MODEL_FILE = "modelo.joblib"
+METADATA_FILE = "metadata.json"
+# Nível de compressão zlib oferecido na interface (0 = sem compressão, carregável com memmap)
+COMPRESSION_LEVEL = 3
+
+
+def _library_versions() -> dict:
+    """Versões das bibliotecas do pipeline: um modelo salvo só é confiável com versões compatíveis."""
+    import sklearn
+
+    versions = {"sklearn": sklearn.__version__, "numpy": np.__version__}
+    for name in ("xgboost", "lightgbm"):
+        try:
+            versions[name] = __import__(name).__version__
+        except ImportError:
+            pass
+    return versions
+
+
+def save_model(pipeline, name: str, task: str, model_option: str, target: str, features: list, metrics: dict,
+               fingerprint: str, fit_time: float, best_params=None, search_label: str = "Não",
+               classes: dict | None = None, dtypes: dict | None = None, compress: bool = False,
+               registry_dir: str | None = None) -> dict:
+    """
+    Grava o pipeline ajustado e os metadados. Sem compressão, os arrays do modelo ficam
+    no formato que o joblib consegue mapear em memória na carga (mais rápido); com
+    compressão o arquivo fica menor, mas é descompactado inteiro ao carregar.
+    `dtypes` ({feature: tipo no treino}) permite ler arquivos novos com os mesmos tipos.
+    """
+    registry_dir = registry_dir or MODEL_REGISTRY_DIR
+    model_id = f"{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    directory = os.path.join(registry_dir, model_id)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, MODEL_FILE)
+    try:
+        joblib.dump(pipeline, path, compress=COMPRESSION_LEVEL if compress else 0)
+        metadata = {
+            "id": model_id,
+            "nome": name,
+            "tarefa": task,
+            "modelo": model_option,
+            "alvo": target,
+            "features": list(features),
+            "tipos": {str(k): str(v) for k, v in (dtypes or {}).items()},
+            "metricas": {k: float(v) for k, v in metrics.items()},
+            "melhores_parametros": best_params if isinstance(best_params, dict) else None,
+            "busca": search_label,
+            "classes": {str(k): v for k, v in (classes or {}).items()},
+            "dataset_fingerprint": fingerprint,
+            "tempo_treino_s": float(fit_time),
+            "criado_em": datetime.datetime.now().isoformat(timespec="seconds"),
+            "compressao": COMPRESSION_LEVEL if compress else 0,
+            "tamanho_mb": os.path.getsize(path) / 1e6,
+            "versoes": _library_versions(),
+        }
+        with open(os.path.join(directory, METADATA_FILE), "w", encoding="utf-8") as f:
+            json.dump(metadata, f, ensure_ascii=False, indent=2, default=str)
+    except Exception:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+    return metadata
+
+
+def list_models(registry_dir: str | None = None) -> list:
+    """Metadados de todos os modelos salvos (só os JSON são lidos; nenhum modelo é carregado)."""
+    registry_dir = registry_dir or MODEL_REGISTRY_DIR
+    if not os.path.isdir(registry_dir):
+        return []
+    records = []
+    for entry in sorted(os.listdir(registry_dir), reverse=True):
+        meta_path = os.path.join(registry_dir, entry, METADATA_FILE)
+        if not os.path.isfile(meta_path):
+            continue
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                records.append(json.load(f))
+        except (OSError, json.JSONDecodeError):
+            continue  # registro incompleto ou corrompido não impede a listagem dos demais
+    return records
+
+
+@functools.lru_cache(maxsize=4)
+def _load(path: str, mtime: float, mmap: bool):
+    return joblib.load(path, mmap_mode="r" if mmap else None)
+
+
+def load_model(model_id: str, registry_dir: str | None = None):
+    """
+    Carrega o pipeline salvo. Modelos sem compressão são abertos com memmap (os arrays
+    grandes não são copiados para a memória); as últimas cargas ficam em cache no processo.
+    """
+    directory = os.path.join(registry_dir or MODEL_REGISTRY_DIR, model_id)
+    path = os.path.join(directory, MODEL_FILE)
+    with open(os.path.join(directory, METADATA_FILE), encoding="utf-8") as f:
+        compressed = json.load(f).get("compressao", 0) > 0
+    return _load(path, os.path.getmtime(path), not compressed)
+
+
+def delete_model(model_id: str, registry_dir: str | None = None) -> None:
+    shutil.rmtree(os.path.join(registry_dir or MODEL_REGISTRY_DIR, model_id), ignore_errors=True)
+    _load.cache_clear()
+
+
+def models_frame(records: list, current_fingerprint: str | None = None) -> pd.DataFrame:
+    """Tabela resumida dos modelos salvos, com as métricas como colunas."""
+    rows = []
+    for r in records:
+        row = {
+            "ID": r["id"], "Nome": r["nome"], "Modelo": r["modelo"], "Tarefa": r["tarefa"], "Alvo": r["alvo"],
+            "Nº features": len(r["features"]), **r.get("metricas", {}),
+            "Tempo de treino (s)": r.get("tempo_treino_s"), "Tamanho (MB)": r.get("tamanho_mb"),
+            "Criado em": r.get("criado_em"),
+        }
+        if current_fingerprint is not None:
+            row["Dados atuais"] = r.get("dataset_fingerprint") == current_fingerprint
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def _evaluate_on_current(pipeline, record: dict, df: pd.DataFrame) -> None:
+    """Predição do modelo carregado sobre os dados processados atuais (métricas se o alvo existir)."""
+    from sklearn.metrics import accuracy_score, f1_score, mean_absolute_error, mean_squared_error, r2_score
+
+    missing = [c for c in record["features"] if c not in df.columns]
+    if missing:
+        st.warning(f"Os dados atuais não têm as features do modelo: {', '.join(missing)}.")
+        return
+    data = df.dropna(subset=[record["alvo"]]) if record["alvo"] in df.columns else df
+    predictions = pipeline.predict(data[record["features"]])
+    if record["tarefa"] == "classificacao" and record.get("classes"):
+        predictions = pd.Series(predictions).map(lambda v: record["classes"].get(str(v), v)).to_numpy()
+    if record["alvo"] not in data.columns:
+        st.info("A variável alvo não está nos dados atuais: exibindo apenas as predições.")
+    elif record["tarefa"] == "regressao":
+        y = data[record["alvo"]]
+        st.write({"R²": r2_score(y, predictions), "RMSE": float(np.sqrt(mean_squared_error(y, predictions))),
+                  "MAE": mean_absolute_error(y, predictions)})
+    else:
+        y = data[record["alvo"]].astype(str)
+        predictions_str = pd.Series(predictions).astype(str)
+        st.write({"Acurácia": accuracy_score(y, predictions_str),
+                  "F1 (weighted)": f1_score(y, predictions_str, average="weighted", zero_division=0)})
+    st.dataframe(pd.DataFrame({"Predição": predictions}, index=data.index).head(200), use_container_width=True)
+
+
+def _batch_scoring_section(model_id: str) -> None:
+    """Aplica o modelo selecionado a um arquivo novo, em blocos, gravando as predições em Parquet."""
+    from artifact_store import temporary_path
+    from batch_scoring import (
+        BATCH_SCORING_DIR, DEFAULT_CHUNKSIZE, INPUT_SUFFIXES, score_file, scoring_dir_files, scoring_dir_path,
+    )
+
+    st.subheader("📦 Pontuação em lote")
+    st.caption("Lê o arquivo em blocos, prediz os blocos em processos paralelos e grava predições "
+               "(e probabilidades das classes) em Parquet; a memória usada não depende do tamanho do arquivo.")
+    # Caminhos livres no servidor só pela linha de comando; na interface, apenas o diretório configurado
+    sources = ["Enviar arquivo"] + (["Diretório de pontuação"] if BATCH_SCORING_DIR else [])
+    source = st.radio("Arquivo de entrada:", sources, horizontal=True, key="registry_batch_source")
+    col1, col2 = st.columns(2)
+    chunksize = int(col1.number_input("Linhas por bloco", min_value=1000, value=DEFAULT_CHUNKSIZE, step=10_000, key="registry_batch_chunksize"))
+    workers = int(col2.number_input("Processos", min_value=1, max_value=os.cpu_count() or 1, value=os.cpu_count() or 1, key="registry_batch_workers"))
+    keep = [c.strip() for c in st.text_input("Colunas copiadas para a saída (ex.: ID), separadas por vírgula:", key="registry_batch_keep").split(",") if c.strip()]
+
+    def run(input_path, output_path):
+        progress_text = st.empty()
+        stats = score_file(model_id, input_path, output_path, chunksize=chunksize, n_workers=workers, keep_columns=keep,
+                           progress=lambda rows, msg: progress_text.text(msg))
+        st.success(f"{stats['linhas']:,} linhas em {stats['tempo_s']:.2f} s ({stats['linhas_por_s']:,.0f} linhas/s, {stats['workers']} processo(s)).")
+        return stats
+
+    try:
+        if source == "Enviar arquivo":
+            uploaded = st.file_uploader("Arquivo CSV ou Parquet:", type=["csv", "parquet"], key="registry_batch_file")
+            if uploaded is not None and st.button("▶️ Pontuar arquivo", key="registry_batch_run"):
+                suffix = ".parquet" if uploaded.name.lower().endswith(".parquet") else ".csv"
+                with temporary_path(suffix, uploaded.getvalue()) as input_path, temporary_path(".parquet") as output_path:
+                    run(input_path, output_path)
+                    with open(output_path, "rb") as f:
+                        st.session_state["registry_batch_output"] = f.read()
+            if st.session_state.get("registry_batch_output"):
+                st.download_button("📥 Baixar predições (Parquet)", st.session_state["registry_batch_output"],
+                                   file_name="predicoes.parquet", mime="application/octet-stream", key="registry_batch_download")
+        else:
+            st.caption(f"Diretório: `{BATCH_SCORING_DIR}` (BDS_SCORING_DIR).")
+            files = scoring_dir_files()
+            if not files:
+                st.info("Nenhum arquivo CSV/Parquet no diretório de pontuação.")
+                return
+            input_name = st.selectbox("Arquivo de entrada:", files, key="registry_batch_input")
+            output_name = st.text_input("Nome do Parquet de saída:", value="predicoes.parquet", key="registry_batch_output_path")
+            if output_name and st.button("▶️ Pontuar arquivo", key="registry_batch_run_path"):
+                input_path = scoring_dir_path(input_name, INPUT_SUFFIXES)
+                output_path = scoring_dir_path(output_name, (".parquet",))
+                if output_path == input_path:
+                    raise ValueError("A saída não pode sobrescrever o arquivo de entrada.")
+                run(input_path, output_path)
+                st.info(f"Predições gravadas em `{output_path}`.")
+    except Exception as e:
+        st.error(f"Não foi possível pontuar o arquivo: {e}")
+
+
+def show_model_registry_page():
+    """Página do registro: listar, comparar, carregar, remover e pontuar arquivos com modelos salvos."""
+    st.header("🗂️ Registro de Modelos")
+    st.caption(f"Diretório: `{MODEL_REGISTRY_DIR}` (altere com BDS_MODEL_REGISTRY).")
+    records = list_models()
+    if not records:
+        st.info("Nenhum modelo salvo ainda. Treine um modelo em 🤖 Machine Learning e use '💾 Salvar no registro'.")
+        return
+
+    df = st.session_state.get("df_processed")
+    current = dataset_fingerprint(df) if isinstance(df, pd.DataFrame) else None
+    table = models_frame(records, current)
+    st.dataframe(table.drop(columns=["ID"]).round(4), hide_index=True, use_container_width=True)
+
+    by_id = {r["id"]: r for r in records}
+    label = lambda model_id: f"{by_id[model_id]['nome']} · {by_id[model_id]['modelo']} · {by_id[model_id]['criado_em']}"
+
+    st.subheader("📊 Comparar modelos")
+    selected = st.multiselect("Modelos a comparar:", list(by_id), format_func=label, key="registry_compare")
+    if selected:
+        compare = table.set_index("ID").loc[selected]
+        compare.index = [label(i) for i in selected]
+        st.dataframe(compare.drop(columns=["Nome"]).T.astype(str), use_container_width=True)
+        fingerprints = {by_id[i].get("dataset_fingerprint") for i in selected}
+        if len(fingerprints) > 1:
+            st.caption("⚠️ Os modelos selecionados foram treinados com versões diferentes dos dados.")
+
+    st.subheader("📂 Carregar modelo")
+    model_id = st.selectbox("Modelo:", list(by_id), format_func=label, key="registry_selected")
+    record = by_id[model_id]
+    col1, col2 = st.columns(2)
+    if col1.button("📂 Carregar", key="registry_load_button"):
+        start = time.perf_counter()
+        try:
+            st.session_state["registry_loaded"] = (model_id, load_model(model_id))
+            st.success(f"Modelo carregado em {time.perf_counter() - start:.2f} s.")
+        except Exception as e:
+            st.error(f"Não foi possível carregar o modelo: {e}")
+    if col2.button("🗑️ Remover", key="registry_delete_button"):
+        delete_model(model_id)
+        if st.session_state.get("registry_loaded", (None,))[0] == model_id:
+            st.session_state.pop("registry_loaded", None)
+        st.rerun()
+
+    with st.expander("Metadados", expanded=False):
+        st.json(record)
+    versions = _library_versions()
+    mismatched = {k: v for k, v in record.get("versoes", {}).items() if versions.get(k) != v}
+    if mismatched:
+        st.warning("Versões diferentes das usadas no treino: " + ", ".join(f"{k} {v} → {versions.get(k, 'ausente')}" for k, v in mismatched.items()))
+
+    loaded = st.session_state.get("registry_loaded")
+    if loaded is not None and loaded[0] == model_id:
+        if isinstance(df, pd.DataFrame):
+            if st.button("🎯 Avaliar nos dados atuais", key="registry_evaluate_button"):
+                _evaluate_on_current(loaded[1], record, df)
+        else:
+            st.info("Carregue e processe dados para aplicar o modelo.")
+    st.markdown("---")
+    _batch_scoring_section(model_id)
@@ -10,7 +10,9 @@ import seaborn as sns
 from sklearn.preprocessing import StandardScaler
 from statsmodels.formula.api import ols, glm, mixedlm
 import re
-import networkx as nx
+from lazy_imports import lazy_module
+from telemetry import track
+nx = lazy_module("networkx")  # usado apenas no diagrama de caminhos
 
 
 # Apenas para fins de demonstração, crie um DataFrame dummy se não existir
@@ -108,7 +110,8 @@ def show_linear_regression_model():
                     X = sm.add_constant(X)
 
                     model = sm.OLS(Y, X)
-                    results = model.fit()
+                    with track("model_training.ols", shape=X.shape):
+                        results = model.fit()
 
                     st.markdown("---")
                     st.subheader("Resultados da Regressão Linear")
@@ -123,7 +126,8 @@ def show_linear_regression_model():
                     X_std = df_scaled[independent_vars]
                     X_std = sm.add_constant(X_std)
                     model_std = sm.OLS(Y_std, X_std)
-                    results_std = model_std.fit()
+                    with track("model_training.ols_padronizado", shape=X_std.shape):
+                        results_std = model_std.fit()
                     st.dataframe(results_std.summary2().tables[1].round(4))
 
                     st.info("Esses são os coeficientes da regressão após padronização (Z-score) das variáveis. Facilitam a comparação do peso relativo das variáveis.")
@@ -244,7 +248,8 @@ def show_logistic_regression_model():
         ])
 
         try:
-            pipeline.fit(X, Y)
+            with track("model_training.logistic", shape=X.shape):
+                pipeline.fit(X, Y)
             st.success("Modelo treinado com sucesso.")
 
             st.markdown("#### Coeficientes e Odds Ratio:")
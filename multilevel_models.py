@@ -9,7 +9,9 @@ import seaborn as sns
 from sklearn.preprocessing import StandardScaler
 from statsmodels.formula.api import ols, glm, mixedlm
 import re
-import networkx as nx
+from lazy_imports import lazy_module
+from telemetry import track
+nx = lazy_module("networkx")
 from model_multilevel_lvl3 import show_multilevel_model_lvl3_full
 
 
@@ -93,7 +95,8 @@ def show_multilevel_model():
 
                     formula = f"{dependent_var} ~ {fixed_part}"
                     model = mixedlm(formula=formula, data=df_model, re_formula=re_formula, groups=df_model[group_var])
-                    results = model.fit()
+                    with track("multilevel_models.mixedlm", shape=df_model.shape):
+                        results = model.fit()
 
                     st.markdown("---")
                     st.subheader("Resultados do Modelo Multinível")
@@ -0,0 +1,131 @@
+# Motor vetorizado de testes de permutação para comparação de grupos
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+# Número padrão de permutações e limite de elementos por lote (permutações x observações)
+N_PERMUTATIONS = 10000
+BATCH_ELEMENTS = 2_000_000
+
+# Estatísticas disponíveis: "f" (ANOVA unifatorial), "kruskal" (H de Kruskal-Wallis),
+# "welch_t" (t de Welch, 2 grupos) e "mean_diff" (diferença de médias, 2 grupos)
+STATISTICS = ("f", "kruskal", "welch_t", "mean_diff")
+
+
+def _group_sums(labels: np.ndarray, values: np.ndarray, k: int):
+    """
+    Somas e somas de quadrados por grupo para um lote de rótulos (permutações x n),
+    em uma única passagem com bincount sobre o índice (permutação, grupo).
+    """
+    b, n = labels.shape
+    flat = (np.arange(b)[:, None] * k + labels).ravel()
+    sums = np.bincount(flat, weights=np.broadcast_to(values, (b, n)).ravel(), minlength=b * k)
+    sumsq = np.bincount(flat, weights=np.broadcast_to(values * values, (b, n)).ravel(), minlength=b * k)
+    return sums.reshape(b, k), sumsq.reshape(b, k)
+
+
+def _statistic_from_sums(statistic: str, sums, sumsq, counts, total_sum, total_sumsq, n, tie_factor=1.0):
+    """Calcula a estatística para cada linha (permutação) a partir das somas por grupo."""
+    k = counts.shape[0]
+    means = sums / counts
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if statistic in ("f", "kruskal"):
+            ss_between = (sums ** 2 / counts).sum(axis=1) - total_sum ** 2 / n
+            if statistic == "kruskal":
+                # sobre postos: H = 12/(N(N+1)) Σ R_g²/n_g - 3(N+1), com correção de empates
+                h = 12.0 / (n * (n + 1)) * (sums ** 2 / counts).sum(axis=1) - 3.0 * (n + 1)
+                return h / tie_factor
+            ss_total = total_sumsq - total_sum ** 2 / n
+            ss_within = ss_total - ss_between
+            return (ss_between / (k - 1)) / (ss_within / (n - k))
+        if statistic == "mean_diff":
+            return means[:, 0] - means[:, 1]
+        if statistic == "welch_t":
+            var = (sumsq - sums ** 2 / counts) / (counts - 1)
+            return (means[:, 0] - means[:, 1]) / np.sqrt((var / counts).sum(axis=1))
+    raise ValueError(f"Estatística não suportada: {statistic}")
+
+
+def _count_extreme(perm_stats: np.ndarray, observed: float, two_sided: bool) -> int:
+    # pequena tolerância para empates numéricos entre a estatística observada e a permutada
+    tol = 1e-12 * max(1.0, abs(observed))
+    if two_sided:
+        return int((np.abs(perm_stats) >= abs(observed) - tol).sum())
+    return int((perm_stats >= observed - tol).sum())
+
+
+def permutation_test(values, labels, statistic: str = "f", n_permutations: int = N_PERMUTATIONS,
+                     seed: int = 42, n_jobs: int | None = None, batch_size: int | None = None) -> dict:
+    """
+    Teste de permutação para diferenças entre grupos.
+
+    Os rótulos permutados de cada lote formam uma matriz (permutações x observações)
+    e a estatística é calculada para todas as permutações do lote com NumPy vetorizado.
+    Os lotes são distribuídos entre threads, cada um com seu próprio fluxo aleatório
+    derivado de `seed` (SeedSequence.spawn), de modo que o resultado é reprodutível e
+    independe do número de threads.
+
+    Para "kruskal" a estatística é calculada sobre os postos (calculados uma vez).
+    Para "welch_t"/"mean_diff" o teste é bicaudal. O valor-p usa (1 + extremos) / (1 + B).
+    Retorna dict com 'statistic', 'p_value', 'n_permutations', 'n' e 'k'.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    labels = pd.Series(np.asarray(labels))
+    valid = np.isfinite(values) & labels.notna().to_numpy()
+    values = values[valid]
+    codes, _ = pd.factorize(labels[valid], sort=True)
+    codes = codes.astype(np.int64)
+    n = values.size
+    counts = np.bincount(codes).astype(np.float64)
+    k = counts.size
+    if k < 2 or n <= k:
+        raise ValueError("São necessários ao menos dois grupos com observações suficientes.")
+    if statistic in ("welch_t", "mean_diff") and k != 2:
+        raise ValueError("As estatísticas de duas amostras exigem exatamente dois grupos.")
+
+    tie_factor = 1.0
+    if statistic == "kruskal":
+        values = stats.rankdata(values)
+        _, tie_counts = np.unique(values, return_counts=True)
+        tie_factor = 1.0 - (tie_counts ** 3 - tie_counts).sum() / (n ** 3 - n)
+    total_sum = values.sum()
+    total_sumsq = (values * values).sum()
+    two_sided = statistic in ("welch_t", "mean_diff")
+
+    obs_sums, obs_sumsq = _group_sums(codes[None, :], values, k)
+    observed = float(_statistic_from_sums(statistic, obs_sums, obs_sumsq, counts, total_sum, total_sumsq, n, tie_factor)[0])
+
+    if batch_size is None:
+        batch_size = max(1, min(1000, BATCH_ELEMENTS // n))
+    n_batches = -(-n_permutations // batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(n_batches)
+    sizes = [min(batch_size, n_permutations - i * batch_size) for i in range(n_batches)]
+
+    def run_batch(args):
+        size, seed_seq = args
+        rng = np.random.default_rng(seed_seq)
+        permuted = rng.permuted(np.broadcast_to(codes, (size, n)), axis=1)
+        sums, sumsq = _group_sums(permuted, values, k)
+        perm_stats = _statistic_from_sums(statistic, sums, sumsq, counts, total_sum, total_sumsq, n, tie_factor)
+        return _count_extreme(perm_stats, observed, two_sided)
+
+    if n_jobs is None:
+        n_jobs = min(n_batches, os.cpu_count() or 1)
+    jobs = list(zip(sizes, seeds))
+    if n_jobs > 1:
+        with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+            extreme = sum(pool.map(run_batch, jobs))
+    else:
+        extreme = sum(run_batch(job) for job in jobs)
+
+    return {
+        "statistic": observed,
+        "p_value": (1 + extreme) / (1 + n_permutations),
+        "n_permutations": n_permutations,
+        "n": n,
+        "k": k,
+    }
@@ -0,0 +1,156 @@
+# Captura de perfil sob demanda (cProfile + tracemalloc) de uma execução de página
+
+from contextlib import contextmanager
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import time
+import tracemalloc
+
+import pandas as pd
+import streamlit as st
+
+from artifact_store import build_zip
+
+# Quantidade padrão de linhas nas tabelas de hotspots
+TOP_N = 25
+# Quadros de pilha guardados por alocação (mais quadros = mais contexto e mais overhead)
+TRACEMALLOC_FRAMES = 5
+
+
+def _function_label(func) -> str:
+    filename, lineno, name = func
+    if filename == "~":  # funções embutidas (ex.: <built-in method numpy...>)
+        return name
+    return f"{os.path.basename(filename)}:{lineno}({name})"
+
+
+def hotspots_frame(stats: pstats.Stats, top_n: int = TOP_N, sort: str = "cumulative") -> pd.DataFrame:
+    """Tabela das funções mais custosas: chamadas, tempo próprio e tempo acumulado."""
+    rows = []
+    for func, (primitive_calls, total_calls, own_time, cum_time, _callers) in stats.stats.items():
+        rows.append({
+            "Função": _function_label(func),
+            "Chamadas": total_calls,
+            "Tempo próprio (s)": own_time,
+            "Tempo acumulado (s)": cum_time,
+            "Por chamada (ms)": 1000 * cum_time / total_calls if total_calls else 0.0,
+        })
+    df = pd.DataFrame(rows, columns=["Função", "Chamadas", "Tempo próprio (s)", "Tempo acumulado (s)", "Por chamada (ms)"])
+    column = "Tempo acumulado (s)" if sort == "cumulative" else "Tempo próprio (s)"
+    return df.sort_values(column, ascending=False).head(top_n).reset_index(drop=True)
+
+
+def memory_frame(snapshot: tracemalloc.Snapshot, top_n: int = TOP_N) -> pd.DataFrame:
+    """Linhas de código com mais memória ainda alocada ao fim da execução."""
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ])
+    rows = []
+    for stat in snapshot.statistics("lineno")[:top_n]:
+        frame = stat.traceback[0]
+        rows.append({
+            "Linha": f"{os.path.basename(frame.filename)}:{frame.lineno}",
+            "Alocado (MB)": stat.size / (1024 * 1024),
+            "Blocos": stat.count,
+        })
+    return pd.DataFrame(rows, columns=["Linha", "Alocado (MB)", "Blocos"])
+
+
+class ProfileReport:
+    """Resultado de uma captura: estatísticas do cProfile e instantâneo do tracemalloc."""
+
+    def __init__(self, label: str, profiler: cProfile.Profile, snapshot, peak_bytes: int, wall_time: float):
+        profiler.create_stats()
+        self.label = label
+        self.created_at = time.time()
+        self.wall_time = wall_time
+        self.peak_mb = peak_bytes / (1024 * 1024)
+        # mesmo formato de `pstats.Stats.dump_stats` (abre com snakeviz, pstats, etc.)
+        self.prof_bytes = marshal.dumps(profiler.stats)
+        self._profiler = profiler
+        self.stats = pstats.Stats(profiler)
+        self.hotspots = hotspots_frame(self.stats)
+        self.own_time_hotspots = hotspots_frame(self.stats, sort="tottime")
+        self.memory = memory_frame(snapshot) if snapshot is not None else pd.DataFrame()
+        self._zip = None
+
+    def text_report(self, top_n: int = 60) -> str:
+        buffer = io.StringIO()
+        stats = pstats.Stats(self._profiler, stream=buffer)
+        stats.sort_stats("cumulative").print_stats(top_n)
+        stats.sort_stats("tottime").print_stats(top_n)
+        header = f"Perfil: {self.label}\nTempo total: {self.wall_time:.3f} s | Pico de memória (tracemalloc): {self.peak_mb:.1f} MB\n\n"
+        return header + buffer.getvalue()
+
+    def to_zip(self) -> bytes:
+        """Pacote para anexar a um chamado: .prof binário, relatório em texto e tabelas CSV."""
+        if self._zip is None:
+            self._zip = build_zip({
+                "perfil.prof": self.prof_bytes,
+                "perfil.txt": self.text_report(),
+                "hotspots_acumulado.csv": self.hotspots,
+                "hotspots_proprio.csv": self.own_time_hotspots,
+                "memoria.csv": self.memory,
+            })
+        return self._zip
+
+
+@contextmanager
+def capture_profile(label: str, trace_memory: bool = True):
+    """
+    Executa o bloco sob cProfile (e tracemalloc, se `trace_memory`) e entrega o
+    ProfileReport em `holder["report"]` ao sair, mesmo se o bloco for interrompido
+    (ex.: st.stop ou st.rerun). Apenas a thread principal é perfilada.
+    """
+    holder = {}
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield holder
+    finally:
+        profiler.disable()
+        wall_time = time.perf_counter() - start
+        snapshot, peak = None, 0
+        if trace_memory and tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+        if started_tracing:
+            tracemalloc.stop()
+        holder["report"] = ProfileReport(label, profiler, snapshot, peak, wall_time)
+
+
+def show_profile_report(report: ProfileReport) -> None:
+    """Exibe o perfil capturado: resumo, hotspots por tempo e por memória, e download."""
+    captured = time.strftime("%H:%M:%S", time.localtime(report.created_at))
+    with st.expander(f"🔬 Perfil da execução: {report.label} ({captured})", expanded=True):
+        col1, col2 = st.columns(2)
+        col1.metric("Tempo total", f"{report.wall_time:.2f} s")
+        col2.metric("Pico de memória (tracemalloc)", f"{report.peak_mb:.1f} MB" if report.peak_mb else "—")
+        st.caption("Os tempos incluem o overhead do cProfile/tracemalloc; apenas a thread principal é perfilada.")
+
+        tab_cum, tab_own, tab_mem = st.tabs(["Tempo acumulado", "Tempo próprio", "Memória"])
+        with tab_cum:
+            st.dataframe(report.hotspots.round(4), hide_index=True, use_container_width=True)
+        with tab_own:
+            st.dataframe(report.own_time_hotspots.round(4), hide_index=True, use_container_width=True)
+        with tab_mem:
+            if report.memory.empty:
+                st.info("Rastreamento de memória desativado nesta captura.")
+            else:
+                st.dataframe(report.memory.round(3), hide_index=True, use_container_width=True)
+
+        st.download_button(
+            "📥 Baixar perfil (.zip com .prof, relatório e tabelas)",
+            data=report.to_zip(),
+            file_name=f"perfil_{time.strftime('%Y%m%d_%H%M%S', time.localtime(report.created_at))}.zip",
+            mime="application/zip",
+            key="download_profile_zip",
+        )
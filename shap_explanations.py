@@ -0,0 +1,250 @@
+# Valores SHAP calculados uma vez por modelo treinado e guardados de forma compacta (float32)
+
+from dataclasses import dataclass
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.linear_model import LinearRegression, LogisticRegression
+
+from boosting import unwrap
+from lazy_imports import lazy_module
+from telemetry import track
+
+shap = lazy_module("shap")
+
+# KernelExplainer: observações explicadas por padrão, centróides k-means do fundo e linhas
+# usadas para ajustar o k-means; blocos por worker do pool (mais blocos que workers equilibra a carga)
+KERNEL_MAX_ROWS = 500
+KERNEL_BACKGROUND = 50
+KERNEL_KMEANS_ROWS = 20_000
+KERNEL_CHUNKS_PER_WORKER = 4
+LINEAR_BACKGROUND = 1000
+
+
+def clean_feature_names(preprocessor) -> list:
+    """Nomes das colunas do ColumnTransformer sem os prefixos 'num__'/'cat__' ('variável: categoria' no one-hot)."""
+    cleaned = []
+    for name in preprocessor.get_feature_names_out():
+        name = name.replace('num__', '')
+        if 'cat__' in name:
+            parts = name.split('__')
+            if len(parts) > 1:
+                feature_and_value = parts[1]
+                last_underscore_idx = feature_and_value.rfind('_')
+                if last_underscore_idx != -1:
+                    name = f"{feature_and_value[:last_underscore_idx]}: {feature_and_value[last_underscore_idx + 1:]}"
+                else:
+                    name = feature_and_value.replace('cat__', '')
+            else:
+                name = name.replace('cat__', '')
+        cleaned.append(name)
+    return cleaned
+
+
+def _is_tree_ensemble(model) -> bool:
+    """Random Forest, XGBoost ou LightGBM (sem importar as bibliotecas de boosting)."""
+    model = unwrap(model)
+    if isinstance(model, (RandomForestClassifier, RandomForestRegressor)):
+        return True
+    return type(model).__module__.split(".")[0] in ("xgboost", "lightgbm")
+
+
+def supports_native_contributions(model) -> bool:
+    """XGBoost e LightGBM calculam o TreeSHAP exato nativamente (pred_contrib), em paralelo."""
+    model = unwrap(model)
+    return type(model).__module__.split(".")[0] in ("xgboost", "lightgbm")
+
+
+def native_contributions(model, X) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Contribuições TreeSHAP nativas do XGBoost (`pred_contribs`) ou do LightGBM
+    (`pred_contrib`), multithread e sem passar pelo shap.TreeExplainer. Retorna
+    (values, base_values) com formas (n, p)/(n,) ou, em multiclasse, (n, p, k)/(n, k),
+    na escala de margem (log-odds para classificação), como o TreeExplainer.
+    Um DataFrame com colunas category (pré-processamento nativo) é passado como está.
+    """
+    model = unwrap(model)
+    if not isinstance(X, pd.DataFrame):
+        X = np.asarray(X, dtype=np.float32)
+    n, p = X.shape
+    if type(model).__module__.split(".")[0] == "xgboost":
+        import xgboost
+
+        booster = model.get_booster()
+        try:
+            # com early stopping, só as árvores até a melhor iteração (como em model.predict)
+            iteration_range = (0, int(model.best_iteration) + 1)
+        except (AttributeError, TypeError, ValueError):
+            iteration_range = (0, 0)
+        contrib = booster.predict(xgboost.DMatrix(X, enable_categorical=isinstance(X, pd.DataFrame)), pred_contribs=True, iteration_range=iteration_range)
+        if contrib.ndim == 3:  # (n, k, p + 1)
+            return np.moveaxis(contrib[:, :, :p], 1, 2), contrib[:, :, p]
+        return contrib[:, :p], contrib[:, p]
+
+    contrib = np.asarray(model.predict(X, pred_contrib=True))
+    k = contrib.shape[1] // (p + 1)
+    if k > 1:  # (n, k * (p + 1)), blocos por classe
+        contrib = contrib.reshape(n, k, p + 1)
+        return np.moveaxis(contrib[:, :, :p], 1, 2), contrib[:, :, p]
+    return contrib[:, :p], contrib[:, p]
+
+
+def uses_kernel_explainer(model) -> bool:
+    """Modelos sem explicador específico (SVM, KNN): caem no KernelExplainer."""
+    return not (_is_tree_ensemble(model) or isinstance(model, (LinearRegression, LogisticRegression)))
+
+
+def kmeans_background(X, k: int = KERNEL_BACKGROUND, random_state: int = 42):
+    """
+    Resume o fundo do KernelExplainer em `k` centróides ponderados pelo tamanho de cada
+    grupo (shap.kmeans), em vez de `k` linhas sorteadas: cobre a distribuição de treino
+    com o mesmo custo por avaliação.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    if X.shape[0] > KERNEL_KMEANS_ROWS:
+        X = X[np.random.default_rng(random_state).choice(X.shape[0], KERNEL_KMEANS_ROWS, replace=False)]
+    if X.shape[0] <= k:
+        return X
+    return shap.kmeans(X, k)
+
+
+def _kernel_chunk(predict_fn, background, rows, threads: int, nsamples):
+    """Worker do pool: KernelExplainer sobre um bloco de linhas (uma chamada de predict por linha, com todas as coalizões)."""
+    from threadpoolctl import threadpool_limits
+
+    with threadpool_limits(limits=threads):
+        explainer = shap.KernelExplainer(predict_fn, background)
+        values = explainer.shap_values(rows, nsamples=nsamples, silent=True)
+    if isinstance(values, list):
+        values = np.stack(values, axis=-1)
+    return np.asarray(values, dtype=np.float32), np.asarray(explainer.expected_value, dtype=np.float32)
+
+
+def parallel_kernel_shap(predict_fn, background, rows, nsamples="auto", n_workers: int | None = None, progress=None):
+    """
+    Kernel SHAP com as linhas explicadas divididas em blocos entre processos (loky).
+    Cada linha avalia todas as suas coalizões numa única chamada de `predict_fn`
+    (nsamples × fundo linhas sintéticas), e os blocos rodam em paralelo com
+    `núcleos // workers` threads cada, para não sobreinscrever os núcleos.
+    """
+    from model_leaderboard import thread_budget
+
+    rows = np.asarray(rows, dtype=np.float64)
+    n_workers = max(1, min(n_workers or os.cpu_count() or 1, rows.shape[0]))
+    n_chunks = min(rows.shape[0], n_workers * KERNEL_CHUNKS_PER_WORKER)
+    bounds = np.linspace(0, rows.shape[0], n_chunks + 1).astype(int)
+    threads = thread_budget(n_workers)
+    tasks = (joblib.delayed(_kernel_chunk)(predict_fn, background, rows[a:b], threads, nsamples)
+             for a, b in zip(bounds[:-1], bounds[1:]))
+    # "generator" preserva a ordem dos blocos e permite relatar o progresso
+    parts = []
+    for part in joblib.Parallel(n_jobs=n_workers, backend="loky", return_as="generator")(tasks):
+        parts.append(part)
+        if progress is not None:
+            progress(len(parts) / n_chunks, f"Kernel SHAP: {bounds[len(parts)]}/{rows.shape[0]} observações")
+    return np.concatenate([p[0] for p in parts], axis=0), parts[0][1]
+
+
+def _dense(matrix) -> np.ndarray:
+    """Matriz numérica densa; colunas category viram seus códigos (ausentes como NaN)."""
+    if isinstance(matrix, pd.DataFrame):
+        return pd.DataFrame({
+            c: s.cat.codes.where(s.cat.codes >= 0) if isinstance(s.dtype, pd.CategoricalDtype) else s
+            for c, s in matrix.items()
+        }).to_numpy(dtype=np.float64)
+    return matrix.toarray() if hasattr(matrix, "toarray") else np.asarray(matrix)
+
+
+@dataclass
+class ShapResult:
+    """
+    Valores SHAP de um modelo sobre o conjunto de teste (ou a amostra explicada).
+    `values` tem forma (n, p) para uma saída ou (n, p, k) com uma fatia por classe;
+    `base_values` tem forma (n,) ou (n, k). Tudo em float32 para ocupar metade da memória.
+    """
+    values: np.ndarray
+    base_values: np.ndarray
+    data: np.ndarray
+    feature_names: list
+    explainer: str
+    compute_time: float
+
+    @property
+    def n_outputs(self) -> int:
+        return self.values.shape[2] if self.values.ndim == 3 else 1
+
+    @property
+    def n_rows(self) -> int:
+        return self.values.shape[0]
+
+    def explanation(self, output: int = 0):
+        """shap.Explanation de uma saída (classe); fatiar o array guardado não recalcula nada."""
+        values = self.values[:, :, output] if self.values.ndim == 3 else self.values
+        base = self.base_values[:, output] if self.base_values.ndim == 2 else self.base_values
+        return shap.Explanation(values=values, base_values=base, data=self.data, feature_names=self.feature_names)
+
+    def frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.data, columns=self.feature_names)
+
+
+def _as_result(raw_values, expected_value, data, feature_names, explainer, start) -> ShapResult:
+    """Normaliza as saídas das várias versões do SHAP (lista por classe ou array 3D) para ShapResult."""
+    if isinstance(raw_values, list):
+        raw_values = np.stack(raw_values, axis=-1)
+    values = np.asarray(raw_values, dtype=np.float32)
+    n = values.shape[0]
+    base = np.asarray(expected_value, dtype=np.float32)
+    if values.ndim == 3 and base.ndim < 2:
+        base = np.broadcast_to(base.reshape(1, -1), (n, values.shape[2]))
+    elif values.ndim == 2 and base.shape != (n,):
+        base = np.full(n, base.reshape(-1)[0], dtype=np.float32)
+    return ShapResult(
+        values=values, base_values=np.ascontiguousarray(base, dtype=np.float32),
+        data=np.asarray(data, dtype=np.float32), feature_names=list(feature_names),
+        explainer=explainer, compute_time=time.perf_counter() - start,
+    )
+
+
+def compute_shap(pipeline, X_train, X_test, step: str, task: str, random_state: int = 42,
+                 kernel_max_rows: int = KERNEL_MAX_ROWS, progress=None) -> ShapResult:
+    """
+    Explica o passo final do Pipeline sobre X_test pré-processado (que pode ser o
+    dataset inteiro): contribuições nativas para XGBoost/LightGBM, TreeExplainer para
+    Random Forest, LinearExplainer para modelos lineares e Kernel SHAP paralelo (até
+    `kernel_max_rows` observações, fundo resumido por k-means) para os demais. Em classificação guarda todas as classes de uma vez, de modo que
+    trocar a classe exibida não exige recalcular.
+    """
+    start = time.perf_counter()
+    preprocessor = pipeline.named_steps['preprocessor']
+    model = unwrap(pipeline.named_steps[step])
+    names = clean_feature_names(preprocessor)
+    X_test_raw = preprocessor.transform(X_test)
+    X_test_pre = _dense(X_test_raw)
+
+    with track("shap_explanations.compute_shap", shape=X_test_pre.shape, modelo=type(model).__name__):
+        if supports_native_contributions(model):
+            values, base = native_contributions(model, X_test_raw if isinstance(X_test_raw, pd.DataFrame) else X_test_pre)
+            return _as_result(values, base, X_test_pre, names, "nativo", start)
+
+        if _is_tree_ensemble(model):
+            output = shap.TreeExplainer(model)(pd.DataFrame(X_test_pre, columns=names))
+            return _as_result(output.values, output.base_values, X_test_pre, names, "tree", start)
+
+        if isinstance(model, (LinearRegression, LogisticRegression)):
+            background = _dense(preprocessor.transform(X_train))
+            if background.shape[0] > LINEAR_BACKGROUND:
+                background = shap.utils.sample(background, LINEAR_BACKGROUND, random_state=random_state)
+            explainer = shap.LinearExplainer(model, background)
+            return _as_result(explainer.shap_values(X_test_pre), explainer.expected_value, X_test_pre, names, "linear", start)
+
+        rows = X_test_pre
+        if rows.shape[0] > kernel_max_rows:
+            rows = shap.utils.sample(rows, kernel_max_rows, random_state=random_state)
+        background = kmeans_background(_dense(preprocessor.transform(X_train)), random_state=random_state)
+        predict_fn = model.predict_proba if task == "classificacao" else model.predict
+        values, expected_value = parallel_kernel_shap(predict_fn, background, rows, progress=progress)
+        return _as_result(values, expected_value, rows, names, "kernel", start)
@@ -0,0 +1,174 @@
+# Telemetria leve das operações pesadas: tempo de relógio, tempo de CPU, pico de memória e forma da entrada
+
+from contextlib import contextmanager
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+try:
+    import resource
+except ImportError:  # Windows: sem getrusage, o pico de memória não é registrado
+    resource = None
+
+# Arquivo JSONL (um evento por linha); BDS_TELEMETRY=0 desativa o registro
+TELEMETRY_ENABLED = os.environ.get("BDS_TELEMETRY", "1") != "0"
+TELEMETRY_LOG = os.environ.get(
+    "BDS_TELEMETRY_LOG", os.path.join(os.path.expanduser("~"), ".bds_mep", "telemetry.jsonl")
+)
+
+_LOCK = threading.Lock()
+
+
+def _peak_rss_bytes() -> int | None:
+    """Pico de memória residente do processo até agora (ru_maxrss: KB no Linux, bytes no macOS)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return int(peak if sys.platform == "darwin" else peak * 1024)
+
+
+def _shape_of(value):
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return list(value.shape)
+    return None
+
+
+def input_shape(args=(), kwargs=None):
+    """Forma do primeiro argumento que seja DataFrame, Series ou ndarray (None se não houver)."""
+    for value in list(args) + list((kwargs or {}).values()):
+        shape = _shape_of(value)
+        if shape is not None:
+            return shape
+    return None
+
+
+def record(event: dict, path: str | None = None) -> None:
+    """Acrescenta um evento ao log JSONL. Falhas de escrita nunca interrompem a análise."""
+    if not TELEMETRY_ENABLED:
+        return
+    path = path or TELEMETRY_LOG
+    line = json.dumps(event, ensure_ascii=False, default=str)
+    try:
+        with _LOCK:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+    except OSError:
+        pass
+
+
+@contextmanager
+def track(operation: str, shape=None, **extra):
+    """
+    Mede o bloco e registra um evento com 'operacao', 'inicio', 'tempo_s', 'cpu_s',
+    'rss_pico_delta_mb', 'forma', 'status' e campos extras. O tempo de CPU é do
+    processo inteiro (inclui threads de BLAS e do pool). O delta de pico é quanto o
+    bloco elevou a marca máxima de memória residente (0 se não a ultrapassou).
+    Uso: `with track("model_training.ols", shape=X.shape): model.fit()`.
+    """
+    event = {"operacao": operation, "inicio": time.time(), "forma": list(shape) if shape is not None else None, **extra}
+    peak_before = _peak_rss_bytes()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    status = "ok"
+    try:
+        yield event
+    except BaseException as e:
+        status = f"erro: {type(e).__name__}"
+        raise
+    finally:
+        event["tempo_s"] = time.perf_counter() - wall_start
+        event["cpu_s"] = time.process_time() - cpu_start
+        peak_after = _peak_rss_bytes()
+        event["rss_pico_delta_mb"] = (
+            (peak_after - peak_before) / (1024 * 1024) if peak_before is not None else None
+        )
+        event["status"] = status
+        record(event)
+
+
+def instrumented(operation: str | None = None):
+    """
+    Decorador que registra cada chamada da função com `track`, usando como forma a do
+    primeiro argumento de dados (e a do resultado, em 'forma_saida'). Sob `@cached_computation`, apenas as execuções reais
+    (não os acertos de cache) são registradas.
+    """
+    def decorator(func):
+        name = operation or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with track(name, shape=input_shape(args, kwargs)) as event:
+                result = func(*args, **kwargs)
+                event["forma_saida"] = _shape_of(result)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def read_events(path: str | None = None) -> pd.DataFrame:
+    """Eventos registrados no log JSONL (linhas corrompidas são ignoradas)."""
+    path = path or TELEMETRY_LOG
+    rows = []
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    continue
+    df = pd.DataFrame(rows)
+    if not df.empty and "inicio" in df.columns:
+        df["inicio"] = pd.to_datetime(df["inicio"], unit="s")
+    return df
+
+
+def summarize_events(events: pd.DataFrame) -> pd.DataFrame:
+    """Resumo por operação: chamadas, erros, p50/p95 de tempo, CPU média e maior delta de pico."""
+    columns = ["Operação", "Chamadas", "Erros", "p50 (s)", "p95 (s)", "CPU média (s)", "Δ pico RSS máx. (MB)"]
+    if events.empty:
+        return pd.DataFrame(columns=columns)
+    grouped = events.groupby("operacao")
+    summary = pd.DataFrame({
+        "Operação": list(grouped.groups.keys()),
+        "Chamadas": grouped.size().to_numpy(),
+        "Erros": grouped["status"].agg(lambda s: int((s != "ok").sum())).to_numpy(),
+        "p50 (s)": grouped["tempo_s"].quantile(0.5).to_numpy(),
+        "p95 (s)": grouped["tempo_s"].quantile(0.95).to_numpy(),
+        "CPU média (s)": grouped["cpu_s"].mean().to_numpy(),
+        "Δ pico RSS máx. (MB)": grouped["rss_pico_delta_mb"].max().to_numpy(),
+    }, columns=columns)
+    return summary.sort_values("p95 (s)", ascending=False).reset_index(drop=True)
+
+
+def show_telemetry_page():
+    """Página administrativa com o resumo da telemetria."""
+    st.header("🛠️ Telemetria de Desempenho")
+    st.caption(f"Log: `{TELEMETRY_LOG}`" + ("" if TELEMETRY_ENABLED else " (registro desativado por BDS_TELEMETRY=0)"))
+    events = read_events()
+    if events.empty:
+        st.info("Nenhum evento registrado ainda.")
+        return
+
+    operations = sorted(events["operacao"].unique())
+    selected = st.multiselect("Filtrar operações:", operations, default=[], key="telemetry_ops")
+    if selected:
+        events = events[events["operacao"].isin(selected)]
+
+    st.subheader("Resumo por operação")
+    st.dataframe(summarize_events(events).round(3), hide_index=True, use_container_width=True)
+
+    with st.expander("Eventos recentes"):
+        st.dataframe(events.sort_values("inicio", ascending=False).head(500), hide_index=True, use_container_width=True)
+
+    with open(TELEMETRY_LOG, "rb") as f:
+        st.download_button("📥 Baixar log (JSONL)", data=f.read(), file_name="telemetry.jsonl", mime="application/json")
@@ -0,0 +1,151 @@
+# Resultado de treino (modelo, métricas de teste, validação cruzada e predições fora da dobra) reaproveitado entre execuções
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.base import clone
+from sklearn.metrics import accuracy_score, r2_score
+from sklearn.model_selection import KFold, cross_validate
+
+from dataset_cache import derive_fingerprint
+from hyperparameter_search import run_search
+from telemetry import track
+
+# Resultados mantidos por sessão (os mais antigos são descartados) e dobras da validação cruzada
+MAX_RESULTS = 8
+CV_FOLDS = 5
+SCORING = {"regressao": "r2", "classificacao": "accuracy"}
+_SCORERS = {"r2": r2_score, "accuracy": accuracy_score}
+
+
+@dataclass
+class TrainingResult:
+    """
+    Tudo o que a exibição precisa após um treino, sem reajustar modelos: o modelo
+    ajustado no treino, as predições no teste, os escores por dobra e as predições
+    fora da dobra (OOF) da validação cruzada em todos os dados, e os resultados da
+    busca de hiperparâmetros (`cv_results_`), quando houver.
+    """
+    key: str
+    task: str
+    model_option: str
+    model: object
+    X_train: pd.DataFrame
+    X_test: pd.DataFrame
+    y_train: object
+    y_test: object
+    y_pred_test: np.ndarray
+    fold_scores: np.ndarray
+    oof_predictions: np.ndarray
+    oof_score: float
+    scoring: str
+    best_params: object = "N/A"
+    search_label: str = "Não"
+    cv_results_: pd.DataFrame | None = None
+    search_summary: dict | None = None
+    notes: list = field(default_factory=list)
+    # Alvo, mapeamento código -> classe original e versão dos dados usados no treino (para salvar
+    # o modelo com os metadados dele, e não com os widgets atuais)
+    target: str = ""
+    classes: dict | None = None
+    fingerprint: str | None = None
+    # ShapResult calculado sob demanda, uma única vez por modelo e conjunto explicado ("teste", "completo", "teste_<n>")
+    shap: dict = field(default_factory=dict)
+    fit_time: float = 0.0
+    created_at: float = field(default_factory=time.time)
+
+    @property
+    def cv_mean(self) -> float:
+        return float(np.mean(self.fold_scores))
+
+    @property
+    def cv_std(self) -> float:
+        return float(np.std(self.fold_scores))
+
+
+def training_key(fingerprint: str, task: str, config: dict) -> str:
+    """Chave do resultado: versão do dataset + toda a configuração que altera o treino."""
+    return derive_fingerprint(fingerprint, task, config)
+
+
+def result_store(session_state) -> OrderedDict:
+    """Resultados de treino da sessão (LRU com até MAX_RESULTS entradas)."""
+    store = session_state.get("ml_training_results")
+    if store is None:
+        store = OrderedDict()
+        session_state["ml_training_results"] = store
+    return store
+
+
+def get_result(store: OrderedDict, key: str | None) -> TrainingResult | None:
+    if key is None or key not in store:
+        return None
+    store.move_to_end(key)
+    return store[key]
+
+
+def put_result(store: OrderedDict, result: TrainingResult) -> None:
+    store[result.key] = result
+    store.move_to_end(result.key)
+    while len(store) > MAX_RESULTS:
+        store.popitem(last=False)
+
+
+def cross_validate_oof(model, X, y, cv, scoring: str):
+    """
+    Escores por dobra e predições fora da dobra com os mesmos ajustes da validação
+    cruzada (os estimadores de cada dobra predizem a própria dobra de teste).
+    """
+    out = cross_validate(model, X, y, cv=cv, scoring=scoring, n_jobs=-1, return_estimator=True, return_indices=True)
+    y_values = np.asarray(y)
+    oof = np.empty(len(y_values), dtype=np.float64 if scoring == "r2" else y_values.dtype)
+    for estimator, test_idx in zip(out["estimator"], out["indices"]["test"]):
+        X_fold = X.iloc[test_idx] if hasattr(X, "iloc") else X[test_idx]
+        oof[test_idx] = estimator.predict(X_fold)
+    return np.asarray(out["test_score"]), oof
+
+
+def train_model(pipeline, X, y, X_train, X_test, y_train, y_test, task: str, model_option: str, key: str,
+                step: str, random_state: int = 42, search_settings: dict | None = None, progress=None,
+                target: str = "", classes: dict | None = None, fingerprint: str | None = None) -> TrainingResult:
+    """
+    Ajusta o pipeline no treino (diretamente ou pela busca de hiperparâmetros), prediz
+    o teste e roda uma única validação cruzada em (X, y) com o modelo final, guardando
+    escores por dobra e predições OOF.
+    """
+    start = time.perf_counter()
+    scoring = SCORING[task]
+    best_params, cv_results, summary, notes = "N/A", None, None, []
+    label = search_settings["label"] if search_settings else "Não"
+    if search_settings:
+        with track(f"model_classification_regression.{task}.busca", shape=X_train.shape, modelo=model_option, estrategia=search_settings["strategy"]):
+            search = run_search(
+                pipeline, X_train, y_train, model_option, step, task,
+                strategy=search_settings["strategy"], budget_s=search_settings["budget_s"],
+                n_iter=search_settings["n_iter"], resource=search_settings["resource"],
+                random_state=random_state, progress=progress,
+            )
+        model = search.best_estimator_
+        best_params, cv_results, notes = search.best_params_, search.cv_results_, search.notes
+        summary = {"best_score": search.best_score_, "n_fits": search.n_fits, "elapsed": search.elapsed}
+    else:
+        model = clone(pipeline)
+        with track(f"model_classification_regression.{task}.fit", shape=X_train.shape, modelo=model_option):
+            model.fit(X_train, y_train)
+
+    y_pred_test = model.predict(X_test)
+    with track(f"model_classification_regression.{task}.validacao_cruzada", shape=getattr(X, "shape", None), modelo=model_option):
+        fold_scores, oof = cross_validate_oof(
+            model, X, y, KFold(n_splits=CV_FOLDS, shuffle=True, random_state=random_state), scoring
+        )
+    return TrainingResult(
+        key=key, task=task, model_option=model_option, model=model,
+        X_train=X_train, X_test=X_test, y_train=y_train, y_test=y_test,
+        y_pred_test=y_pred_test, fold_scores=fold_scores, oof_predictions=oof,
+        oof_score=float(_SCORERS[scoring](np.asarray(y), oof)), scoring=scoring,
+        best_params=best_params, search_label=label, cv_results_=cv_results, search_summary=summary,
+        notes=notes, target=target, classes=classes, fingerprint=fingerprint, fit_time=time.perf_counter() - start,
+    )
@@ -0,0 +1,196 @@
+# Inferência de tipos por amostragem e conversão vetorizada com contagem de falhas
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+# Linhas amostradas por coluna para inferir o tipo e fração mínima de valores convertidos
+SAMPLE_SIZE = 1000
+MIN_SUCCESS_RATE = 0.95
+# Limites para sugerir 'category' em colunas de texto
+MAX_CATEGORY_RATIO = 0.5
+MAX_CATEGORIES = 1000
+
+# Tipos de destino oferecidos na interface
+TARGET_TYPES = ['object', 'category', 'int64', 'float64', 'bool', 'datetime64[ns]']
+
+BOOL_TOKENS = {
+    "true": True, "false": False,
+    "1": True, "0": False,
+    "yes": True, "no": False,
+    "sim": True, "não": False, "nao": False,
+    "s": True, "n": False,
+    "y": True,
+    "t": True, "f": False,
+    "verdadeiro": True, "falso": False,
+}
+
+# Formatos de data testados na inferência (o primeiro com maior taxa de sucesso é usado)
+DATETIME_FORMATS = [
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S",
+    "%d/%m/%Y",
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y %H:%M:%S",
+    "%m/%d/%Y",
+    "%d-%m-%Y",
+    "%Y/%m/%d",
+    "%d.%m.%Y",
+]
+
+
+def _sample_values(series: pd.Series, sample_size: int, seed: int) -> pd.Series:
+    """
+    Amostra dos valores não ausentes, como texto sem espaços nas bordas. Sorteia
+    posições antes de descartar ausentes, para não percorrer a coluna inteira.
+    """
+    n = len(series)
+    if n > 2 * sample_size:
+        rng = np.random.default_rng(seed)
+        values = series.iloc[rng.choice(n, size=2 * sample_size, replace=False)].dropna()
+        if len(values) < sample_size // 10:  # coluna quase toda ausente: usa todos os valores
+            values = series.dropna()
+    else:
+        values = series.dropna()
+    if len(values) > sample_size:
+        values = values.iloc[:sample_size]
+    return values.astype(str).str.strip()
+
+
+def _numeric_rate(sample: pd.Series, decimal: str = ".") -> float:
+    if decimal == ",":
+        sample = sample.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+    return pd.to_numeric(sample, errors="coerce").notna().mean()
+
+
+def _datetime_rate(sample: pd.Series, fmt: str) -> float:
+    return pd.to_datetime(sample, format=fmt, errors="coerce").notna().mean()
+
+
+def infer_column_type(series: pd.Series, sample_size: int = SAMPLE_SIZE, seed: int = 0,
+                      min_success: float = MIN_SUCCESS_RATE) -> dict:
+    """
+    Sugere o tipo de uma coluna a partir de uma amostra: 'bool', 'int64', 'float64',
+    'datetime64[ns]', 'category' ou 'object'. Retorna dict com 'tipo', 'formato'
+    (formato de data ou separador decimal, quando houver) e 'confianca' (fração da
+    amostra convertida com sucesso).
+    """
+    if pd.api.types.is_bool_dtype(series):
+        return {"tipo": "bool", "formato": None, "confianca": 1.0}
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return {"tipo": "datetime64[ns]", "formato": None, "confianca": 1.0}
+    if pd.api.types.is_numeric_dtype(series):
+        return {"tipo": "int64" if pd.api.types.is_integer_dtype(series) else "float64", "formato": None, "confianca": 1.0}
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return {"tipo": "category", "formato": None, "confianca": 1.0}
+
+    sample = _sample_values(series, sample_size, seed)
+    if sample.empty:
+        return {"tipo": "object", "formato": None, "confianca": 0.0}
+
+    lowered = sample.str.lower()
+    bool_rate = lowered.isin(BOOL_TOKENS.keys()).mean()
+    if bool_rate >= min_success and lowered.nunique() <= 2:
+        return {"tipo": "bool", "formato": None, "confianca": float(bool_rate)}
+
+    for decimal in (".", ","):
+        rate = _numeric_rate(sample, decimal)
+        if rate >= min_success:
+            parsed = pd.to_numeric(
+                sample if decimal == "." else sample.str.replace(".", "", regex=False).str.replace(",", ".", regex=False),
+                errors="coerce",
+            ).dropna()
+            kind = "int64" if np.all(np.mod(parsed.to_numpy(dtype=np.float64), 1) == 0) else "float64"
+            return {"tipo": kind, "formato": None if decimal == "." else "decimal=,", "confianca": float(rate)}
+
+    best_fmt, best_rate = None, 0.0
+    for fmt in DATETIME_FORMATS:
+        rate = _datetime_rate(sample, fmt)
+        if rate > best_rate:
+            best_fmt, best_rate = fmt, rate
+        if rate == 1.0:
+            break
+    if best_rate >= min_success:
+        return {"tipo": "datetime64[ns]", "formato": best_fmt, "confianca": float(best_rate)}
+
+    n_unique = sample.nunique()
+    if n_unique <= MAX_CATEGORIES and n_unique / len(sample) <= MAX_CATEGORY_RATIO:
+        return {"tipo": "category", "formato": None, "confianca": 1.0}
+    return {"tipo": "object", "formato": None, "confianca": 1.0}
+
+
+def infer_types(df: pd.DataFrame, sample_size: int = SAMPLE_SIZE, seed: int = 0) -> pd.DataFrame:
+    """Tabela de inferência para todas as colunas (uma linha por coluna)."""
+    rows = []
+    for col in df.columns:
+        info = infer_column_type(df[col], sample_size=sample_size, seed=seed)
+        rows.append({
+            "Coluna": col,
+            "Tipo atual": str(df[col].dtype),
+            "Tipo sugerido": info["tipo"],
+            "Formato": info["formato"],
+            "Confiança": round(info["confianca"], 3),
+        })
+    return pd.DataFrame(rows)
+
+
+def coerce_column(series: pd.Series, dtype: str, fmt: str | None = None):
+    """
+    Converte uma coluna com operações vetorizadas. Valores que não puderem ser
+    convertidos viram ausentes; retorna (série convertida, número de falhas).
+    `fmt`: formato de data (strftime) ou "decimal=," para números com vírgula decimal.
+    """
+    before = series.notna()
+    if dtype == "category":
+        converted = series.astype("category")
+    elif dtype == "object":
+        converted = series.astype("object")
+    elif dtype == "bool":
+        if pd.api.types.is_bool_dtype(series):
+            converted = series.astype("boolean")
+        else:
+            converted = series.astype(str).str.strip().str.lower().map(BOOL_TOKENS).astype("boolean")
+            converted[~before] = pd.NA
+    elif dtype.startswith("datetime"):
+        with warnings.catch_warnings():
+            # sem formato explícito o pandas avisa que inferirá elemento a elemento
+            warnings.simplefilter("ignore", category=UserWarning)
+            converted = pd.to_datetime(series, format=fmt, errors="coerce")
+    elif dtype in ("int64", "float64"):
+        values = series
+        if not pd.api.types.is_numeric_dtype(values):
+            values = values.astype(str).str.strip()
+            if fmt == "decimal=,":
+                values = values.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+            values = values.where(before)
+        converted = pd.to_numeric(values, errors="coerce")
+        if dtype == "int64":
+            fractional = converted.notna() & (converted % 1 != 0)
+            converted = converted.mask(fractional)
+            # inteiro anulável quando há ausentes (int64 do NumPy não representa NaN)
+            converted = converted.astype("Int64") if converted.isna().any() else converted.astype("int64")
+        else:
+            converted = converted.astype("float64")
+    else:
+        converted = series.astype(dtype)
+    failures = int((before & converted.isna()).sum())
+    return converted, failures
+
+
+def coerce_types(df: pd.DataFrame, conversions: dict, formats: dict | None = None):
+    """
+    Aplica várias conversões ({coluna: tipo}) e retorna (DataFrame convertido,
+    relatório com as falhas de conversão por coluna).
+    """
+    formats = formats or {}
+    df = df.copy()
+    report = []
+    for col, dtype in conversions.items():
+        try:
+            df[col], failures = coerce_column(df[col], dtype, formats.get(col))
+            report.append({"Coluna": col, "Tipo": dtype, "Falhas de conversão": failures, "Erro": None})
+        except Exception as e:
+            report.append({"Coluna": col, "Tipo": dtype, "Falhas de conversão": np.nan, "Erro": str(e)})
+    return df, pd.DataFrame(report, columns=["Coluna", "Tipo", "Falhas de conversão", "Erro"])
@@ -5,6 +5,8 @@ import datetime
 import io
 import os
 
+from artifact_store import temporary_path
+
 def gerar_pdf_radar_l4(df_metricas, fig_radar, modelo, metrica):
     # Cria buffer
     pdf_buffer = io.BytesIO()
@@ -42,14 +44,11 @@ def gerar_pdf_radar_l4(df_metricas, fig_radar, modelo, metrica):
     pdf.set_font('DejaVu', 'B', 14)
     pdf.cell(0, 10, f"Gráfico Radar L4 - Métrica: {metrica}", ln=True)
 
-    # Salva o radar em imagem temporária
+    # O FPDF 1.7 só lê imagens de arquivo: usa um caminho temporário exclusivo,
+    # removido logo após a inserção (evita colisão de temp_radar.png entre sessões)
     img_bytes = fig_radar.to_image(format="png")
-    img_filename = "temp_radar.png"
-    with open(img_filename, "wb") as f:
-        f.write(img_bytes)
-
-    # Insere imagem
-    pdf.image(img_filename, x=25, y=40, w=160)
+    with temporary_path(".png", img_bytes) as img_filename:
+        pdf.image(img_filename, x=25, y=40, w=160)
 
     # Página 3 — Tabela de métricas
     pdf.add_page()